@@ -1,183 +1,612 @@
+"""
+Benchmark suite: named scenarios over DuckDB databases and synthetic inputs,
+with JSON results and a compare command that flags regressions.
+
+    python benchmark.py list
+    python benchmark.py run --output results.json [--scenario 'import/*'] \
+        [--db data/data_sample.duckdb] [--synthetic 10000 100000]
+    python benchmark.py compare baseline.json results.json [--threshold 0.1]
+
+--synthetic sizes are SNOMED-shaped databases generated for the run; larger
+ones can be generated once with `python -m snomed_characterization.synthetic_omop`
+and passed with --db.
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
 import os
-import psutil
-import gc
-import time
+import platform
+import random
+import statistics
 import sys
-import networkx as nx
-from pyroaring import BitMap
-from snomed_characterization.graphs.bitmap_graph import (
-    BitMapGraph,
-    IS_ANCESTOR_OF,
-    IS_DESCENDANT_OF,
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Callable, Dict, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+
+RESULTS_FORMAT_VERSION = 2
+
+MEMORY_NOTE = (
+    "peak_python_memory_mb is the tracemalloc peak, Python heap allocations"
+    " only; peak_rss_delta_mb is the growth of the process peak RSS, which"
+    " also covers native allocations (pyroaring, DuckDB, numpy), null where"
+    " /proc/self is unavailable"
 )
 
+DEFAULT_DATABASES = ["data/data_sample.duckdb"]
+DEFAULT_SYNTHETIC_SIZES = [10_000, 100_000]
+
+# Queries per hierarchy scenario, pairs per similarity scenario
+NUM_QUERIES = 1_000
+NUM_PAIRS = 10_000
+
+
+class SkipScenario(Exception):
+    """The scenario does not apply to this input (e.g. no OMOP tables)."""
+
+
+@dataclass
+class BenchmarkInput:
+    """
+    A hierarchy (direct child -> parent edges) and a cohort to run the
+    scenarios on. DuckDB inputs also keep their path for the import
+    scenarios; their hierarchy and cohort are loaded on first use.
+    """
+
+    name: str
+    db_path: Optional[str] = None
+    edges: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+    patient_conditions: Optional[List[List[int]]] = None
+    seed: int = 0
+    _loaded: bool = field(default=False, repr=False)
+
+    def _load_from_duckdb(self):
+        from snomed_characterization.services.import_duckdb_concepts_to_frozen_graph import (
+            ImportDuckDBConceptsToFrozenGraph,
+        )
+
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.db_path is None or not has_omop_tables(self.db_path):
+            return
+
+        service = ImportDuckDBConceptsToFrozenGraph(self.db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            service.call()
+        graph = service.snomed_graph
+        children = graph.node_ids[
+            np.repeat(np.arange(len(graph.node_ids)), np.diff(graph.parent_indptr))
+        ]
+        self.edges = (graph.node_ids, children, graph.node_ids[graph.parent_indices])
+
+        with duckdb.connect(self.db_path, read_only=True) as connection:
+            rows = connection.execute(q_patient_conditions).fetchall()
+        self.patient_conditions = [list(map(int, conditions)) for (conditions,) in rows]
+
+    def require_hierarchy(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        self._load_from_duckdb()
+        if self.edges is None or not len(self.edges[0]):
+            raise SkipScenario("no hierarchy")
+        return self.edges
+
+    def require_cohort(self) -> List[List[int]]:
+        self._load_from_duckdb()
+        if not self.patient_conditions:
+            raise SkipScenario("no patients")
+        return self.patient_conditions
+
+    def require_db(self) -> str:
+        if self.db_path is None or not has_omop_tables(self.db_path):
+            raise SkipScenario("no OMOP database")
+        return self.db_path
+
+    @cached_property
+    def bitmap_graph(self):
+        from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+
+        concept_ids, child_ids, parent_ids = self.require_hierarchy()
+        graph = BitMapGraph()
+        graph.add_hierarchy_from(concept_ids, child_ids, parent_ids)
+        return graph
+
+    @cached_property
+    def frozen_graph(self):
+        from snomed_characterization.graphs.frozen_graph import FrozenGraph
+
+        concept_ids, child_ids, parent_ids = self.require_hierarchy()
+        return FrozenGraph.from_edges(child_ids, parent_ids, concept_ids)
+
+    @cached_property
+    def networkx_graph(self):
+        return self.frozen_graph.to_networkx()
+
+    @cached_property
+    def sample_concepts(self) -> List[int]:
+        concept_ids = self.require_hierarchy()[0].tolist()
+        rng = random.Random(self.seed)
+        return [rng.choice(concept_ids) for _ in range(NUM_QUERIES)]
+
+    @cached_property
+    def analyzer(self):
+        from snomed_characterization.condition_cluster_analyzer import (
+            ConditionClusterAnalyzer,
+        )
+
+        return ConditionClusterAnalyzer(self.require_cohort(), self.frozen_graph)
+
+    @cached_property
+    def sample_pairs(self) -> List[Tuple[int, int]]:
+        codes = sorted(self.analyzer.condition_frequencies)
+        rng = random.Random(self.seed)
+        return [(rng.choice(codes), rng.choice(codes)) for _ in range(NUM_PAIRS)]
+
+
+q_patient_conditions = """
+    SELECT array_agg(DISTINCT condition_concept_id)
+    FROM condition_occurrence
+    WHERE condition_concept_id != 0
+    GROUP BY person_id
+    """
+
+
+def has_omop_tables(db_path: str) -> bool:
+    with duckdb.connect(db_path, read_only=True) as connection:
+        tables = {name for (name,) in connection.execute("SHOW TABLES").fetchall()}
+    return {"concept", "concept_ancestor", "condition_occurrence"} <= tables
+
+
+def generate_synthetic_input(
+    directory: str, num_concepts: int, num_patients: int = 1_000, seed: int = 0
+) -> BenchmarkInput:
+    """
+    SNOMED-shaped OMOP database (see synthetic_omop) written to `directory`,
+    so the import scenarios run on it too.
+    """
+    from snomed_characterization.synthetic_omop import (
+        generate_synthetic_omop_database,
+    )
 
-def get_process_memory():
-    """Get current process memory in MB"""
-    process = psutil.Process(os.getpid())
-    return process.memory_info().rss / 1024 / 1024
+    name = f"synthetic-{num_concepts}"
+    db_path = os.path.join(directory, f"{name}.duckdb")
+    generate_synthetic_omop_database(db_path, num_concepts, num_patients, seed=seed)
+    return BenchmarkInput(name=name, db_path=db_path, seed=seed)
+
+
+# name -> setup(input) returning (work to time, operations per run)
+SCENARIOS: Dict[str, Callable[[BenchmarkInput], Tuple[Callable, int]]] = {}
+
+
+def scenario(name: str):
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+
+    return register
+
+
+def _import_scenario(name: str, build: Callable[[str], object]):
+    @scenario(f"import/{name}")
+    def setup(inputs: BenchmarkInput):
+        db_path = inputs.require_db()
+
+        def work():
+            with contextlib.redirect_stdout(io.StringIO()):
+                build(db_path)
+
+        return work, 1
+
+
+def _import_snomed_graph(db_path):
+    from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+    from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
+        ImportDuckDBConceptsToSNOMEDGraph,
+    )
+
+    ImportDuckDBConceptsToSNOMEDGraph(db_path, SNOMEDGraphBuilder()).call()
+
+
+def _import_complete_graph(db_path):
+    from snomed_characterization.graphs.snomed_complete_graph_builder import (
+        SNOMEDCompleteGraphBuilder,
+    )
+    from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
+        ImportDuckDBConceptsToCompleteSNOMEDGraph,
+    )
+
+    ImportDuckDBConceptsToCompleteSNOMEDGraph(
+        db_path, SNOMEDCompleteGraphBuilder()
+    ).call()
+
+
+def _import_bitmap_graph(db_path):
+    from snomed_characterization.services.import_duckdb_concepts_to_bitmap_graph import (
+        ImportDuckDBConceptsToBitMapGraph,
+    )
+
+    ImportDuckDBConceptsToBitMapGraph(db_path).call()
+
+
+def _import_frozen_graph(db_path):
+    from snomed_characterization.services.import_duckdb_concepts_to_frozen_graph import (
+        ImportDuckDBConceptsToFrozenGraph,
+    )
+
+    ImportDuckDBConceptsToFrozenGraph(db_path).call()
+
+
+def _import_ancestor_closure(db_path):
+    from snomed_characterization.services.import_duckdb_concept_ancestor_closure import (
+        ImportDuckDBConceptAncestorClosure,
+    )
+
+    ImportDuckDBConceptAncestorClosure(db_path).call()
+
+
+_import_scenario("snomed_graph", _import_snomed_graph)
+_import_scenario("complete_graph", _import_complete_graph)
+_import_scenario("bitmap_graph", _import_bitmap_graph)
+_import_scenario("frozen_graph", _import_frozen_graph)
+_import_scenario("ancestor_closure", _import_ancestor_closure)
+
+
+@scenario("build/bitmap")
+def build_bitmap(inputs: BenchmarkInput):
+    from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+
+    concept_ids, child_ids, parent_ids = inputs.require_hierarchy()
+    return (
+        lambda: BitMapGraph().add_hierarchy_from(concept_ids, child_ids, parent_ids),
+        1,
+    )
 
 
-def get_object_size(obj):
-    """Get size of object in bytes"""
-    seen = set()
-
-    def sizeof(obj):
-        if id(obj) in seen:
-            return 0
-        seen.add(id(obj))
-        size = sys.getsizeof(obj)
-
-        if isinstance(obj, (str, int, float, bool, BitMap)):
-            return size
-        elif isinstance(obj, dict):
-            size += sum(sizeof(k) + sizeof(v) for k, v in obj.items())
-        elif isinstance(obj, (list, tuple, set)):
-            size += sum(sizeof(x) for x in obj)
-        elif hasattr(obj, "__dict__"):
-            size += sizeof(obj.__dict__)
-        return size
-
-    return sizeof(obj)
-
-
-def generate_test_hierarchy(num_concepts: int, avg_parents: int = 2):
-    """Generate test hierarchy with bidirectional relationships"""
-    concepts = list(range(num_concepts))
-    ancestor_relationships = []  # (source, target, "is_ancestor_of")
-    descendant_relationships = []  # (source, target, "is_descendant_of")
-
-    for concept in range(1, num_concepts):
-        num_parents = min(avg_parents, concept)
-        if num_parents > 0:
-            parents = list(range(max(0, concept - num_parents), concept))
-            # Add both ancestor and descendant relationships
-            for parent in parents:
-                ancestor_relationships.append((parent, concept))
-                descendant_relationships.append((concept, parent))
-
-    return concepts, ancestor_relationships, descendant_relationships
-
-
-def memory_comparison_test(num_concepts: int):
-    """Run memory and performance comparison"""
-    print(f"\nTesting with {num_concepts} concepts...")
-
-    # Generate test data
-    concepts, ancestor_rels, descendant_rels = generate_test_hierarchy(num_concepts)
-
-    # Test BitMap implementation
-    gc.collect()
-    initial_memory = get_process_memory()
-    start_time = time.time()
-
-    bitmap_graph = BitMapGraph()
-
-    # First add all concepts
-    for concept in concepts:
-        bitmap_graph.nodes.add(concept)
-        bitmap_graph.relationships[concept, IS_ANCESTOR_OF] = BitMap()
-        bitmap_graph.relationships[concept, IS_DESCENDANT_OF] = BitMap()
-
-    # Then add relationships
-    for source, target in ancestor_rels:
-        bitmap_graph.relationships[source, IS_ANCESTOR_OF].add(target)
-    for source, target in descendant_rels:
-        bitmap_graph.relationships[source, IS_DESCENDANT_OF].add(target)
-
-    bitmap_memory = get_process_memory() - initial_memory
-    bitmap_time = time.time() - start_time
-    bitmap_size = get_object_size(bitmap_graph)
-
-    # Test NetworkX implementation
-    gc.collect()
-    initial_memory = get_process_memory()
-    start_time = time.time()
-
-    nx_graph = nx.DiGraph()
-    nx_graph.add_nodes_from(concepts)
-    nx_graph.add_edges_from(ancestor_rels)  # Only need one direction for NetworkX
-
-    nx_memory = get_process_memory() - initial_memory
-    nx_time = time.time() - start_time
-    nx_size = get_object_size(nx_graph)
-
-    # Test operations on a sample of nodes
-    num_samples = min(100, num_concepts)
-    sample_nodes = concepts[:num_samples]
-
-    # Ancestor lookup
-    start = time.time()
-    for node in sample_nodes:
-        _ = bitmap_graph.get_all_ancestors(node)
-    bitmap_ancestor_time = (time.time() - start) / num_samples
-
-    start = time.time()
-    for node in sample_nodes:
-        _ = set(nx.ancestors(nx_graph, node))
-    nx_ancestor_time = (time.time() - start) / num_samples
-
-    # Descendant lookup
-    start = time.time()
-    for node in sample_nodes:
-        _ = bitmap_graph.get_all_descendants(node)
-    bitmap_descendant_time = (time.time() - start) / num_samples
-
-    start = time.time()
-    for node in sample_nodes:
-        _ = set(nx.descendants(nx_graph, node))
-    nx_descendant_time = (time.time() - start) / num_samples
-
-    results = {
-        "bitmap": {
-            "memory_mb": bitmap_memory,
-            "build_time": bitmap_time,
-            "object_size": bitmap_size,
-            "ancestor_lookup_ms": bitmap_ancestor_time * 1000,
-            "descendant_lookup_ms": bitmap_descendant_time * 1000,
-        },
-        "networkx": {
-            "memory_mb": nx_memory,
-            "build_time": nx_time,
-            "object_size": nx_size,
-            "ancestor_lookup_ms": nx_ancestor_time * 1000,
-            "descendant_lookup_ms": nx_descendant_time * 1000,
-        },
-    }
-
-    print("\nResults:")
-    print(f"{'Metric':<20} {'BitMap':<15} {'NetworkX':<15} {'Ratio (NX/BM)':<15}")
-    print("-" * 65)
-    print(
-        f"Memory (MB){'':12} {bitmap_memory:<15.2f} {nx_memory:<15.2f} {nx_memory/bitmap_memory:<15.2f}"
+@scenario("build/frozen")
+def build_frozen(inputs: BenchmarkInput):
+    from snomed_characterization.graphs.frozen_graph import FrozenGraph
+
+    concept_ids, child_ids, parent_ids = inputs.require_hierarchy()
+    return lambda: FrozenGraph.from_edges(child_ids, parent_ids, concept_ids), 1
+
+
+def _query_scenario(name: str, backend: str, query: Callable):
+    @scenario(f"{name}/{backend}")
+    def setup(inputs: BenchmarkInput):
+        graph = getattr(inputs, f"{backend}_graph")
+        sample = inputs.sample_concepts
+        return lambda: [query(graph, concept) for concept in sample], len(sample)
+
+
+for _backend in ("bitmap", "frozen"):
+    _query_scenario(
+        "ancestors", _backend, lambda graph, concept: graph.get_all_ancestors(concept)
     )
-    print(
-        f"Build Time (s){'':8} {bitmap_time:<15.2f} {nx_time:<15.2f} {nx_time/bitmap_time:<15.2f}"
+    _query_scenario(
+        "descendants",
+        _backend,
+        lambda graph, concept: graph.get_all_descendants(concept),
     )
-    print(
-        f"Object Size (KB){'':7} {bitmap_size/1024:<15.2f} {nx_size/1024:<15.2f} {nx_size/bitmap_size:<15.2f}"
+
+
+@scenario("ancestors/networkx")
+def ancestors_networkx(inputs: BenchmarkInput):
+    from snomed_characterization.graphs.networkx_hierarchy import NetworkXHierarchy
+
+    hierarchy = NetworkXHierarchy(inputs.networkx_graph)
+    sample = inputs.sample_concepts
+    return (
+        lambda: [hierarchy.get_all_ancestors(concept) for concept in sample],
+        len(sample),
+    )
+
+
+@scenario("common_ancestors/lcs_engine")
+def common_ancestors(inputs: BenchmarkInput):
+    from snomed_characterization.graphs.lowest_common_subsumer_engine import (
+        LowestCommonSubsumerEngine,
     )
-    print(
-        f"Ancestor Lookup (ms) {bitmap_ancestor_time*1000:<15.2f} {nx_ancestor_time*1000:<15.2f} {nx_ancestor_time/bitmap_ancestor_time:<15.2f}"
+
+    graph = inputs.bitmap_graph
+    sample = inputs.sample_concepts
+    pairs = list(zip(sample, reversed(sample)))
+
+    def work():
+        LowestCommonSubsumerEngine(graph).get_lcs_pairs(pairs)
+
+    return work, len(pairs)
+
+
+@scenario("similarity/enhanced")
+def similarity_enhanced(inputs: BenchmarkInput):
+    analyzer, pairs = inputs.analyzer, inputs.sample_pairs
+    return lambda: analyzer.get_enhanced_similarities(pairs), len(pairs)
+
+
+@scenario("similarity/snapshot")
+def similarity_snapshot(inputs: BenchmarkInput):
+    snapshot, pairs = inputs.analyzer.snapshot(), inputs.sample_pairs
+    return lambda: snapshot.get_enhanced_similarities(pairs), len(pairs)
+
+
+@scenario("clustering/networkx")
+def clustering_networkx(inputs: BenchmarkInput):
+    analyzer = inputs.analyzer
+    return lambda: analyzer.get_condition_clusters(0.3), 1
+
+
+@scenario("clustering/edge_list")
+def clustering_edge_list(inputs: BenchmarkInput):
+    analyzer = inputs.analyzer
+    return lambda: analyzer.get_condition_cluster_edges(0.3), 1
+
+
+def _community_scenario(method: str):
+    @scenario(f"community/{method}")
+    def setup(inputs: BenchmarkInput):
+        from snomed_characterization.condition_cluster_analyzer import (
+            ConditionClusterAnalyzer,
+        )
+
+        patient_conditions = inputs.require_cohort()
+        graph = inputs.frozen_graph
+
+        def work():
+            analyzer = ConditionClusterAnalyzer(patient_conditions, graph)
+            analyzer.build_cooccurrence_network()
+            analyzer.detect_clusters(method)
+
+        return work, 1
+
+
+_community_scenario("greedy_modularity")
+_community_scenario("label_propagation")
+
+
+@scenario("visualizer/summary_tables")
+def visualizer_summary_tables(inputs: BenchmarkInput):
+    import pandas as pd
+
+    from snomed_characterization.snomed_cluster_visualizer import (
+        SNOMEDClusterVisualizer,
     )
-    print(
-        f"Descendant Lookup (ms) {bitmap_descendant_time*1000:<15.2f} {nx_descendant_time*1000:<15.2f} {nx_descendant_time/bitmap_descendant_time:<15.2f}"
+
+    edges, clusters = inputs.analyzer.get_condition_cluster_edges(0.3)
+
+    def work():
+        SNOMEDClusterVisualizer(edges, clusters, pd.DataFrame()).get_summary_tables()
+
+    return work, 1
+
+
+def _read_proc_status_kb(field: str) -> int:
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def measure_peak_rss_delta(work: Callable) -> Optional[float]:
+    """
+    Peak RSS growth of one run in MB: the kernel's high-water mark (VmHWM)
+    is reset to the current RSS before the run, so native allocations
+    freed before returning are counted too. None without Linux /proc.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        before = _read_proc_status_kb("VmRSS")
+    except OSError:
+        return None
+
+    work()
+    return max(_read_proc_status_kb("VmHWM") - before, 0) / 1024
+
+
+def measure(work: Callable, repeat: int) -> Dict[str, object]:
+    """
+    Wall times of `repeat` runs, then one run for the peak RSS growth and
+    one traced run for the peak Python heap (see MEMORY_NOTE).
+    """
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        seconds.append(time.perf_counter() - started)
+
+    peak_rss_delta = measure_peak_rss_delta(work)
+
+    tracemalloc.start()
+    try:
+        work()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds_median": statistics.median(seconds),
+        "seconds_min": min(seconds),
+        "peak_python_memory_mb": peak / 1024**2,
+        "peak_rss_delta_mb": peak_rss_delta,
+    }
+
+
+def run(
+    inputs: List[BenchmarkInput], patterns: List[str], repeat: int = 5
+) -> Dict[str, object]:
+    results = []
+    for benchmark_input in inputs:
+        for name, setup in SCENARIOS.items():
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                continue
+
+            record = {"scenario": name, "input": benchmark_input.name}
+            try:
+                work, operations = setup(benchmark_input)
+            except SkipScenario as skip:
+                record["skipped"] = str(skip)
+                results.append(record)
+                continue
+
+            record.update(measure(work, repeat), repeat=repeat, operations=operations)
+            record["operations_per_second"] = operations / max(
+                record["seconds_median"], 1e-12
+            )
+            results.append(record)
+            print(
+                f"{name:<30} {benchmark_input.name:<25}"
+                f" {record['seconds_median'] * 1000:>10.2f} ms"
+                f" {record['peak_python_memory_mb']:>10.1f} MB heap"
+                + (
+                    f" {record['peak_rss_delta_mb']:>10.1f} MB RSS"
+                    if record["peak_rss_delta_mb"] is not None
+                    else ""
+                ),
+                file=sys.stderr,
+            )
+
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "memory": MEMORY_NOTE,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, object],
+    current: Dict[str, object],
+    threshold: float = 0.1,
+    min_seconds: float = 1e-3,
+) -> List[Dict[str, object]]:
+    """
+    Median time changes of the scenarios measured in the baseline. A
+    scenario regresses when it is more than `threshold` slower and the
+    slowdown is above the `min_seconds` noise floor, or when the current
+    run skipped it or lacks it (`status` then says which).
+    """
+
+    def records(results):
+        return {
+            (record["scenario"], record["input"]): record
+            for record in results["results"]
+        }
+
+    baseline_records, current_records = records(baseline), records(current)
+    changes = []
+    for key in sorted(baseline_records):
+        before = baseline_records[key].get("seconds_median")
+        if before is None:
+            continue
+        change = {
+            "scenario": key[0],
+            "input": key[1],
+            "baseline_seconds": before,
+            "current_seconds": None,
+            "change": None,
+            "regression": True,
+        }
+        record = current_records.get(key)
+        if record is None:
+            change["status"] = "missing"
+        elif "seconds_median" not in record:
+            change["status"] = f"skipped: {record.get('skipped')}"
+        else:
+            after = record["seconds_median"]
+            change["current_seconds"] = after
+            change["change"] = after / before - 1 if before > 0 else 0.0
+            change["regression"] = (
+                change["change"] > threshold and after - before > min_seconds
+            )
+            change["status"] = "measured"
+        changes.append(change)
+
+    return changes
+
+
+def load_inputs(args, directory: str) -> List[BenchmarkInput]:
+    """The --db inputs, then synthetic databases generated into `directory`."""
+    inputs = [BenchmarkInput(name=db_path, db_path=db_path) for db_path in args.db]
+    inputs += [
+        generate_synthetic_input(directory, size, args.patients, seed=args.seed)
+        for size in args.synthetic
+    ]
+    return inputs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list the scenario names")
+
+    run_parser = commands.add_parser("run", help="run scenarios, write JSON results")
+    run_parser.add_argument("--scenario", nargs="+", default=["*"])
+    run_parser.add_argument("--db", nargs="*", default=DEFAULT_DATABASES)
+    run_parser.add_argument(
+        "--synthetic", nargs="*", type=int, default=DEFAULT_SYNTHETIC_SIZES
     )
+    run_parser.add_argument("--patients", type=int, default=1_000)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="JSON file, stdout if omitted")
 
-    return results
-
-
-benchmark_values = [
-    10000,
-    20000,
-    50000,
-    100000,
-    200000,
-    500000,
-    1000000,
-    5000000,
-    8000000,
-    9000000,
-]
-for benchmark_value in benchmark_values:
-    memory_comparison_test(benchmark_value)
+    compare_parser = commands.add_parser(
+        "compare", help="compare two results files, exit 1 on regressions"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser.add_argument("--min-seconds", type=float, default=1e-3)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(SCENARIOS))
+        return 0
+
+    if args.command == "run":
+        with tempfile.TemporaryDirectory() as directory:
+            results = run(load_inputs(args, directory), args.scenario, args.repeat)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    changes = compare(baseline, current, args.threshold, args.min_seconds)
+
+    print(f"{'Scenario':<30} {'Input':<25} {'Baseline':>12} {'Current':>12} Change")
+    for change in changes:
+        if change["status"] == "measured":
+            current_column = f"{change['current_seconds'] * 1000:>10.2f}ms"
+            change_column = f"{change['change']:+.1%}"
+        else:
+            current_column, change_column = f"{'-':>12}", change["status"]
+        print(
+            f"{change['scenario']:<30} {change['input']:<25}"
+            f" {change['baseline_seconds'] * 1000:>10.2f}ms {current_column}"
+            f" {change_column}" + ("  REGRESSION" if change["regression"] else "")
+        )
+
+    return 1 if any(change["regression"] for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import random
+import sys
+import time
+
+from snomed_characterization.batch_query_executor import BatchQueryExecutor
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+
+THREAD_COUNTS = [1, 2, 4, 8]
+
+
+def generate_frozen_hierarchy(num_concepts: int, fan_out: int = 8, seed: int = 0):
+    """Shallow random DAG: each concept gets 1-2 parents about `fan_out` times closer to the root"""
+    rng = random.Random(seed)
+    child_ids, parent_ids = [], []
+    for concept in range(1, num_concepts):
+        candidates = range(max(0, concept // fan_out - 20), concept // fan_out + 1)
+        for parent in rng.sample(candidates, min(rng.randint(1, 2), len(candidates))):
+            if parent != concept:
+                child_ids.append(concept)
+                parent_ids.append(parent)
+
+    return FrozenGraph.from_edges(child_ids, parent_ids)
+
+
+def stress_test(num_concepts: int = 200_000, num_queries: int = 20_000):
+    """Measure read-only ancestor query throughput as threads are added"""
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL enabled: {gil_enabled}")
+
+    graph = generate_frozen_hierarchy(num_concepts)
+    rng = random.Random(1)
+    concept_ids = [rng.randrange(num_concepts) for _ in range(num_queries)]
+    pairs = list(zip(concept_ids, reversed(concept_ids)))
+
+    print(f"{'Threads':<10} {'Ancestors/s':<15} {'Similarities/s':<15} {'Speedup':<10}")
+    print("-" * 50)
+    baseline = None
+    for threads in THREAD_COUNTS:
+        with BatchQueryExecutor(graph, max_workers=threads) as executor:
+            start = time.perf_counter()
+            executor.get_all_ancestors(concept_ids)
+            ancestor_rate = num_queries / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            executor.get_hierarchical_similarities(pairs)
+            similarity_rate = num_queries / (time.perf_counter() - start)
+
+        baseline = baseline or ancestor_rate
+        print(
+            f"{threads:<10} {ancestor_rate:<15.0f} {similarity_rate:<15.0f} "
+            f"{ancestor_rate / baseline:<10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    stress_test()
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.graphs.information_content import InformationContent
+from snomed_characterization.similarity import (
+    get_depth_similarity,
+    get_jaccard_similarity,
+)
+
+
+@dataclass(frozen=True)
+class AnalyzerSnapshot:
+    """
+    Immutable view of a ConditionClusterAnalyzer for concurrent readers.
+
+    Concurrency model: graphs, builders and the analyzer are mutated from a
+    single thread; once built, take a snapshot and share it between any
+    number of threads (see BatchQueryExecutor). Every query is a pure
+    function of the snapshot, with no lazy caches, so no locking is needed
+    on free-threaded Python.
+    """
+
+    graph: FrozenGraph
+    ancestor_paths: Mapping[int, Mapping[int, int]]
+    condition_frequencies: Mapping[int, int]
+    cooccurrence_matrix: Mapping[Tuple[int, int], int]
+    jaccard_coefficient: float
+    hierarchy_coefficient: float
+    max_ancestor_depth: int
+    hierarchical_measure: str = "depth"
+    information_content: Optional[InformationContent] = None
+
+    @classmethod
+    def from_analyzer(
+        cls, analyzer, graph: Optional[FrozenGraph] = None
+    ) -> "AnalyzerSnapshot":
+        """Copy the analyzer's state into a snapshot (see ConditionClusterAnalyzer.snapshot)."""
+        if (
+            analyzer.hierarchical_measure != "depth"
+            and analyzer.information_content is None
+        ):
+            analyzer.precompute_information_content()
+
+        if graph is None:
+            graph = analyzer.hierarchy.to_frozen_graph()
+
+        return cls(
+            graph=graph,
+            ancestor_paths=MappingProxyType(
+                {
+                    concept: MappingProxyType(dict(ancestors))
+                    for concept, ancestors in analyzer.ancestor_paths.items()
+                }
+            ),
+            condition_frequencies=MappingProxyType(
+                dict(analyzer.condition_frequencies)
+            ),
+            cooccurrence_matrix=MappingProxyType(dict(analyzer.cooccurrence_matrix)),
+            jaccard_coefficient=analyzer.jaccard_coefficient,
+            hierarchy_coefficient=analyzer.hierarchy_coefficient,
+            max_ancestor_depth=analyzer.max_ancestor_depth,
+            hierarchical_measure=analyzer.hierarchical_measure,
+            information_content=analyzer.information_content,
+        )
+
+    def get_all_ancestors(self, concept_id: int) -> BitMap:
+        return self.graph.get_all_ancestors(concept_id)
+
+    def get_all_descendants(self, concept_id: int) -> BitMap:
+        return self.graph.get_all_descendants(concept_id)
+
+    def get_ancestors_with_depths(self, concept_id: int) -> Mapping[int, int]:
+        ancestors = self.ancestor_paths.get(concept_id)
+        if ancestors is None:
+            ancestors = self.graph.get_ancestors_with_depths(
+                concept_id, self.max_ancestor_depth
+            )
+        return ancestors
+
+    def get_hierarchical_similarity(self, code1: int, code2: int) -> float:
+        return get_depth_similarity(
+            code1,
+            self.get_ancestors_with_depths(code1),
+            code2,
+            self.get_ancestors_with_depths(code2),
+        )
+
+    def get_ic_similarity(self, code1: int, code2: int) -> float:
+        if code1 == code2:
+            return 1.0
+
+        ic = self.information_content
+        subsumers: Dict[int, BitMap] = {
+            code: ic.to_positions([code, *self.get_ancestors_with_depths(code)])
+            for code in (code1, code2)
+        }
+        mica_ic = ic.get_mica_ic(subsumers[code1], subsumers[code2])
+        similarities = ic.get_similarities(
+            self.hierarchical_measure,
+            [ic.get_ic(code1)],
+            [ic.get_ic(code2)],
+            [mica_ic],
+        )
+        return float(similarities[0])
+
+    def get_jaccard_similarity(self, code1: int, code2: int) -> float:
+        pair = (code1, code2) if code1 <= code2 else (code2, code1)
+        return get_jaccard_similarity(
+            self.condition_frequencies.get(code1, 0),
+            self.condition_frequencies.get(code2, 0),
+            self.cooccurrence_matrix.get(pair, 0),
+        )
+
+    def get_enhanced_similarity(self, code1: int, code2: int) -> float:
+        if self.hierarchical_measure == "depth":
+            hierarchical = self.get_hierarchical_similarity(code1, code2)
+        else:
+            hierarchical = self.get_ic_similarity(code1, code2)
+
+        return (
+            self.jaccard_coefficient * self.get_jaccard_similarity(code1, code2)
+            + self.hierarchy_coefficient * hierarchical
+        )
+
+    def get_enhanced_similarities(self, pairs) -> np.ndarray:
+        return np.array([self.get_enhanced_similarity(c1, c2) for c1, c2 in pairs])
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.analyzer_snapshot import AnalyzerSnapshot
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+
+
+class BatchQueryExecutor:
+    """
+    Runs ancestor and similarity queries over an immutable snapshot
+    (FrozenGraph or AnalyzerSnapshot) on a thread pool.
+
+    Inputs are split into chunks so each task amortizes the scheduling
+    overhead; results keep the input order. On a free-threaded build the
+    chunks run in parallel, as the snapshot is never mutated.
+    """
+
+    def __init__(
+        self,
+        snapshot: Union[FrozenGraph, AnalyzerSnapshot],
+        max_workers: Optional[int] = None,
+        chunk_size: int = 256,
+    ):
+        self.snapshot = snapshot
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def map(self, query: Callable, items: Sequence) -> List:
+        """Apply a single-argument query to every item, in chunks."""
+        chunks = [
+            items[start : start + self.chunk_size]
+            for start in range(0, len(items), self.chunk_size)
+        ]
+        futures = [
+            self._executor.submit(lambda chunk: [query(item) for item in chunk], chunk)
+            for chunk in chunks
+        ]
+
+        return [result for future in futures for result in future.result()]
+
+    def starmap(self, query: Callable, pairs: Sequence[Tuple]) -> List:
+        """Apply a multi-argument query to every tuple of arguments, in chunks."""
+        return self.map(lambda arguments: query(*arguments), pairs)
+
+    def get_all_ancestors(self, concept_ids: Iterable[int]) -> List[BitMap]:
+        return self.map(self.snapshot.get_all_ancestors, list(concept_ids))
+
+    def get_all_descendants(self, concept_ids: Iterable[int]) -> List[BitMap]:
+        return self.map(self.snapshot.get_all_descendants, list(concept_ids))
+
+    def get_hierarchical_similarities(
+        self, pairs: Iterable[Tuple[int, int]]
+    ) -> np.ndarray:
+        return np.array(
+            self.starmap(self.snapshot.get_hierarchical_similarity, list(pairs))
+        )
+
+    def get_enhanced_similarities(self, pairs: Iterable[Tuple[int, int]]) -> np.ndarray:
+        """Combined similarity for each pair (requires an AnalyzerSnapshot)."""
+        return np.array(
+            self.starmap(self.snapshot.get_enhanced_similarity, list(pairs))
+        )
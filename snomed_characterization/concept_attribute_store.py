@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from snomed_characterization.snomed_concept import RawSNOMEDConcept
+
+CONCEPT_COLUMNS = tuple(RawSNOMEDConcept.__annotations__.keys())
+
+
+class ConceptAttributeStore:
+    """
+    Concept attributes kept column by column, one numpy array per
+    RawSNOMEDConcept field, addressed by dense position (`index`).
+
+    Graph nodes only carry concept ids; RawSNOMEDConcept objects are
+    materialized on request by `get` and are not kept. Concepts added one at
+    a time are buffered and appended to the columns on the next read.
+    """
+
+    def __init__(self):
+        self.index: Dict[int, int] = {}
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=np.int64 if name == "concept_id" else object)
+            for name in CONCEPT_COLUMNS
+        }
+        self._pending: List[RawSNOMEDConcept] = []
+        # Rows written so far, including those of removed concepts
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, concept_id: int) -> bool:
+        return concept_id in self.index
+
+    def add(self, concept: RawSNOMEDConcept) -> int:
+        """Add a concept unless already stored; returns its position."""
+        position = self.index.get(concept.concept_id)
+        if position is None:
+            position = self._rows
+            self.index[concept.concept_id] = position
+            self._pending.append(concept)
+            self._rows += 1
+        return position
+
+    def extend(self, concepts: Iterable[RawSNOMEDConcept]):
+        for concept in concepts:
+            self.add(concept)
+
+    def extend_from_dataframe(self, df: DataFrame):
+        """
+        Add the rows of a DataFrame with (at least) the RawSNOMEDConcept
+        columns in one vectorized append. Rows of already stored concepts are
+        skipped.
+        """
+        self._flush()
+        concept_ids = df["concept_id"].to_numpy(dtype=np.int64)
+        _, first = np.unique(concept_ids, return_index=True)
+        keep = np.sort(first)
+        keep = keep[[int(c) not in self.index for c in concept_ids[keep]]]
+
+        for name in CONCEPT_COLUMNS:
+            values = df[name].to_numpy(dtype=object)[keep]
+            if name == "concept_id":
+                values = values.astype(np.int64)
+            else:
+                values[pd.isna(values)] = None
+            self._columns[name] = np.concatenate([self._columns[name], values])
+
+        for position, concept_id in enumerate(
+            concept_ids[keep].tolist(), start=self._rows
+        ):
+            self.index[concept_id] = position
+        self._rows += len(keep)
+
+    def update_from_dataframe(self, df: DataFrame):
+        """
+        Overwrite the attributes of stored concepts with the DataFrame rows;
+        rows of concepts that are not stored are ignored.
+        """
+        self._flush()
+        for row in df.itertuples(index=False):
+            position = self.index.get(int(row.concept_id))
+            if position is None:
+                continue
+            for name in CONCEPT_COLUMNS[1:]:
+                value = getattr(row, name)
+                self._columns[name][position] = None if pd.isna(value) else value
+
+    def remove(self, concept_id: int):
+        """
+        Forget a concept. Its row stays in the columns until the store is
+        rebuilt, but it is no longer reachable.
+        """
+        self.index.pop(concept_id, None)
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        for name in CONCEPT_COLUMNS:
+            values = np.array(
+                [getattr(concept, name) for concept in self._pending],
+                dtype=np.int64 if name == "concept_id" else object,
+            )
+            self._columns[name] = np.concatenate([self._columns[name], values])
+        self._pending = []
+
+    def column(self, name: str) -> np.ndarray:
+        """Whole attribute column, in position order (removed rows included)."""
+        self._flush()
+        return self._columns[name]
+
+    def get_attribute(self, concept_id: int, name: str):
+        position = self.index.get(concept_id)
+        if position is None:
+            return None
+        return self.column(name)[position]
+
+    def get(self, concept_id: int) -> Optional[RawSNOMEDConcept]:
+        """Materialize the concept, None if it is not stored."""
+        position = self.index.get(concept_id)
+        if position is None:
+            return None
+
+        self._flush()
+        concept_id, *attributes = (
+            self._columns[name][position] for name in CONCEPT_COLUMNS
+        )
+        return RawSNOMEDConcept(int(concept_id), *attributes)
+
+    def to_dataframe(self) -> DataFrame:
+        self._flush()
+        live = np.fromiter(self.index.values(), dtype=np.int64, count=len(self.index))
+        live.sort()
+        return DataFrame({name: self._columns[name][live] for name in CONCEPT_COLUMNS})
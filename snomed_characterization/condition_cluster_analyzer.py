@@ -1,33 +1,74 @@
-import networkx as nx
-from networkx.algorithms import community
 import numpy as np
 from collections import defaultdict
-from typing import List, Dict, Set, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Set, Tuple, Union
+from pyroaring import BitMap
+
+from snomed_characterization.analyzer_snapshot import AnalyzerSnapshot
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.graphs.hierarchy import Hierarchy, as_hierarchy
+from snomed_characterization.graphs.information_content import (
+    IC_MEASURES,
+    InformationContent,
+)
+from snomed_characterization.similarity import (
+    get_depth_similarity,
+    get_jaccard_similarity,
+)
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+    from snomed_characterization.graphs.similarity_edge_list import (
+        SimilarityEdgeList,
+    )
+
+HIERARCHICAL_MEASURES = ("depth",) + IC_MEASURES
 
 
 class ConditionClusterAnalyzer:
     """
-    @snomed_graph: nx.DiGraph
+    @snomed_graph: nx.DiGraph | BitMapGraph | FrozenGraph | Hierarchy
     the snomed_graph is a subgraph with only conditions and ancestors related
     to the patients conditions bi directed graph with is_ancestor_of
-    and is_descendant_of relationships.
+    and is_descendant_of relationships. Any backend is accessed through the
+    Hierarchy protocol (see as_hierarchy).
 
+    @ancestor_paths: Dict[int, Dict[int, int]]
+    optional precomputed ancestor -> min depth maps (see
+    ImportDuckDBConceptAncestorClosure), used instead of traversing the graph.
+
+    @hierarchical_measure: str
+    "depth" scores shared ancestors by path length; "resnik", "lin" and
+    "jiang_conrath" use information content (see
+    precompute_information_content).
     """
 
     def __init__(
         self,
         patient_conditions: List[List[int]],
-        snomed_graph: nx.DiGraph,
+        snomed_graph: Union["nx.DiGraph", BitMapGraph, FrozenGraph, Hierarchy],
         max_ancestor_depth=10000,
         hierarchy_coefficient=0.6,
         jaccard_coefficient=0.4,
+        hierarchical_measure="depth",
+        ancestor_paths: Optional[Dict[int, Dict[int, int]]] = None,
     ):
+        if hierarchical_measure not in HIERARCHICAL_MEASURES:
+            raise ValueError(
+                f"Unsupported hierarchical measure: {hierarchical_measure}"
+            )
+
         self.snomed_graph = snomed_graph
-        self.cooccurrence_graph = nx.Graph()
+        self.hierarchy = as_hierarchy(snomed_graph)
+        self._cooccurrence_graph = None
         self.patient_conditions = patient_conditions
         self.max_ancestor_depth = max_ancestor_depth
         self.hierarchy_coefficient = hierarchy_coefficient
         self.jaccard_coefficient = jaccard_coefficient
+        self.hierarchical_measure = hierarchical_measure
+        self.information_content: Optional[InformationContent] = None
+        self._ic_subsumers: Dict[int, BitMap] = {}
         self.total_patients = len(patient_conditions)
 
         # Calculate basic statistics
@@ -35,7 +76,7 @@ class ConditionClusterAnalyzer:
         self.cooccurrence_matrix = self._calculate_cooccurrence()
 
         # Cache ancestor paths for performance
-        self.ancestor_paths = self._cache_ancestor_paths()
+        self.ancestor_paths = self._cache_ancestor_paths(ancestor_paths)
 
     def _calculate_cooccurrence(self) -> Dict[Tuple[int, int], int]:
         """Calculate co-occurrence counts for all pairs of conditions"""
@@ -55,9 +96,16 @@ class ConditionClusterAnalyzer:
                 frequencies[code] += 1
         return frequencies
 
-    def _cache_ancestor_paths(self) -> Dict[int, Dict[int, int]]:
-        """Cache shortest paths to ancestors for all relevant concepts"""
+    def _cache_ancestor_paths(
+        self, precomputed: Optional[Dict[int, Dict[int, int]]] = None
+    ) -> Dict[int, Dict[int, int]]:
+        """
+        Cache shortest paths to ancestors for all relevant concepts.
+        Concepts found in `precomputed` (e.g. loaded from the OMOP
+        concept_ancestor closure) are not traversed.
+        """
         paths = defaultdict(dict)
+        precomputed = precomputed or {}
 
         # Get all unique concepts from patient data
         all_concepts = {
@@ -65,39 +113,25 @@ class ConditionClusterAnalyzer:
         }
 
         for concept in all_concepts:
-            # Use NetworkX to find paths to ancestors
+            if concept in precomputed:
+                paths[concept] = {
+                    ancestor: depth
+                    for ancestor, depth in precomputed[concept].items()
+                    if depth <= self.max_ancestor_depth
+                }
+                continue
+
+            # Traverse the hierarchy backend to find paths to ancestors
             ancestors = self._get_ancestors_with_depths(concept)
             paths[concept] = ancestors
 
         return paths
 
     def _get_ancestors_with_depths(self, concept: int) -> Dict[int, int]:
-        """Get ancestors and their depths using NetworkX traversal"""
-        ancestors = {}
-        visited = set()
-        queue = [(concept, 0)]
-
-        while queue:
-            current, depth = queue.pop(0)
-            if depth > self.max_ancestor_depth:
-                continue
-
-            if current in visited:
-                continue
-
-            visited.add(current)
-
-            # Only add to ancestors if it's not the starting concept
-            if current != concept:
-                ancestors[current] = depth
-
-            # Get parent concepts by following is_descendant_of edges
-            for _, parent, data in self.snomed_graph.out_edges(current, data=True):
-                if data.get("relationship") == "is_descendant_of":
-                    if parent not in visited and depth + 1 <= self.max_ancestor_depth:
-                        queue.append((parent, depth + 1))
-
-        return ancestors
+        """Get ancestors and their depths from the hierarchy backend"""
+        return self.hierarchy.get_ancestors_with_depths(
+            concept, self.max_ancestor_depth
+        )
 
     def get_hierarchical_similarity(self, code1: int, code2: int) -> float:
         """
@@ -106,65 +140,179 @@ class ConditionClusterAnalyzer:
         if code1 == code2:
             return 1.0
 
-        ancestors1 = self.ancestor_paths.get(
-            code1, self._get_ancestors_with_depths(code1)
-        )
-        ancestors2 = self.ancestor_paths.get(
-            code2, self._get_ancestors_with_depths(code2)
-        )
-
-        # Find shared ancestors
-        shared_ancestors = set(ancestors1.keys()) & set(ancestors2.keys())
-
-        if not shared_ancestors:
-            # Check if one is ancestor of another
-            if code1 in ancestors2:
-                return 1.0 / (1.0 + ancestors2[code1])
-            if code2 in ancestors1:
-                return 1.0 / (1.0 + ancestors1[code2])
-            return 0.0
-
-        # Calculate similarity based on closest shared ancestor
-        similarities = []
-        for ancestor in shared_ancestors:
-            depth1 = ancestors1[ancestor]
-            depth2 = ancestors2[ancestor]
-            max_depth = max(depth1, depth2)
-            # Similarity decreases with ancestor distance
-            similarity = 1.0 / (1.0 + max_depth)
-            similarities.append(similarity)
+        ancestors1 = self.ancestor_paths.get(code1)
+        if ancestors1 is None:
+            ancestors1 = self._get_ancestors_with_depths(code1)
+        ancestors2 = self.ancestor_paths.get(code2)
+        if ancestors2 is None:
+            ancestors2 = self._get_ancestors_with_depths(code2)
 
-        return max(similarities)
+        return get_depth_similarity(code1, ancestors1, code2, ancestors2)
 
     def get_enhanced_similarity(
         self,
         code1: int,
         code2: int,
+        jaccard_coefficient: Optional[float] = None,
+        hierarchy_coefficient: Optional[float] = None,
     ) -> float:
         """
         Calculate enhanced similarity combining co-occurrence and hierarchical similarity.
+        Coefficients default to the analyzer's own and are never stored.
         """
+        if jaccard_coefficient is None:
+            jaccard_coefficient = self.jaccard_coefficient
+        if hierarchy_coefficient is None:
+            hierarchy_coefficient = self.hierarchy_coefficient
+
         jaccard = self.get_jaccard_similarity(code1, code2)
-        hierarchical = self.get_hierarchical_similarity(code1, code2)
+        if self.hierarchical_measure == "depth":
+            hierarchical = self.get_hierarchical_similarity(code1, code2)
+        else:
+            hierarchical = self.get_ic_similarity(code1, code2)
 
         # Combine similarities (adjustable weights)
-        combined = (
-            self.jaccard_coefficient * jaccard
-            + self.hierarchy_coefficient * hierarchical
-        )
+        combined = jaccard_coefficient * jaccard + hierarchy_coefficient * hierarchical
 
         return combined
 
+    def get_enhanced_similarities(
+        self,
+        pairs: List[Tuple[int, int]],
+        jaccard_coefficient: Optional[float] = None,
+        hierarchy_coefficient: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Vectorized get_enhanced_similarity for a list of concept pairs.
+        """
+        if jaccard_coefficient is None:
+            jaccard_coefficient = self.jaccard_coefficient
+        if hierarchy_coefficient is None:
+            hierarchy_coefficient = self.hierarchy_coefficient
+
+        if not pairs:
+            return np.zeros(0)
+
+        codes1 = np.array([code1 for code1, _ in pairs])
+        codes2 = np.array([code2 for _, code2 in pairs])
+
+        frequencies1 = np.array([self.condition_frequencies.get(c, 0) for c in codes1])
+        frequencies2 = np.array([self.condition_frequencies.get(c, 0) for c in codes2])
+        intersections = np.array(
+            [
+                self.cooccurrence_matrix.get(tuple(sorted((code1, code2))), 0)
+                for code1, code2 in pairs
+            ]
+        )
+        unions = frequencies1 + frequencies2 - intersections
+        jaccard = np.divide(
+            intersections,
+            unions,
+            out=np.zeros(len(pairs)),
+            where=(frequencies1 + frequencies2) > 0,
+        )
+
+        if self.hierarchical_measure == "depth":
+            hierarchical = np.array(
+                [self.get_hierarchical_similarity(c1, c2) for c1, c2 in pairs]
+            )
+        else:
+            hierarchical = self.get_ic_similarities(pairs)
+
+        return jaccard_coefficient * jaccard + hierarchy_coefficient * hierarchical
+
+    def precompute_information_content(
+        self, corpus_based: bool = False
+    ) -> InformationContent:
+        """
+        Compute descendant counts and information content for every node of
+        the SNOMED graph. Corpus-based IC weights concepts by
+        condition_frequencies, otherwise intrinsic IC is used.
+        """
+        self.information_content = InformationContent(
+            self.hierarchy,
+            self.condition_frequencies if corpus_based else None,
+        )
+        self._ic_subsumers = {}
+
+        return self.information_content
+
+    def _get_ic_subsumers(self, code: int) -> BitMap:
+        """Dense positions of the concept and its ancestors"""
+        subsumers = self._ic_subsumers.get(code)
+        if subsumers is None:
+            ancestors = self.ancestor_paths.get(code)
+            if ancestors is None:
+                ancestors = self._get_ancestors_with_depths(code)
+            subsumers = self.information_content.to_positions([code, *ancestors])
+            self._ic_subsumers[code] = subsumers
+
+        return subsumers
+
+    def get_ic_similarity(
+        self, code1: int, code2: int, measure: Optional[str] = None
+    ) -> float:
+        """
+        Calculate information content similarity (Resnik, Lin or
+        Jiang-Conrath) based on the most informative common ancestor.
+        """
+        if code1 == code2:
+            return 1.0
+
+        return float(self.get_ic_similarities([(code1, code2)], measure)[0])
+
+    def get_ic_similarities(
+        self, pairs: List[Tuple[int, int]], measure: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        get_ic_similarity for a list of concept pairs. Pairs are grouped by
+        their first concept, whose MICA against all its partners is one
+        array pass (InformationContent.get_mica_ics).
+        """
+        measure = measure or self.hierarchical_measure
+        if measure not in IC_MEASURES:
+            raise ValueError(f"Unsupported IC measure: {measure}")
+
+        if self.information_content is None:
+            self.precompute_information_content()
+        ic = self.information_content
+
+        codes1 = [code1 for code1, _ in pairs]
+        codes2 = [code2 for _, code2 in pairs]
+        partners: Dict[int, List[int]] = {}
+        for index, code1 in enumerate(codes1):
+            partners.setdefault(code1, []).append(index)
+
+        mica_ic = np.zeros(len(pairs), dtype=np.float64)
+        for code1, indices in partners.items():
+            mica_ic[indices] = ic.get_mica_ics(
+                self._get_ic_subsumers(code1),
+                [self._get_ic_subsumers(codes2[index]) for index in indices],
+            )
+        similarities = ic.get_similarities(
+            measure, ic.get_ics(codes1), ic.get_ics(codes2), mica_ic
+        )
+        similarities[np.array(codes1) == np.array(codes2)] = 1.0
+
+        return similarities
+
+    def snapshot(self, graph: Optional[FrozenGraph] = None) -> AnalyzerSnapshot:
+        """
+        Immutable copy of the analyzer for concurrent queries (see
+        AnalyzerSnapshot). `graph` may be an existing FrozenGraph, e.g. one
+        attached from shared memory; otherwise the SNOMED graph is frozen.
+        """
+        return AnalyzerSnapshot.from_analyzer(self, graph)
+
     def get_jaccard_similarity(self, code1: int, code2: int) -> float:
         """Calculate Jaccard similarity between two conditions"""
-        union = self.condition_frequencies[code1] + self.condition_frequencies[code2]
         pair = tuple(sorted([code1, code2]))
-        intersection = self.cooccurrence_matrix.get(pair, 0)
-
-        if union == 0:
-            return 0
 
-        return intersection / (union - intersection)
+        return get_jaccard_similarity(
+            self.condition_frequencies.get(code1, 0),
+            self.condition_frequencies.get(code2, 0),
+            self.cooccurrence_matrix.get(pair, 0),
+        )
 
     # @deperecated
     def get_similar_conditions(
@@ -191,17 +339,17 @@ class ConditionClusterAnalyzer:
         similarity_threshold: float = 0.3,
         jaccard_coefficient=None,
         hierarchy_coefficient=None,
-    ) -> Tuple[nx.Graph, List[Set[int]]]:
+    ) -> Tuple["nx.Graph", List[Set[int]]]:
         """
         Cluster conditions based on combined similarity.
         Returns list of sets of related conditions.
+        The coefficients only apply to this call and leave the analyzer unchanged.
         """
+        import networkx as nx
+
         # Create similarity graph
         sim_graph = nx.Graph()
 
-        self.jaccard_coefficient = jaccard_coefficient or self.jaccard_coefficient
-        self.hierarchy_coefficient = hierarchy_coefficient or self.hierarchy_coefficient
-
         # Get all unique codes
         all_codes = {
             code for conditions in self.patient_conditions for code in conditions
@@ -214,7 +362,9 @@ class ConditionClusterAnalyzer:
         for code1 in all_codes:
             for code2 in all_codes:
                 if code1 < code2:  # Avoid duplicate pairs
-                    sim = self.get_enhanced_similarity(code1, code2)
+                    sim = self.get_enhanced_similarity(
+                        code1, code2, jaccard_coefficient, hierarchy_coefficient
+                    )
                     if sim >= similarity_threshold:
                         sim_graph.add_edge(code1, code2, weight=sim)
 
@@ -223,6 +373,119 @@ class ConditionClusterAnalyzer:
 
         return sim_graph, clusters
 
+    def iter_similarity_edges(
+        self,
+        similarity_threshold: float = 0.3,
+        jaccard_coefficient=None,
+        hierarchy_coefficient=None,
+        chunk_size: int = 100_000,
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Score every pair of conditions about `chunk_size` pairs at a time and
+        yield the (sources, targets, weights) arrays of the pairs at or above
+        the threshold, the edges get_condition_clusters would add.
+        """
+        all_codes = np.array(
+            sorted(
+                {code for conditions in self.patient_conditions for code in conditions}
+            ),
+            dtype=np.int64,
+        )
+
+        codes1, codes2 = [], []
+        pending = 0
+        for i in range(len(all_codes) - 1):
+            codes1.append(np.full(len(all_codes) - i - 1, all_codes[i]))
+            codes2.append(all_codes[i + 1 :])
+            pending += len(codes2[-1])
+            if pending >= chunk_size or i == len(all_codes) - 2:
+                sources, targets = np.concatenate(codes1), np.concatenate(codes2)
+                weights = self.get_enhanced_similarities(
+                    list(zip(sources.tolist(), targets.tolist())),
+                    jaccard_coefficient,
+                    hierarchy_coefficient,
+                )
+                keep = weights >= similarity_threshold
+                yield sources[keep], targets[keep], weights[keep]
+                codes1, codes2 = [], []
+                pending = 0
+
+    def get_condition_cluster_edges(
+        self,
+        similarity_threshold: float = 0.3,
+        jaccard_coefficient=None,
+        hierarchy_coefficient=None,
+        chunk_size: int = 100_000,
+    ) -> Tuple["SimilarityEdgeList", List[Set[int]]]:
+        """
+        get_condition_clusters without an nx.Graph: the similarity graph is
+        collected as a columnar SimilarityEdgeList.
+        """
+        from snomed_characterization.graphs.similarity_edge_list import (
+            SimilarityEdgeList,
+        )
+
+        edges = SimilarityEdgeList.from_chunks(
+            self.condition_frequencies,
+            self.iter_similarity_edges(
+                similarity_threshold,
+                jaccard_coefficient,
+                hierarchy_coefficient,
+                chunk_size,
+            ),
+        )
+
+        return edges, edges.connected_components()
+
+    def write_condition_cluster_edges(
+        self,
+        directory: str,
+        similarity_threshold: float = 0.3,
+        jaccard_coefficient=None,
+        hierarchy_coefficient=None,
+        chunk_size: int = 100_000,
+    ) -> List[Set[int]]:
+        """
+        Stream the similarity edges into Parquet chunks in `directory` (see
+        SimilarityEdgeList.load) and return the clusters, merged chunk by
+        chunk so no more than one chunk of edges is held in memory.
+        """
+        from snomed_characterization.graphs.similarity_edge_list import (
+            SimilarityEdgeListWriter,
+            components_from_labels,
+            union_edges,
+        )
+
+        nodes = np.array(sorted(self.condition_frequencies), dtype=np.int64)
+        labels = np.arange(len(nodes))
+        writer = SimilarityEdgeListWriter(directory, nodes)
+        try:
+            for sources, targets, weights in self.iter_similarity_edges(
+                similarity_threshold,
+                jaccard_coefficient,
+                hierarchy_coefficient,
+                chunk_size,
+            ):
+                writer.write(sources, targets, weights)
+                union_edges(
+                    labels,
+                    np.searchsorted(nodes, sources),
+                    np.searchsorted(nodes, targets),
+                )
+        finally:
+            writer.close()
+
+        return components_from_labels(nodes, labels)
+
+    @property
+    def cooccurrence_graph(self) -> "nx.Graph":
+        """Co-occurrence network, created on first use (networkx loads lazily)."""
+        if self._cooccurrence_graph is None:
+            import networkx as nx
+
+            self._cooccurrence_graph = nx.Graph()
+        return self._cooccurrence_graph
+
     def build_cooccurrence_network(self):
         condition_pairs = defaultdict(int)
 
@@ -253,6 +516,8 @@ class ConditionClusterAnalyzer:
         Returns:
             Dictionary mapping node IDs to community IDs
         """
+        from networkx.algorithms import community
+
         if method == "greedy_modularity":
             communities = community.greedy_modularity_communities(
                 self.cooccurrence_graph
@@ -285,6 +550,8 @@ class ConditionClusterAnalyzer:
         Returns:
             Dictionary of metrics
         """
+        from networkx.algorithms import community
+
         # Convert dict format to set format for modularity calculation
         community_sets = defaultdict(set)
         for node, comm_id in communities.items():
@@ -319,14 +586,13 @@ class ConditionClusterAnalyzer:
         cluster_parents = defaultdict(set)
 
         for condition, cluster_id in communities.items():
-            try:
-                # XXX: check with Anton. not sure about this
-                ancestors = nx.ancestors(self.snomed_graph, condition)
-                cluster_parents[cluster_id].update(ancestors)
-            except nx.NetworkXError:
+            if not self.hierarchy.exists_node(condition):
                 print(f"Error finding ancestors for condition {condition}")
                 continue
 
+            ancestors = self.hierarchy.get_all_ancestors(condition)
+            cluster_parents[cluster_id].update(ancestors)
+
         return cluster_parents
 
 
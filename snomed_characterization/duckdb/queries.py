@@ -1,30 +1,218 @@
-q_concepts = """
+q_people_concepts = """
+    SELECT DISTINCT co.condition_concept_id
+    FROM main.condition_occurrence co
+    WHERE co.condition_concept_id IN (
+        SELECT c.concept_id FROM main.concept c WHERE c.domain_id ='Condition'
+    );
+    """
+
+
+def get_q_concepts(columns=None, people_only=False) -> str:
+    """
+    Concepts with their level 1 ancestors, selecting only `columns` of the
+    concept table (all of them when None). With `people_only` the concepts
+    are restricted in SQL to the people's conditions and their ancestors.
+    """
+    selected = "c.*" if columns is None else ", ".join(f"c.{c}" for c in columns)
+    people_filter = ""
+    if people_only:
+        people_filter = """
+        AND c.concept_id IN (
+            SELECT condition_concept_id FROM people_concepts
+            UNION
+            SELECT ca.ancestor_concept_id
+            FROM concept_ancestor ca
+            WHERE ca.descendant_concept_id IN (
+                SELECT condition_concept_id FROM people_concepts
+            )
+        )"""
+
+    return f"""
     WITH grouped_ancestors AS (
-        SELECT 
+        SELECT
             descendant_concept_id,
             ARRAY_AGG(ancestor_concept_id ORDER BY ancestor_concept_id) as level_1_ancestors
         FROM concept_ancestor ca
-        JOIN concept_relationship cr 
+        JOIN concept_relationship cr
         ON ca.ancestor_concept_id = cr.concept_id_2
         AND ca.descendant_concept_id = cr.concept_id_1
         WHERE min_levels_of_separation = 1
         AND cr.relationship_id = 'Is a'
         GROUP BY descendant_concept_id
-    )
-    SELECT 
-        c.*,
+    ),
+    people_concepts AS ({q_people_concepts.strip().rstrip(";")})
+    SELECT
+        {selected},
         ga.level_1_ancestors
     FROM concept c
     INNER JOIN grouped_ancestors ga ON c.concept_id = ga.descendant_concept_id
-    WHERE c.invalid_reason IS NULL 
+    WHERE c.invalid_reason IS NULL
+        AND c.standard_concept = 'S'
+        AND c.domain_id = 'Condition'{people_filter};
+    """
+
+
+q_hierarchy_edges = """
+    SELECT
+        ca.descendant_concept_id AS concept_id,
+        ca.ancestor_concept_id AS parent_concept_id
+    FROM concept_ancestor ca
+    JOIN concept_relationship cr
+    ON ca.ancestor_concept_id = cr.concept_id_2
+    AND ca.descendant_concept_id = cr.concept_id_1
+    JOIN concept c ON c.concept_id = ca.descendant_concept_id
+    WHERE ca.min_levels_of_separation = 1
+        AND cr.relationship_id = 'Is a'
+        AND c.invalid_reason IS NULL
         AND c.standard_concept = 'S'
         AND c.domain_id = 'Condition';
     """
 
-q_people_concepts = """
-    SELECT DISTINCT co.* 
-    FROM main.condition_occurrence co 
-    JOIN main.concept c 
-    ON c.concept_id = co.condition_concept_id 
-    WHERE c.domain_id ='Condition';
+q_concepts_by_id = """
+    SELECT
+        c.concept_id,
+        c.concept_name,
+        c.domain_id,
+        c.vocabulary_id,
+        c.concept_class_id,
+        c.standard_concept,
+        c.concept_code,
+        c.valid_start_date,
+        c.valid_end_date,
+        c.invalid_reason
+    FROM concept c
+    JOIN requested_concepts rc ON c.concept_id = rc.concept_id;
+    """
+
+q_ancestor_closure = """
+    WITH seeds AS (
+        SELECT DISTINCT co.condition_concept_id AS concept_id
+        FROM main.condition_occurrence co
+        JOIN main.concept c
+        ON c.concept_id = co.condition_concept_id
+        WHERE c.domain_id ='Condition'
+    ),
+    relevant AS (
+        SELECT concept_id FROM seeds
+        UNION
+        SELECT ca.ancestor_concept_id
+        FROM concept_ancestor ca
+        JOIN seeds s ON ca.descendant_concept_id = s.concept_id
+    )
+    SELECT
+        r.concept_id,
+        ARRAY_AGG(ca.ancestor_concept_id ORDER BY ca.ancestor_concept_id)
+            FILTER (WHERE ca.ancestor_concept_id IS NOT NULL) AS ancestor_ids,
+        ARRAY_AGG(ca.min_levels_of_separation ORDER BY ca.ancestor_concept_id)
+            FILTER (WHERE ca.ancestor_concept_id IS NOT NULL) AS min_levels
+    FROM relevant r
+    LEFT JOIN concept_ancestor ca
+    ON ca.descendant_concept_id = r.concept_id
+    AND ca.min_levels_of_separation > 0
+    GROUP BY r.concept_id;
+    """
+
+
+def get_q_graph_concepts(schema: str) -> str:
+    """Standard, valid Condition concepts of a (possibly attached) database."""
+    return f"""
+    SELECT
+        c.concept_id,
+        c.concept_name,
+        c.domain_id,
+        c.vocabulary_id,
+        c.concept_class_id,
+        c.standard_concept,
+        c.concept_code,
+        c.valid_start_date,
+        c.valid_end_date,
+        c.invalid_reason
+    FROM {schema}.concept c
+    WHERE c.invalid_reason IS NULL
+        AND c.standard_concept = 'S'
+        AND c.domain_id = 'Condition'
+    """
+
+
+def get_q_is_a_edges(schema: str) -> str:
+    """(child, parent) 'Is a' edges of the graph concepts of a database."""
+    return f"""
+    SELECT
+        cr.concept_id_1 AS concept_id,
+        cr.concept_id_2 AS parent_concept_id
+    FROM {schema}.concept_relationship cr
+    JOIN ({get_q_graph_concepts(schema)}) c ON c.concept_id = cr.concept_id_1
+    WHERE cr.relationship_id = 'Is a'
+    """
+
+
+# Diff queries between the attached `old` and the `main` (new) release
+q_diff_added_concepts = f"""
+    SELECT n.* FROM ({get_q_graph_concepts("main")}) n
+    WHERE n.concept_id NOT IN (SELECT concept_id FROM ({get_q_graph_concepts("old")}));
+    """
+
+q_diff_removed_concept_ids = f"""
+    SELECT o.concept_id FROM ({get_q_graph_concepts("old")}) o
+    WHERE o.concept_id NOT IN (SELECT concept_id FROM ({get_q_graph_concepts("main")}));
+    """
+
+q_diff_updated_concepts = f"""
+    SELECT * FROM (
+        SELECT * FROM ({get_q_graph_concepts("main")})
+        EXCEPT
+        SELECT * FROM ({get_q_graph_concepts("old")})
+    ) n
+    WHERE n.concept_id IN (SELECT concept_id FROM ({get_q_graph_concepts("old")}));
+    """
+
+q_diff_added_edges = f"""
+    SELECT * FROM ({get_q_is_a_edges("main")})
+    EXCEPT
+    SELECT * FROM ({get_q_is_a_edges("old")});
+    """
+
+q_diff_removed_edges = f"""
+    SELECT * FROM ({get_q_is_a_edges("old")})
+    EXCEPT
+    SELECT * FROM ({get_q_is_a_edges("main")});
+    """
+
+
+def sql_string(value: str) -> str:
+    """Quote a value (e.g. a file path) as an SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_string_list(values) -> str:
+    return "[" + ", ".join(sql_string(value) for value in values) + "]"
+
+
+def get_q_domain_concepts(domain_ids) -> str:
+    """Standard, valid concepts of several domains with their vocabulary."""
+    return f"""
+    SELECT c.concept_id, c.domain_id, c.vocabulary_id
+    FROM concept c
+    WHERE c.invalid_reason IS NULL
+        AND c.standard_concept = 'S'
+        AND list_contains({_sql_string_list(domain_ids)}, c.domain_id);
+    """
+
+
+def get_q_domain_hierarchy_edges(domain_ids) -> str:
+    """Level 1 'Is a' (child, parent) edges whose child is in one of the domains."""
+    return f"""
+    SELECT
+        ca.descendant_concept_id AS concept_id,
+        ca.ancestor_concept_id AS parent_concept_id
+    FROM concept_ancestor ca
+    JOIN concept_relationship cr
+    ON ca.ancestor_concept_id = cr.concept_id_2
+    AND ca.descendant_concept_id = cr.concept_id_1
+    JOIN concept c ON c.concept_id = ca.descendant_concept_id
+    WHERE ca.min_levels_of_separation = 1
+        AND cr.relationship_id = 'Is a'
+        AND c.invalid_reason IS NULL
+        AND c.standard_concept = 'S'
+        AND list_contains({_sql_string_list(domain_ids)}, c.domain_id);
     """
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
 from pyroaring import BitMap
 
 IS_ANCESTOR_OF = "is_ancestor_of"
@@ -9,6 +10,8 @@ class BitMapGraph:
     def __init__(self):
         self.relationships: Dict[Tuple[int, str], BitMap] = {}
         self.nodes = BitMap()
+        # Precomputed transitive closures (e.g. from OMOP concept_ancestor)
+        self.ancestor_closure: Dict[int, BitMap] = {}
 
     def add_edge(self, source_node_id: int, target_node_id: int, weight: float = 1.0):
         """Add basic edge between nodes."""
@@ -22,6 +25,9 @@ class BitMapGraph:
         relationship: Optional[str] = None,
     ):
         """Add edge with optional relationship type."""
+        # A new parent changes the closure of the source and its descendants
+        self.invalidate_ancestor_closure(source_node_id)
+
         # Ensure nodes exist
         self.nodes.add(source_node_id)
         self.nodes.add(target_node_id)
@@ -55,6 +61,90 @@ class BitMapGraph:
                     concept_id, parent_id, relationship=IS_DESCENDANT_OF
                 )
 
+    def add_hierarchy_from(
+        self,
+        concept_ids: Iterable[int],
+        child_ids: Iterable[int],
+        parent_ids: Iterable[int],
+    ):
+        """
+        Bulk version of add_concept: groups the (child, parent) edge arrays by
+        node and builds each relationship BitMap in one go.
+        """
+        child_ids = np.asarray(child_ids, dtype=np.int64)
+        parent_ids = np.asarray(parent_ids, dtype=np.int64)
+
+        # New parents change the closures of the children and their descendants
+        if self.ancestor_closure:
+            for child_id in np.unique(child_ids).tolist():
+                self.invalidate_ancestor_closure(child_id)
+
+        self.nodes |= BitMap(np.asarray(concept_ids, dtype=np.uint32))
+        self.nodes |= BitMap(child_ids.astype(np.uint32))
+        self.nodes |= BitMap(parent_ids.astype(np.uint32))
+
+        for keys, values, relationship in [
+            (child_ids, parent_ids, IS_ANCESTOR_OF),
+            (parent_ids, child_ids, IS_DESCENDANT_OF),
+        ]:
+            order = np.argsort(keys, kind="stable")
+            keys, values = keys[order], values[order].astype(np.uint32)
+            unique_keys, starts = np.unique(keys, return_index=True)
+            ends = np.append(starts[1:], len(keys))
+            for node_id, start, end in zip(unique_keys.tolist(), starts, ends):
+                related = BitMap(values[start:end])
+                existing = self.relationships.get((node_id, relationship))
+                if existing is not None:
+                    existing |= related
+                else:
+                    self.relationships[node_id, relationship] = related
+
+    def set_ancestor_closure(self, concept_id: int, ancestor_ids: BitMap):
+        """
+        Store a precomputed ancestor closure, answered by get_all_ancestors
+        without traversal. Changing the edges of a concept drops the stored
+        closures of that concept and its descendants.
+        """
+        self.nodes.add(concept_id)
+        self.ancestor_closure[concept_id] = BitMap(ancestor_ids)
+
+    def invalidate_ancestor_closure(self, concept_id: int):
+        """Drop the stored closures of a concept and all its descendants."""
+        if not self.ancestor_closure:
+            return
+
+        self.ancestor_closure.pop(concept_id, None)
+        for descendant in self.get_all_descendants(concept_id):
+            self.ancestor_closure.pop(descendant, None)
+
+    def remove_edge(self, source_node_id: int, target_node_id: int):
+        """Remove the edge from a concept to one of its parents."""
+        self.invalidate_ancestor_closure(source_node_id)
+
+        parents = self.relationships.get((source_node_id, IS_ANCESTOR_OF))
+        if parents is not None:
+            parents.discard(target_node_id)
+        children = self.relationships.get((target_node_id, IS_DESCENDANT_OF))
+        if children is not None:
+            children.discard(source_node_id)
+
+    def remove_concept(self, concept_id: int):
+        """Remove a concept together with its edges to parents and children."""
+        self.invalidate_ancestor_closure(concept_id)
+
+        parents = self.relationships.pop((concept_id, IS_ANCESTOR_OF), BitMap())
+        children = self.relationships.pop((concept_id, IS_DESCENDANT_OF), BitMap())
+        for parent_id in parents:
+            self.relationships.get((parent_id, IS_DESCENDANT_OF), BitMap()).discard(
+                concept_id
+            )
+        for child_id in children:
+            self.relationships.get((child_id, IS_ANCESTOR_OF), BitMap()).discard(
+                concept_id
+            )
+
+        self.nodes.discard(concept_id)
+
     def exists_edge(self, source_node_id: int, target_node_id: int) -> bool:
         """Check if edge exists between nodes."""
         relationship_key = (source_node_id, IS_ANCESTOR_OF)
@@ -68,6 +158,9 @@ class BitMapGraph:
 
     def get_all_ancestors(self, node_id: int) -> BitMap:
         """Get all ancestors of a node (transitive closure)."""
+        if node_id in self.ancestor_closure:
+            return self.ancestor_closure[node_id].copy()
+
         if (node_id, IS_ANCESTOR_OF) not in self.relationships:
             return BitMap()
 
@@ -124,3 +217,24 @@ class BitMapGraph:
             common &= self.get_all_ancestors(concept_id)
 
         return common
+
+    def get_lowest_common_ancestors(self, concept_ids: List[int]) -> BitMap:
+        """Find the lowest common ancestors (LCS) of multiple concepts."""
+        common = self.get_common_ancestors(concept_ids)
+        return self.prune_dominated_ancestors(common)
+
+    def prune_dominated_ancestors(self, ancestors: BitMap) -> BitMap:
+        """
+        Keep only the most specific nodes of an upward-closed ancestor set.
+
+        Any node that is a direct parent of another member is dominated by it.
+        """
+        parents = [
+            self.relationships[node_id, IS_ANCESTOR_OF]
+            for node_id in ancestors
+            if (node_id, IS_ANCESTOR_OF) in self.relationships
+        ]
+        if not parents:
+            return BitMap(ancestors)
+
+        return BitMap(ancestors) - BitMap.union(*parents)
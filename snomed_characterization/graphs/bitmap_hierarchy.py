@@ -0,0 +1,41 @@
+from typing import Iterable
+from pyroaring import BitMap
+
+from .bitmap_graph import BitMapGraph, IS_ANCESTOR_OF
+from .hierarchy import Hierarchy
+
+
+class BitMapHierarchy(Hierarchy[int]):
+    """
+    Hierarchy over a BitMapGraph; the closure uses its stored ancestor
+    closures when present.
+    """
+
+    def __init__(self, graph: BitMapGraph):
+        self.graph = graph
+
+    def add_node(self, node_id: int):
+        self.graph.add_concept(node_id, [])
+
+    def add_edge(self, source_node_id: int, target_node_id: int, weight: float = 1.0):
+        """
+        Adds a child -> parent link.
+        """
+        self.graph.add_concept(source_node_id, [target_node_id])
+
+    def get_parents(self, node_id: int) -> BitMap:
+        return self.graph.relationships.get((node_id, IS_ANCESTOR_OF), BitMap())
+
+    def exists_node(self, node_id: int) -> bool:
+        return self.graph.exists_node(node_id)
+
+    def get_nodes(self) -> Iterable[int]:
+        return self.graph.nodes
+
+    def get_all_ancestors(self, node_id: int) -> BitMap:
+        return self.graph.get_all_ancestors(node_id)
+
+    def to_frozen_graph(self):
+        from .frozen_graph import FrozenGraph
+
+        return FrozenGraph.from_bitmap_graph(self.graph)
@@ -0,0 +1,89 @@
+from typing import Dict, Optional
+import networkx as nx
+
+IS_DESCENDANT_OF = "is_descendant_of"
+IS_ANCESTOR_OF = "is_ancestor_of"
+# Relationships naming a child -> parent link
+CHILD_TO_PARENT = (None, IS_DESCENDANT_OF, "is_a")
+
+
+class InternedEdgeAttributes(dict):
+    """
+    Attribute dict shared by every edge of one relationship type. Writing
+    the values it already holds is allowed (networkx does that when copying
+    edges); changing them would change every edge, so it raises instead.
+    """
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            raise TypeError("Interned edge attributes are read-only")
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __reduce__(self):
+        return (intern_relationship, (self["relationship"], self["weight"]))
+
+
+_INTERNED: Dict[tuple, InternedEdgeAttributes] = {}
+
+
+def intern_relationship(
+    relationship: str, weight: float = 1.0
+) -> InternedEdgeAttributes:
+    """Shared attribute dict for a relationship type and weight."""
+    key = (relationship, weight)
+    attributes = _INTERNED.get(key)
+    if attributes is None:
+        attributes = InternedEdgeAttributes()
+        dict.update(attributes, relationship=relationship, weight=weight)
+        _INTERNED[key] = attributes
+    return attributes
+
+
+class CompactHierarchyGraph(nx.DiGraph):
+    """
+    DiGraph storing each hierarchy link once, as a child -> parent edge, with
+    the interned `is_descendant_of` attribute dict instead of one dict per
+    edge. Parents are the successors and children the predecessors of a node.
+
+    Consumers that follow `is_descendant_of` out edges (ConditionClusterAnalyzer,
+    InformationContent, FrozenGraph.from_networkx) work unchanged; the
+    reverse `is_ancestor_of` edges of the default builders are not stored.
+    """
+
+    @staticmethod
+    def edge_attr_dict_factory():
+        return intern_relationship(IS_DESCENDANT_OF)
+
+    def add_relationship(
+        self,
+        source_node_id,
+        target_node_id,
+        relationship: Optional[str] = None,
+        weight: float = 1.0,
+    ):
+        """
+        Store a hierarchy link given in either direction: `is_ancestor_of`
+        (parent -> child) is stored reversed, as its child -> parent edge.
+        A non-default weight gets the interned dict of that weight.
+        """
+        if relationship == IS_ANCESTOR_OF:
+            source_node_id, target_node_id = target_node_id, source_node_id
+        elif relationship not in CHILD_TO_PARENT:
+            raise ValueError(
+                f"Compact graphs only store hierarchy links, not {relationship!r}"
+            )
+
+        self.add_edge(source_node_id, target_node_id)
+        if weight != 1.0:
+            attributes = intern_relationship(IS_DESCENDANT_OF, weight)
+            self._succ[source_node_id][target_node_id] = attributes
+            self._pred[target_node_id][source_node_id] = attributes
+
+    def get_parents(self, node_id):
+        return self.successors(node_id)
+
+    def get_children(self, node_id):
+        return self.predecessors(node_id)
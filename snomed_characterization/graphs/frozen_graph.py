@@ -0,0 +1,445 @@
+import os
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph, IS_ANCESTOR_OF
+from snomed_characterization.similarity import get_depth_similarity
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+IS_DESCENDANT_OF = "is_descendant_of"
+
+# Header of the shared buffer: magic, number of nodes, number of edges
+_MAGIC = 0x534E4F4D4544  # "SNOMED"
+_HEADER = np.dtype(np.int64).itemsize * 3
+
+
+def _layout(num_nodes: int, num_edges: int) -> List[Tuple[str, np.dtype, int]]:
+    return [
+        ("node_ids", np.dtype(np.int64), num_nodes),
+        ("parent_indptr", np.dtype(np.int64), num_nodes + 1),
+        ("child_indptr", np.dtype(np.int64), num_nodes + 1),
+        ("parent_indices", np.dtype(np.int32), num_edges),
+        ("child_indices", np.dtype(np.int32), num_edges),
+    ]
+
+
+def _buffer_size(num_nodes: int, num_edges: int) -> int:
+    return _HEADER + sum(
+        dtype.itemsize * length for _, dtype, length in _layout(num_nodes, num_edges)
+    )
+
+
+def _as_int64_array(values: Iterable[int]) -> np.ndarray:
+    if not isinstance(values, np.ndarray):
+        values = list(values)
+    return np.asarray(values, dtype=np.int64)
+
+
+def _expand(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray):
+    """Concatenate the CSR rows of every position in the frontier."""
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+class FrozenGraph:
+    """
+    Read-only SNOMED hierarchy stored as two CSR adjacency arrays (parents
+    and children) over dense node positions.
+
+    The arrays can live in a named shared memory block or in a memory-mapped
+    file, so worker processes attach to the same pages instead of receiving
+    a pickled copy. Pickling a shared or file-backed FrozenGraph only sends
+    its name/path, which makes it safe to pass to both fork and spawn
+    workers.
+    """
+
+    def __init__(
+        self,
+        node_ids: np.ndarray,
+        parent_indptr: np.ndarray,
+        parent_indices: np.ndarray,
+        child_indptr: np.ndarray,
+        child_indices: np.ndarray,
+    ):
+        self.node_ids = node_ids
+        self.parent_indptr = parent_indptr
+        self.parent_indices = parent_indices
+        self.child_indptr = child_indptr
+        self.child_indices = child_indices
+
+        self.shm_name: Optional[str] = None
+        self.path: Optional[str] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._is_owner = False
+
+    @classmethod
+    def from_edges(
+        cls,
+        child_ids: Iterable[int],
+        parent_ids: Iterable[int],
+        node_ids: Optional[Iterable[int]] = None,
+    ) -> "FrozenGraph":
+        """Build from parallel (child, parent) arrays."""
+        child_ids = _as_int64_array(child_ids)
+        parent_ids = _as_int64_array(parent_ids)
+        extra_nodes = _as_int64_array(node_ids if node_ids is not None else [])
+        all_node_ids = np.unique(np.concatenate([child_ids, parent_ids, extra_nodes]))
+
+        edges = np.unique(
+            np.stack(
+                [
+                    np.searchsorted(all_node_ids, child_ids),
+                    np.searchsorted(all_node_ids, parent_ids),
+                ],
+                axis=1,
+            ).reshape(-1, 2),
+            axis=0,
+        )
+        children, parents = edges[:, 0], edges[:, 1]
+        num_nodes = len(all_node_ids)
+
+        parent_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(children, minlength=num_nodes), out=parent_indptr[1:])
+        parent_indices = parents.astype(np.int32)  # sorted by child already
+
+        order = np.argsort(parents, kind="stable")
+        child_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=num_nodes), out=child_indptr[1:])
+        child_indices = children[order].astype(np.int32)
+
+        return cls(
+            all_node_ids, parent_indptr, parent_indices, child_indptr, child_indices
+        )
+
+    @classmethod
+    def from_bitmap_graph(cls, graph: BitMapGraph) -> "FrozenGraph":
+        """Freeze a BitMapGraph."""
+        child_ids, parent_ids = [], []
+        for (node_id, relationship), parents in graph.relationships.items():
+            if relationship == IS_ANCESTOR_OF:
+                child_ids.extend([node_id] * len(parents))
+                parent_ids.extend(parents)
+
+        return cls.from_edges(child_ids, parent_ids, graph.nodes)
+
+    @classmethod
+    def from_networkx(cls, graph: "nx.DiGraph") -> "FrozenGraph":
+        """Freeze a SNOMEDGraphBuilder / SNOMEDCompleteGraphBuilder graph."""
+        edges = [
+            (child, parent)
+            for child, parent, data in graph.edges(data=True)
+            if data.get("relationship") == IS_DESCENDANT_OF
+        ]
+
+        return cls.from_edges(
+            [child for child, _ in edges], [parent for _, parent in edges], graph.nodes
+        )
+
+    # Storage
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "node_ids": self.node_ids,
+            "parent_indptr": self.parent_indptr,
+            "child_indptr": self.child_indptr,
+            "parent_indices": self.parent_indices,
+            "child_indices": self.child_indices,
+        }
+
+    def _write(self, buffer):
+        num_nodes, num_edges = len(self.node_ids), len(self.parent_indices)
+        np.ndarray(3, dtype=np.int64, buffer=buffer)[:] = [
+            _MAGIC,
+            num_nodes,
+            num_edges,
+        ]
+        arrays = self._arrays()
+        offset = _HEADER
+        for name, dtype, length in _layout(num_nodes, num_edges):
+            view = np.ndarray(length, dtype=dtype, buffer=buffer, offset=offset)
+            view[:] = arrays[name]
+            offset += dtype.itemsize * length
+
+    @classmethod
+    def _from_buffer(cls, buffer) -> "FrozenGraph":
+        magic, num_nodes, num_edges = np.ndarray(3, dtype=np.int64, buffer=buffer)
+        if magic != _MAGIC:
+            raise ValueError("Buffer does not contain a FrozenGraph")
+
+        arrays = {}
+        offset = _HEADER
+        for name, dtype, length in _layout(int(num_nodes), int(num_edges)):
+            view = np.ndarray(length, dtype=dtype, buffer=buffer, offset=offset)
+            view.flags.writeable = False
+            arrays[name] = view
+            offset += dtype.itemsize * length
+
+        return cls(**arrays)
+
+    def to_shared_memory(self, name: Optional[str] = None) -> "FrozenGraph":
+        """
+        Copy the graph into a new shared memory block. The returned graph owns
+        the block and must be `unlink`ed by the creating process when done.
+        """
+        size = _buffer_size(len(self.node_ids), len(self.parent_indices))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._write(shm.buf)
+
+        frozen = self._from_buffer(shm.buf)
+        frozen.shm_name = shm.name
+        frozen._shm = shm
+        frozen._is_owner = True
+
+        return frozen
+
+    @classmethod
+    def attach(cls, name: str) -> "FrozenGraph":
+        """Attach to a graph previously placed in shared memory, without copying."""
+        # Attaching processes must not unlink the block when they exit
+        shm = shared_memory.SharedMemory(name=name, track=False)
+
+        frozen = cls._from_buffer(shm.buf)
+        frozen.shm_name = name
+        frozen._shm = shm
+
+        return frozen
+
+    def save(self, path: str):
+        """Write the graph to a file that can be memory-mapped with `open`."""
+        size = _buffer_size(len(self.node_ids), len(self.parent_indices))
+        memmap = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+        self._write(memmap)
+        memmap.flush()
+        del memmap
+
+    @classmethod
+    def open(cls, path: str) -> "FrozenGraph":
+        """Memory-map a graph written with `save`, read-only."""
+        path = os.fspath(path)
+        frozen = cls._from_buffer(np.memmap(path, dtype=np.uint8, mode="r"))
+        frozen.path = path
+
+        return frozen
+
+    def close(self):
+        """Detach from the shared memory block, if any."""
+        if self._shm is not None:
+            self._release_views()
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """Close and free the shared memory block (owner only)."""
+        shm = self._shm
+        self.close()
+        if self._is_owner and shm is not None:
+            shm.unlink()
+            self._is_owner = False
+
+    def _release_views(self):
+        # Views must be dropped before the shared buffer can be closed
+        empty = np.empty(0, dtype=np.int64)
+        self.node_ids = self.parent_indptr = self.child_indptr = empty
+        self.parent_indices = self.child_indices = empty.astype(np.int32)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._is_owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __reduce__(self):
+        if self.shm_name is not None:
+            return (FrozenGraph.attach, (self.shm_name,))
+        if self.path is not None:
+            return (FrozenGraph.open, (self.path,))
+        return (
+            FrozenGraph,
+            (
+                self.node_ids,
+                self.parent_indptr,
+                self.parent_indices,
+                self.child_indptr,
+                self.child_indices,
+            ),
+        )
+
+    # Queries
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def _position(self, node_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.node_ids, node_id))
+        if position < len(self.node_ids) and self.node_ids[position] == node_id:
+            return position
+        return None
+
+    def _to_ids(self, positions: np.ndarray) -> BitMap:
+        return BitMap(self.node_ids[positions].astype(np.uint32))
+
+    def exists_node(self, node_id: int) -> bool:
+        return self._position(node_id) is not None
+
+    def get_parents(self, node_id: int) -> BitMap:
+        position = self._position(node_id)
+        if position is None:
+            return BitMap()
+        return self._to_ids(
+            self.parent_indices[
+                self.parent_indptr[position] : self.parent_indptr[position + 1]
+            ]
+        )
+
+    def get_children(self, node_id: int) -> BitMap:
+        position = self._position(node_id)
+        if position is None:
+            return BitMap()
+        return self._to_ids(
+            self.child_indices[
+                self.child_indptr[position] : self.child_indptr[position + 1]
+            ]
+        )
+
+    def _positions(self, concept_ids: Iterable[int]) -> np.ndarray:
+        """Dense positions of the concepts that are part of the graph."""
+        concept_ids = np.fromiter(concept_ids, dtype=np.int64)
+        positions = np.searchsorted(self.node_ids, concept_ids)
+        found = positions < len(self.node_ids)
+        found[found] = self.node_ids[positions[found]] == concept_ids[found]
+        return positions[found]
+
+    def _closure_with_depths(
+        self,
+        start: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        max_depth: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Level-synchronous BFS returning (positions, depths), excluding the start."""
+        if len(start) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+
+        visited = BitMap(start.astype(np.uint32))
+        frontier = start
+        positions, depths = [], []
+        depth = 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            depth += 1
+            new_positions = (
+                BitMap(_expand(indptr, indices, frontier).astype(np.uint32)) - visited
+            )
+            visited |= new_positions
+            frontier = np.frombuffer(new_positions.to_array(), dtype=np.uint32)
+            positions.append(frontier)
+            depths.append(np.full(len(frontier), depth, dtype=np.int64))
+
+        if not positions:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        return np.concatenate(positions), np.concatenate(depths)
+
+    def get_all_ancestors(self, node_id: int) -> BitMap:
+        """Get all ancestors of a node (transitive closure)."""
+        positions, _ = self._closure_with_depths(
+            self._positions([node_id]), self.parent_indptr, self.parent_indices
+        )
+        return self._to_ids(positions)
+
+    def get_all_descendants(self, node_id: int) -> BitMap:
+        """Get all descendants of a node (transitive closure)."""
+        positions, _ = self._closure_with_depths(
+            self._positions([node_id]), self.child_indptr, self.child_indices
+        )
+        return self._to_ids(positions)
+
+    def get_ancestors_with_depths(
+        self, node_id: int, max_depth: Optional[int] = None
+    ) -> Dict[int, int]:
+        """Ancestors mapped to their shortest distance from the node."""
+        positions, depths = self._closure_with_depths(
+            self._positions([node_id]),
+            self.parent_indptr,
+            self.parent_indices,
+            max_depth,
+        )
+        return dict(zip(self.node_ids[positions].tolist(), depths.tolist()))
+
+    def get_common_ancestors(self, concept_ids: List[int]) -> BitMap:
+        """Find common ancestors of multiple concepts."""
+        if not concept_ids:
+            return BitMap()
+
+        common = self.get_all_ancestors(concept_ids[0])
+        for concept_id in concept_ids[1:]:
+            common &= self.get_all_ancestors(concept_id)
+
+        return common
+
+    def get_hierarchical_similarity(self, code1: int, code2: int) -> float:
+        """
+        Path-depth similarity, as ConditionClusterAnalyzer.get_hierarchical_similarity.
+        """
+        return get_depth_similarity(
+            code1,
+            self.get_ancestors_with_depths(code1),
+            code2,
+            self.get_ancestors_with_depths(code2),
+        )
+
+    def get_upward_closure(self, concept_ids: Iterable[int]) -> BitMap:
+        """Concepts together with all their ancestors (unknown concepts are skipped)."""
+        start = self._positions(concept_ids)
+        positions, _ = self._closure_with_depths(
+            start, self.parent_indptr, self.parent_indices
+        )
+        return self._to_ids(np.concatenate([start, positions]))
+
+    def subgraph(self, concept_ids: Iterable[int]) -> "FrozenGraph":
+        """Compact copy of the subgraph induced by the given concepts."""
+        keep = np.zeros(len(self.node_ids), dtype=bool)
+        keep[self._positions(concept_ids)] = True
+
+        children = np.repeat(np.arange(len(self.node_ids)), np.diff(self.parent_indptr))
+        parents = self.parent_indices
+        edge_mask = keep[children] & keep[parents]
+
+        return FrozenGraph.from_edges(
+            self.node_ids[children[edge_mask]],
+            self.node_ids[parents[edge_mask]],
+            self.node_ids[keep],
+        )
+
+    def to_networkx(self) -> "nx.DiGraph":
+        """
+        Bi-directed graph with is_descendant_of / is_ancestor_of edges, the
+        same shape SNOMEDGraphBuilder produces.
+        """
+        children = self.node_ids[
+            np.repeat(np.arange(len(self.node_ids)), np.diff(self.parent_indptr))
+        ].tolist()
+        parents = self.node_ids[self.parent_indices].tolist()
+
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.node_ids.tolist())
+        graph.add_edges_from(
+            zip(children, parents), weight=1.0, relationship=IS_DESCENDANT_OF
+        )
+        graph.add_edges_from(
+            zip(parents, children), weight=1.0, relationship=IS_ANCESTOR_OF
+        )
+
+        return graph
@@ -0,0 +1,41 @@
+from typing import Dict, Iterable, Optional
+from pyroaring import BitMap
+
+from .frozen_graph import FrozenGraph
+from .hierarchy import Hierarchy
+
+
+class FrozenHierarchy(Hierarchy[int]):
+    """
+    Hierarchy over a CSR FrozenGraph, whose vectorized traversals are used
+    directly. The graph is read-only.
+    """
+
+    def __init__(self, graph: FrozenGraph):
+        self.graph = graph
+
+    def add_node(self, node_id: int):
+        raise TypeError("FrozenGraph is read-only")
+
+    def add_edge(self, source_node_id: int, target_node_id: int, weight: float = 1.0):
+        raise TypeError("FrozenGraph is read-only")
+
+    def get_parents(self, node_id: int) -> BitMap:
+        return self.graph.get_parents(node_id)
+
+    def exists_node(self, node_id: int) -> bool:
+        return self.graph.exists_node(node_id)
+
+    def get_nodes(self) -> Iterable[int]:
+        return self.graph.node_ids.tolist()
+
+    def get_ancestors_with_depths(
+        self, node_id: int, max_depth: Optional[int] = None
+    ) -> Dict[int, int]:
+        return self.graph.get_ancestors_with_depths(node_id, max_depth)
+
+    def get_all_ancestors(self, node_id: int) -> BitMap:
+        return self.graph.get_all_ancestors(node_id)
+
+    def to_frozen_graph(self) -> FrozenGraph:
+        return self.graph
@@ -0,0 +1,117 @@
+from abc import abstractmethod
+import sys
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from pyroaring import BitMap
+
+from .abstract_graph import AbstractGraph, T
+
+
+class Hierarchy(AbstractGraph[T]):
+    """
+    Read side of a SNOMED is-a hierarchy as used by ConditionClusterAnalyzer:
+    parents, ancestors with their depth and the ancestor closure. Neighbors
+    are the parents of a node.
+
+    Backends only have to provide get_parents, exists_node and get_nodes;
+    the traversals below are generic and are overridden where a backend has
+    a faster one. Use `as_hierarchy` to wrap a networkx graph, a BitMapGraph
+    or a FrozenGraph.
+    """
+
+    @abstractmethod
+    def get_parents(self, node_id: T) -> Iterable[T]:
+        """
+        Returns the direct parents of the given node.
+        """
+        pass
+
+    @abstractmethod
+    def exists_node(self, node_id: T) -> bool:
+        pass
+
+    @abstractmethod
+    def get_nodes(self) -> Iterable[T]:
+        pass
+
+    def get_neighbors(self, node_id: T) -> List[T]:
+        return list(self.get_parents(node_id))
+
+    def get_weighted_neighbors(self, node_id: T) -> List[Tuple[T, float]]:
+        return [(parent_id, 1.0) for parent_id in self.get_parents(node_id)]
+
+    def get_edges(self) -> Iterator[Tuple[T, T]]:
+        """
+        Yields every (child, parent) edge.
+        """
+        for node_id in self.get_nodes():
+            for parent_id in self.get_parents(node_id):
+                yield node_id, parent_id
+
+    def get_ancestors_with_depths(
+        self, node_id: T, max_depth: Optional[int] = None
+    ) -> Dict[T, int]:
+        """
+        Ancestors mapped to their shortest distance from the node.
+        """
+        ancestors = {}
+        visited = {node_id}
+        queue = deque([(node_id, 0)])
+
+        while queue:
+            current, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+
+            for parent_id in self.get_parents(current):
+                if parent_id not in visited:
+                    visited.add(parent_id)
+                    ancestors[parent_id] = depth + 1
+                    queue.append((parent_id, depth + 1))
+
+        return ancestors
+
+    def get_all_ancestors(self, node_id: T) -> BitMap:
+        """
+        Returns the ancestor closure of the node.
+        """
+        return BitMap(self.get_ancestors_with_depths(node_id))
+
+    def to_frozen_graph(self):
+        """
+        FrozenGraph snapshot of the hierarchy (see AnalyzerSnapshot).
+        """
+        from .frozen_graph import FrozenGraph
+
+        edges = list(self.get_edges())
+        return FrozenGraph.from_edges(
+            [child for child, _ in edges],
+            [parent for _, parent in edges],
+            self.get_nodes(),
+        )
+
+
+def as_hierarchy(graph) -> Hierarchy:
+    """
+    Wrap a networkx DiGraph, BitMapGraph or FrozenGraph in the matching
+    Hierarchy adapter; a Hierarchy is returned as is.
+    """
+    from .bitmap_graph import BitMapGraph
+    from .bitmap_hierarchy import BitMapHierarchy
+    from .frozen_graph import FrozenGraph
+    from .frozen_hierarchy import FrozenHierarchy
+
+    if isinstance(graph, Hierarchy):
+        return graph
+    # A networkx graph implies networkx is loaded; don't import it otherwise
+    nx = sys.modules.get("networkx")
+    if nx is not None and isinstance(graph, nx.DiGraph):
+        from .networkx_hierarchy import NetworkXHierarchy
+
+        return NetworkXHierarchy(graph)
+    if isinstance(graph, BitMapGraph):
+        return BitMapHierarchy(graph)
+    if isinstance(graph, FrozenGraph):
+        return FrozenHierarchy(graph)
+
+    raise TypeError(f"Unsupported hierarchy backend: {type(graph).__name__}")
@@ -0,0 +1,191 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.hierarchy import Hierarchy, as_hierarchy
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+IC_MEASURES = ("resnik", "lin", "jiang_conrath")
+
+
+class InformationContent:
+    """
+    Descendant counts and information content (IC) for every node of a
+    SNOMED graph (any backend accepted by as_hierarchy), computed in a
+    single topological pass.
+
+    Without frequencies the intrinsic IC of Seco et al. is used:
+        IC(c) = 1 - log(descendants(c) + 1) / log(N)
+    With frequencies (e.g. ConditionClusterAnalyzer.condition_frequencies)
+    the corpus IC is used, where each concept is credited with the
+    occurrences of all its descendants:
+        IC(c) = -log((count(c) + 1) / (total + 1))
+
+    Nodes are addressed by dense positions (`index`), which is also how
+    subsumer sets passed to `get_mica_ic` are expected to be encoded.
+    """
+
+    def __init__(
+        self,
+        graph: Union["nx.DiGraph", Hierarchy],
+        frequencies: Optional[Dict[int, int]] = None,
+    ):
+        graph = as_hierarchy(graph)
+        self.node_ids = np.array(sorted(graph.get_nodes()), dtype=np.int64)
+        self.index: Dict[int, int] = {
+            int(node_id): position for position, node_id in enumerate(self.node_ids)
+        }
+        self.is_corpus_based = frequencies is not None
+
+        frequency_array = np.zeros(len(self.node_ids), dtype=np.float64)
+        for concept_id, frequency in (frequencies or {}).items():
+            position = self.index.get(concept_id)
+            if position is not None:
+                frequency_array[position] = frequency
+
+        self.descendant_counts, counts = self._count_descendants(graph, frequency_array)
+
+        if self.is_corpus_based:
+            total = frequency_array.sum()
+            self.ic = -np.log((counts + 1.0) / (total + 1.0))
+        elif len(self.node_ids) > 1:
+            self.ic = 1.0 - np.log(self.descendant_counts + 1.0) / np.log(
+                len(self.node_ids)
+            )
+        else:
+            self.ic = np.zeros(len(self.node_ids), dtype=np.float64)
+
+        self.max_ic = float(self.ic.max()) if len(self.ic) else 0.0
+
+    def _count_descendants(self, graph: Hierarchy, frequency_array: np.ndarray):
+        """
+        Walk the hierarchy from the leaves up, merging each node's descendant
+        bitmap into its parents and freeing it once every parent has it.
+        """
+        import networkx as nx
+
+        # child -> parent edges, in dense positions
+        hierarchy = nx.DiGraph()
+        hierarchy.add_nodes_from(range(len(self.node_ids)))
+        hierarchy.add_edges_from(
+            (self.index[child], self.index[parent])
+            for child, parent in graph.get_edges()
+        )
+
+        descendant_counts = np.zeros(len(self.node_ids), dtype=np.int64)
+        counts = np.zeros(len(self.node_ids), dtype=np.float64)
+        remaining_parents = {
+            node: hierarchy.out_degree(node) for node in hierarchy.nodes
+        }
+        descendants: Dict[int, BitMap] = {}
+
+        for node in nx.topological_sort(hierarchy):
+            children = list(hierarchy.predecessors(node))
+            node_descendants = BitMap(children)
+            for child in children:
+                node_descendants |= descendants[child]
+                remaining_parents[child] -= 1
+                if remaining_parents[child] == 0:
+                    del descendants[child]
+
+            descendant_counts[node] = len(node_descendants)
+            counts[node] = frequency_array[node]
+            if node_descendants:
+                counts[node] += frequency_array[
+                    np.frombuffer(node_descendants.to_array(), dtype=np.uint32)
+                ].sum()
+
+            if remaining_parents[node]:
+                descendants[node] = node_descendants
+
+        return descendant_counts, counts
+
+    def get_ic(self, concept_id: int) -> float:
+        """IC of a concept, 0.0 if it is not part of the graph."""
+        position = self.index.get(concept_id)
+        if position is None:
+            return 0.0
+        return float(self.ic[position])
+
+    def get_ics(self, concept_ids: Iterable[int]) -> np.ndarray:
+        """IC of each concept, 0.0 for concepts not part of the graph."""
+        return np.array([self.get_ic(concept_id) for concept_id in concept_ids])
+
+    def to_positions(self, concept_ids: Iterable[int]) -> BitMap:
+        """Encode concept ids as a bitmap of dense positions."""
+        return BitMap(
+            self.index[concept_id]
+            for concept_id in concept_ids
+            if concept_id in self.index
+        )
+
+    def get_mica_ic(self, subsumers_1: BitMap, subsumers_2: BitMap) -> float:
+        """IC of the most informative common ancestor of two subsumer sets."""
+        common = subsumers_1 & subsumers_2
+        if not common:
+            return 0.0
+        return float(self.ic[np.frombuffer(common.to_array(), dtype=np.uint32)].max())
+
+    def get_mica_ics(self, subsumers: BitMap, others: List[BitMap]) -> np.ndarray:
+        """
+        get_mica_ic of one subsumer set against each of `others`, in one pass:
+        the other sets are concatenated, positions outside `subsumers` are
+        masked and the IC maximum is reduced per set.
+        """
+        mica_ics = np.zeros(len(others), dtype=np.float64)
+        lengths = np.array([len(other) for other in others], dtype=np.int64)
+        nonempty = lengths > 0
+        if not subsumers or not nonempty.any():
+            return mica_ics
+
+        positions = np.concatenate(
+            [np.frombuffer(other.to_array(), dtype=np.uint32) for other in others]
+        )
+        common = np.isin(
+            positions, np.frombuffer(subsumers.to_array(), dtype=np.uint32)
+        )
+        ics = np.where(common, self.ic[positions], -np.inf)
+        starts = (np.cumsum(lengths) - lengths)[nonempty]
+        maxima = np.maximum.reduceat(ics, starts)
+        mica_ics[nonempty] = np.where(np.isneginf(maxima), 0.0, maxima)
+
+        return mica_ics
+
+    def get_similarities(
+        self,
+        measure: str,
+        ic_1: np.ndarray,
+        ic_2: np.ndarray,
+        mica_ic: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Vectorized IC similarity scaled to [0, 1].
+
+        Resnik is normalized by the largest IC in the graph and
+        Jiang-Conrath distance is turned into a similarity as 1 / (1 + d).
+        """
+        ic_1 = np.asarray(ic_1, dtype=np.float64)
+        ic_2 = np.asarray(ic_2, dtype=np.float64)
+        mica_ic = np.asarray(mica_ic, dtype=np.float64)
+
+        if measure == "resnik":
+            if self.max_ic == 0:
+                return np.zeros_like(mica_ic)
+            return mica_ic / self.max_ic
+
+        if measure == "lin":
+            denominator = ic_1 + ic_2
+            return np.divide(
+                2.0 * mica_ic,
+                denominator,
+                out=np.zeros_like(mica_ic),
+                where=denominator > 0,
+            )
+
+        if measure == "jiang_conrath":
+            distance = np.maximum(ic_1 + ic_2 - 2.0 * mica_ic, 0.0)
+            return 1.0 / (1.0 + distance)
+
+        raise ValueError(f"Unsupported IC measure: {measure}")
@@ -0,0 +1,121 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from pyroaring import BitMap, FrozenBitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph, IS_ANCESTOR_OF
+
+
+class LowestCommonSubsumerEngine:
+    """
+    Answers lowest common subsumer (LCS) queries on a BitMapGraph.
+
+    Subsumption is reflexive: a concept subsumes itself, so the LCS of a
+    concept and one of its ancestors is that ancestor. Ancestor closures and
+    pair results are memoized; the graph must not change while the engine is
+    in use (call `clear_cache` after mutating it).
+    """
+
+    def __init__(self, graph: BitMapGraph, max_cache_size: Optional[int] = 1_000_000):
+        self.graph = graph
+        self.max_cache_size = max_cache_size
+        self._subsumers: Dict[int, FrozenBitMap] = {}
+        self._pair_cache: Dict[Tuple[int, int], FrozenBitMap] = {}
+
+    def clear_cache(self):
+        """Drop memoized closures and pair results."""
+        self._subsumers.clear()
+        self._pair_cache.clear()
+
+    def get_subsumers(self, concept_id: int) -> FrozenBitMap:
+        """Get the concept together with all its ancestors (memoized)."""
+        cached = self._subsumers.get(concept_id)
+        if cached is not None:
+            return cached
+
+        # Iterative post-order walk so each closure is built from its parents'
+        stack = [concept_id]
+        expanded = set()
+        while stack:
+            node_id = stack[-1]
+            if node_id in self._subsumers:
+                stack.pop()
+                continue
+
+            parents = self._get_parents(node_id)
+            pending = [p for p in parents if p not in self._subsumers]
+            if pending:
+                if node_id in expanded:
+                    raise ValueError(f"Cycle detected at concept {node_id}")
+                expanded.add(node_id)
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            closure = BitMap([node_id])
+            if parents:
+                closure |= BitMap.union(*(self._subsumers[p] for p in parents))
+            self._subsumers[node_id] = FrozenBitMap(closure)
+
+        return self._subsumers[concept_id]
+
+    def get_common_subsumers(self, concept_ids: Iterable[int]) -> BitMap:
+        """Get every concept that subsumes all the given concepts."""
+        concept_ids = list(concept_ids)
+        if not concept_ids:
+            return BitMap()
+
+        return BitMap.intersection(*(self.get_subsumers(c) for c in concept_ids))
+
+    def get_lcs(self, concept_id_1: int, concept_id_2: int) -> FrozenBitMap:
+        """Get the lowest common subsumer(s) of a pair of concepts."""
+        pair = (
+            (concept_id_1, concept_id_2)
+            if concept_id_1 <= concept_id_2
+            else (concept_id_2, concept_id_1)
+        )
+        cached = self._pair_cache.get(pair)
+        if cached is not None:
+            return cached
+
+        common = self.get_subsumers(concept_id_1) & self.get_subsumers(concept_id_2)
+        result = FrozenBitMap(self._prune_dominated(common))
+
+        if (
+            self.max_cache_size is not None
+            and len(self._pair_cache) >= self.max_cache_size
+        ):
+            # Evict the oldest entry (dicts keep insertion order)
+            del self._pair_cache[next(iter(self._pair_cache))]
+        self._pair_cache[pair] = result
+
+        return result
+
+    def get_lcs_pairs(self, pairs: Iterable[Tuple[int, int]]) -> List[FrozenBitMap]:
+        """Get the lowest common subsumer(s) for each pair of concepts."""
+        return [
+            self.get_lcs(concept_id_1, concept_id_2)
+            for concept_id_1, concept_id_2 in pairs
+        ]
+
+    def get_lcs_set(self, concept_ids: Iterable[int]) -> FrozenBitMap:
+        """Get the lowest common subsumer(s) of a whole set of concepts."""
+        concept_ids = list(concept_ids)
+        if len(concept_ids) == 2:
+            return self.get_lcs(concept_ids[0], concept_ids[1])
+
+        common = self.get_common_subsumers(concept_ids)
+        return FrozenBitMap(self._prune_dominated(common))
+
+    def _get_parents(self, concept_id: int) -> BitMap:
+        return self.graph.relationships.get((concept_id, IS_ANCESTOR_OF), BitMap())
+
+    def _prune_dominated(self, subsumers: BitMap) -> BitMap:
+        """
+        Common subsumers are upward closed, so a member is dominated exactly
+        when it is a direct parent of another member.
+        """
+        parents = [self._get_parents(node_id) for node_id in subsumers]
+        parents = [p for p in parents if p]
+        if not parents:
+            return BitMap(subsumers)
+
+        return BitMap(subsumers) - BitMap.union(*parents)
@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, Optional
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+
+
+class MultiDomainGraph(BitMapGraph):
+    """
+    One BitMapGraph holding the hierarchies of several OMOP domains, with
+    per-domain and per-vocabulary membership bitmaps over the shared concept
+    ids. Domain-filtered queries are the plain traversal intersected with
+    the membership bitmap.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.domains: Dict[str, BitMap] = {}
+        self.vocabularies: Dict[str, BitMap] = {}
+
+    def add_memberships(
+        self,
+        concept_ids: Iterable[int],
+        domain_ids: Iterable[str],
+        vocabulary_ids: Iterable[str],
+    ):
+        """Group the concept columns by domain and vocabulary into bitmaps."""
+        concept_ids = np.asarray(concept_ids, dtype=np.uint32)
+        self.nodes |= BitMap(concept_ids)
+
+        for members, keys in [
+            (self.domains, np.asarray(domain_ids, dtype=object)),
+            (self.vocabularies, np.asarray(vocabulary_ids, dtype=object)),
+        ]:
+            for key in set(keys.tolist()):
+                member_ids = BitMap(concept_ids[keys == key])
+                if key in members:
+                    members[key] |= member_ids
+                else:
+                    members[key] = member_ids
+
+    def get_members(
+        self,
+        domain_ids: Optional[Iterable[str]] = None,
+        vocabulary_ids: Optional[Iterable[str]] = None,
+    ) -> BitMap:
+        """Concepts in any of the domains and any of the vocabularies."""
+        members = BitMap(self.nodes)
+        if domain_ids is not None:
+            members &= BitMap.union(
+                BitMap(), *(self.domains.get(d, BitMap()) for d in domain_ids)
+            )
+        if vocabulary_ids is not None:
+            members &= BitMap.union(
+                BitMap(), *(self.vocabularies.get(v, BitMap()) for v in vocabulary_ids)
+            )
+        return members
+
+    def get_domain(self, concept_id: int) -> Optional[str]:
+        for domain_id, members in self.domains.items():
+            if concept_id in members:
+                return domain_id
+        return None
+
+    def get_ancestors_in(
+        self,
+        node_id: int,
+        domain_ids: Optional[Iterable[str]] = None,
+        vocabulary_ids: Optional[Iterable[str]] = None,
+    ) -> BitMap:
+        """Ancestors restricted to the given domains / vocabularies."""
+        return self.get_all_ancestors(node_id) & self.get_members(
+            domain_ids, vocabulary_ids
+        )
+
+    def get_descendants_in(
+        self,
+        node_id: int,
+        domain_ids: Optional[Iterable[str]] = None,
+        vocabulary_ids: Optional[Iterable[str]] = None,
+    ) -> BitMap:
+        """Descendants restricted to the given domains / vocabularies."""
+        return self.get_all_descendants(node_id) & self.get_members(
+            domain_ids, vocabulary_ids
+        )
@@ -0,0 +1,58 @@
+from typing import Iterable, List
+import networkx as nx
+
+from .compact_hierarchy_graph import CompactHierarchyGraph
+from .hierarchy import Hierarchy
+
+IS_ANCESTOR_OF = "is_ancestor_of"
+IS_DESCENDANT_OF = "is_descendant_of"
+
+
+class NetworkXHierarchy(Hierarchy[int]):
+    """
+    Hierarchy over a SNOMEDGraphBuilder graph, either the bi-directed one
+    (parents are the is_descendant_of out edges) or a CompactHierarchyGraph
+    (parents are the successors).
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+        self.compact = isinstance(graph, CompactHierarchyGraph)
+
+    def add_node(self, node_id: int):
+        self.graph.add_node(node_id)
+
+    def add_edge(self, source_node_id: int, target_node_id: int, weight: float = 1.0):
+        """
+        Adds a child -> parent link.
+        """
+        if self.compact:
+            self.graph.add_edge(source_node_id, target_node_id)
+            return
+
+        self.graph.add_edge(
+            source_node_id, target_node_id, weight=weight, relationship=IS_DESCENDANT_OF
+        )
+        self.graph.add_edge(
+            target_node_id, source_node_id, weight=weight, relationship=IS_ANCESTOR_OF
+        )
+
+    def get_parents(self, node_id: int) -> List[int]:
+        if not self.graph.has_node(node_id):
+            return []
+        if self.compact:
+            return list(self.graph.successors(node_id))
+
+        return [
+            parent_id
+            for _, parent_id, relationship in self.graph.out_edges(
+                node_id, data="relationship"
+            )
+            if relationship == IS_DESCENDANT_OF
+        ]
+
+    def exists_node(self, node_id: int) -> bool:
+        return self.graph.has_node(node_id)
+
+    def get_nodes(self) -> Iterable[int]:
+        return self.graph.nodes
@@ -0,0 +1,189 @@
+import glob
+import os
+import duckdb
+import numpy as np
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Set, Tuple
+
+from snomed_characterization.duckdb.queries import sql_string
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# (sources, targets, weights) arrays of one chunk of edges
+EdgeChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _compress(labels: np.ndarray):
+    """Point every node straight at its root."""
+    while True:
+        jumped = labels[labels]
+        if np.array_equal(jumped, labels):
+            return
+        labels[:] = jumped
+
+
+def union_edges(labels: np.ndarray, sources: np.ndarray, targets: np.ndarray):
+    """
+    Vectorized union-find step: merge the components of the given edges
+    (dense node positions) into `labels`, where each component is labelled
+    by its smallest position. Roots are hooked onto smaller roots and paths
+    compressed until every edge lies inside one component.
+    """
+    while True:
+        _compress(labels)
+        roots_1, roots_2 = labels[sources], labels[targets]
+        differ = roots_1 != roots_2
+        if not differ.any():
+            return
+        np.minimum.at(
+            labels,
+            np.maximum(roots_1[differ], roots_2[differ]),
+            np.minimum(roots_1[differ], roots_2[differ]),
+        )
+
+
+def components_from_labels(nodes: np.ndarray, labels: np.ndarray) -> List[Set[int]]:
+    _compress(labels)
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+
+    return [set(group.tolist()) for group in np.split(nodes[order], boundaries)]
+
+
+class SimilarityEdgeList:
+    """
+    Columnar similarity graph: parallel source / target / weight arrays
+    plus the sorted array of every node, isolated ones included. It takes
+    24 bytes per edge where an nx.Graph keeps dicts, and is enough for
+    connected components, degrees and weight statistics.
+    """
+
+    def __init__(
+        self,
+        nodes: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+    ):
+        self.nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    @classmethod
+    def from_chunks(
+        cls, nodes: Iterable[int], chunks: Iterable[EdgeChunk]
+    ) -> "SimilarityEdgeList":
+        chunks = list(chunks)
+        if not chunks:
+            return cls(np.fromiter(nodes, dtype=np.int64), [], [], [])
+
+        sources, targets, weights = (np.concatenate(column) for column in zip(*chunks))
+        return cls(np.fromiter(nodes, dtype=np.int64), sources, targets, weights)
+
+    @classmethod
+    def from_networkx(cls, graph: "nx.Graph") -> "SimilarityEdgeList":
+        edges = graph.number_of_edges()
+        sources = np.empty(edges, dtype=np.int64)
+        targets = np.empty(edges, dtype=np.int64)
+        weights = np.empty(edges, dtype=np.float64)
+        for i, (source, target, weight) in enumerate(
+            graph.edges(data="weight", default=0.0)
+        ):
+            sources[i], targets[i], weights[i] = source, target, weight
+
+        return cls(np.fromiter(graph.nodes, dtype=np.int64), sources, targets, weights)
+
+    @classmethod
+    def load(cls, directory: str) -> "SimilarityEdgeList":
+        """Read an edge list written by SimilarityEdgeListWriter."""
+        writer = SimilarityEdgeListWriter
+        return cls.from_chunks(
+            writer.read_nodes(directory), writer.iter_chunks(directory)
+        )
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def positions(self, node_ids: np.ndarray) -> np.ndarray:
+        """Dense positions of node ids in `nodes`."""
+        return np.searchsorted(self.nodes, node_ids)
+
+    def degrees(self) -> np.ndarray:
+        """Degree of every node, aligned with `nodes`."""
+        return np.bincount(
+            self.positions(self.sources), minlength=len(self.nodes)
+        ) + np.bincount(self.positions(self.targets), minlength=len(self.nodes))
+
+    def connected_components(self) -> List[Set[int]]:
+        labels = np.arange(len(self.nodes))
+        union_edges(labels, self.positions(self.sources), self.positions(self.targets))
+
+        return components_from_labels(self.nodes, labels)
+
+    def to_networkx(self) -> "nx.Graph":
+        import networkx as nx
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes.tolist())
+        graph.add_weighted_edges_from(
+            zip(self.sources.tolist(), self.targets.tolist(), self.weights.tolist())
+        )
+        return graph
+
+
+class SimilarityEdgeListWriter:
+    """
+    Streams edge chunks into numbered Parquet files of a directory (through
+    DuckDB), next to a file holding every node.
+    """
+
+    def __init__(self, directory: str, nodes: Iterable[int]):
+        import pandas as pd
+
+        self.directory = directory
+        self.paths: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+        self._connection = duckdb.connect()
+        self._copy(
+            pd.DataFrame({"node": np.fromiter(nodes, dtype=np.int64)}),
+            os.path.join(directory, "nodes.parquet"),
+        )
+
+    def _copy(self, frame, path: str):
+        self._connection.register("frame", frame)
+        try:
+            self._connection.execute(
+                f"COPY frame TO {sql_string(path)} (FORMAT parquet)"
+            )
+        finally:
+            self._connection.unregister("frame")
+
+    def write(self, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        import pandas as pd
+
+        path = os.path.join(self.directory, f"edges-{len(self.paths) + 1:05d}.parquet")
+        self._copy(
+            pd.DataFrame({"source": sources, "target": targets, "weight": weights}),
+            path,
+        )
+        self.paths.append(path)
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def read_nodes(directory: str) -> np.ndarray:
+        path = os.path.join(directory, "nodes.parquet")
+        return duckdb.sql(
+            f"SELECT node FROM read_parquet({sql_string(path)})"
+        ).fetchnumpy()["node"]
+
+    @staticmethod
+    def iter_chunks(directory: str) -> Iterator[EdgeChunk]:
+        """Edge chunks in the order they were written, one file at a time."""
+        for path in sorted(glob.glob(os.path.join(directory, "edges-*.parquet"))):
+            columns = duckdb.sql(
+                f"SELECT source, target, weight FROM read_parquet({sql_string(path)})"
+            ).fetchnumpy()
+            yield columns["source"], columns["target"], columns["weight"]
@@ -1,16 +1,31 @@
-from typing import List
+from typing import Iterable, List, Optional, Union
 import networkx as nx
+from pandas import DataFrame
 
 # from .adjacency_graph import AdjacencyListGraph
 from snomed_characterization.graphs.adjacency_graph import AdjacencyListGraph
+from snomed_characterization.graphs.compact_hierarchy_graph import (
+    CompactHierarchyGraph,
+)
 
+from snomed_characterization.concept_attribute_store import ConceptAttributeStore
 from snomed_characterization.snomed_concept import RawSNOMEDConcept
 
 
 class SNOMEDCompleteGraphBuilder(AdjacencyListGraph[RawSNOMEDConcept]):
-    def __init__(self):
-        self.graph = nx.DiGraph()
-        pass
+    """
+    Nodes carry only concept ids; concept attributes live in the columnar
+    `concepts` store and are read back with get_concept. With `compact`
+    each hierarchy link is stored once, see CompactHierarchyGraph.
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.graph = CompactHierarchyGraph() if compact else nx.DiGraph()
+        self.concepts = ConceptAttributeStore()
+
+    def get_concept(self, concept_id: int) -> Optional[RawSNOMEDConcept]:
+        return self.concepts.get(concept_id)
 
     def add_edge(
         self,
@@ -19,6 +34,14 @@ class SNOMEDCompleteGraphBuilder(AdjacencyListGraph[RawSNOMEDConcept]):
         weight: float = 1.0,
         relationship: str = "is_a",
     ):
+        if self.compact:
+            self.graph.add_relationship(
+                source_node_id.concept_id,
+                target_node_id.concept_id,
+                relationship,
+                weight,
+            )
+            return
         self.graph.add_edge(
             source_node_id.concept_id,
             target_node_id.concept_id,
@@ -34,15 +57,73 @@ class SNOMEDCompleteGraphBuilder(AdjacencyListGraph[RawSNOMEDConcept]):
         """
         Adds a concept to the graph with edges to its parents.
         """
-        self.graph.add_node(concept.concept_id, data=concept)
+        self.concepts.add(concept)
+        self.graph.add_node(concept.concept_id)
         for parent_id in parent_ids:
             if not self.exists_node(parent_id):
                 self.add_concept(concept=parent_id, parent_ids=[])
 
-            if not self.exists_edge(concept, parent_id):
+            if self.compact:
+                self.graph.add_edge(concept.concept_id, parent_id.concept_id)
+            elif not self.exists_edge(concept, parent_id):
                 self.add_edge(concept, parent_id, relationship="is_descendant_of")
                 self.add_edge(parent_id, concept, relationship="is_ancestor_of")
 
+    def add_hierarchy_from(
+        self,
+        concepts: Union[DataFrame, Iterable[RawSNOMEDConcept]],
+        child_ids: Iterable[int],
+        parent_ids: Iterable[int],
+    ):
+        """
+        Bulk version of add_concept: adds all concepts, then every
+        (child, parent) edge in both directions with a single call each.
+        Concepts may be a DataFrame with the RawSNOMEDConcept columns, which
+        is stored without building any objects. Edges are given by concept_id.
+        """
+        child_ids = list(child_ids)
+        parent_ids = list(parent_ids)
+
+        if isinstance(concepts, DataFrame):
+            self.concepts.extend_from_dataframe(concepts)
+            concept_ids = concepts["concept_id"].tolist()
+        else:
+            concepts = list(concepts)
+            self.concepts.extend(concepts)
+            concept_ids = [concept.concept_id for concept in concepts]
+
+        self.graph.add_nodes_from(concept_ids)
+        if self.compact:
+            self.graph.add_edges_from(zip(child_ids, parent_ids))
+            return
+
+        self.graph.add_edges_from(
+            zip(child_ids, parent_ids), weight=1.0, relationship="is_descendant_of"
+        )
+        self.graph.add_edges_from(
+            zip(parent_ids, child_ids), weight=1.0, relationship="is_ancestor_of"
+        )
+
+    def remove_edge(self, source_node_id: int, target_node_id: int):
+        """
+        Removes the edge from a concept to one of its parents, in both
+        directions. Edges are given by concept_id.
+        """
+        for edge in [
+            (source_node_id, target_node_id),
+            (target_node_id, source_node_id),
+        ]:
+            if self.graph.has_edge(*edge):
+                self.graph.remove_edge(*edge)
+
+    def remove_concept(self, concept_id: int):
+        """
+        Removes a concept, its edges and its attributes.
+        """
+        if self.graph.has_node(concept_id):
+            self.graph.remove_node(concept_id)
+        self.concepts.remove(concept_id)
+
     def exists_edge(
         self, source_node_id: RawSNOMEDConcept, target_node_id: RawSNOMEDConcept
     ) -> bool:
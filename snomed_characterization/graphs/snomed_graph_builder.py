@@ -1,16 +1,27 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 import networkx as nx
 
 from .adjacency_graph import AdjacencyListGraph
 from .abstract_graph import T
+from .compact_hierarchy_graph import CompactHierarchyGraph
 
 
 class SNOMEDGraphBuilder(AdjacencyListGraph[T]):
-    def __init__(self):
-        self.graph = nx.DiGraph()
-        pass
+    """
+    @compact: bool
+    store each hierarchy link once (child -> parent) in a
+    CompactHierarchyGraph instead of as an is_descendant_of /
+    is_ancestor_of edge pair.
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.graph = CompactHierarchyGraph() if compact else nx.DiGraph()
 
     def add_edge(self, source_node_id: T, target_node_id: T, weight: float = 1.0):
+        if self.compact:
+            self.graph.add_relationship(source_node_id, target_node_id, weight=weight)
+            return
         self.graph.add_edge(source_node_id, target_node_id, weight=weight)
 
     def add_edge_with_relationship(
@@ -20,6 +31,11 @@ class SNOMEDGraphBuilder(AdjacencyListGraph[T]):
         weight: float = 1.0,
         relationship: Optional[str] = None,
     ):
+        if self.compact:
+            self.graph.add_relationship(
+                source_node_id, target_node_id, relationship, weight
+            )
+            return
         self.graph.add_edge(
             source_node_id, target_node_id, weight=weight, relationship=relationship
         )
@@ -33,7 +49,9 @@ class SNOMEDGraphBuilder(AdjacencyListGraph[T]):
             if not self.exists_node(parent_id):
                 self.add_concept(parent_id, [])
 
-            if not self.exists_edge(concept_id, parent_id):
+            if self.compact:
+                self.graph.add_edge(concept_id, parent_id)
+            elif not self.exists_edge(concept_id, parent_id):
                 self.add_edge_with_relationship(
                     concept_id, parent_id, relationship="is_descendant_of"
                 )
@@ -41,6 +59,72 @@ class SNOMEDGraphBuilder(AdjacencyListGraph[T]):
                     parent_id, concept_id, relationship="is_ancestor_of"
                 )
 
+    def add_hierarchy_from(
+        self,
+        concept_ids: Iterable[T],
+        child_ids: Iterable[T],
+        parent_ids: Iterable[T],
+    ):
+        """
+        Bulk version of add_concept: adds all concepts, then every
+        (child, parent) edge in both directions with a single call each.
+        """
+        child_ids = list(child_ids)
+        parent_ids = list(parent_ids)
+
+        self.graph.add_nodes_from(concept_ids)
+        if self.compact:
+            self.graph.add_edges_from(zip(child_ids, parent_ids))
+            return
+
+        self.graph.add_edges_from(
+            zip(child_ids, parent_ids), weight=1.0, relationship="is_descendant_of"
+        )
+        self.graph.add_edges_from(
+            zip(parent_ids, child_ids), weight=1.0, relationship="is_ancestor_of"
+        )
+
+    def remove_edge(self, source_node_id: T, target_node_id: T):
+        """
+        Removes the edge from a concept to one of its parents, in both
+        directions.
+        """
+        for edge in [
+            (source_node_id, target_node_id),
+            (target_node_id, source_node_id),
+        ]:
+            if self.graph.has_edge(*edge):
+                self.graph.remove_edge(*edge)
+
+    def remove_concept(self, concept_id: T):
+        """
+        Removes a concept together with all its edges.
+        """
+        if self.graph.has_node(concept_id):
+            self.graph.remove_node(concept_id)
+
+    def get_parents(self, concept_id: T) -> List[T]:
+        if self.compact:
+            return list(self.graph.successors(concept_id))
+        return [
+            parent_id
+            for _, parent_id, relationship in self.graph.out_edges(
+                concept_id, data="relationship"
+            )
+            if relationship == "is_descendant_of"
+        ]
+
+    def get_children(self, concept_id: T) -> List[T]:
+        if self.compact:
+            return list(self.graph.predecessors(concept_id))
+        return [
+            child_id
+            for child_id, _, relationship in self.graph.in_edges(
+                concept_id, data="relationship"
+            )
+            if relationship == "is_descendant_of"
+        ]
+
     def exists_edge(self, source_node_id: T, target_node_id: T) -> bool:
         return self.graph.has_edge(source_node_id, target_node_id)
 
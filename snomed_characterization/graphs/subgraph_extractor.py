@@ -0,0 +1,49 @@
+from typing import Iterable, List, Optional
+import networkx as nx
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+
+
+class SNOMEDSubgraphExtractor:
+    """
+    Keeps the full SNOMED hierarchy loaded once and extracts, for any cohort,
+    the upward-closed subgraph (seed concepts plus all their ancestors) that
+    ConditionClusterAnalyzer expects as `snomed_graph`.
+
+    Seed concepts that are not part of the hierarchy are skipped.
+    """
+
+    def __init__(self, graph: FrozenGraph, nx_graph: Optional[nx.DiGraph] = None):
+        self.graph = graph
+        self.nx_graph = nx_graph
+
+    @classmethod
+    def from_networkx(cls, nx_graph: nx.DiGraph) -> "SNOMEDSubgraphExtractor":
+        """Extract views of an existing SNOMEDGraphBuilder graph."""
+        return cls(FrozenGraph.from_networkx(nx_graph), nx_graph)
+
+    def get_closure(self, seed_ids: Iterable[int]) -> BitMap:
+        """Seed concepts together with all their ancestors."""
+        return self.graph.get_upward_closure(seed_ids)
+
+    def extract(self, seed_ids: Iterable[int]) -> FrozenGraph:
+        """Upward-closed subgraph as a compact FrozenGraph."""
+        return self.graph.subgraph(self.get_closure(seed_ids))
+
+    def extract_networkx(self, seed_ids: Iterable[int]) -> nx.DiGraph:
+        """
+        Upward-closed subgraph as a networkx graph. When the extractor was built
+        from a networkx graph this is a read-only view on it, without copying.
+        """
+        closure = self.get_closure(seed_ids)
+        if self.nx_graph is not None:
+            return self.nx_graph.subgraph(closure)
+
+        return self.graph.subgraph(closure).to_networkx()
+
+    def extract_for_patients(self, patient_conditions: List[List[int]]) -> nx.DiGraph:
+        """Subgraph for every condition of a cohort, ready for ConditionClusterAnalyzer."""
+        return self.extract_networkx(
+            {code for conditions in patient_conditions for code in conditions}
+        )
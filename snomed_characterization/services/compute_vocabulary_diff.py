@@ -0,0 +1,49 @@
+import duckdb
+
+from snomed_characterization.duckdb.queries import (
+    q_diff_added_concepts,
+    q_diff_added_edges,
+    q_diff_removed_concept_ids,
+    q_diff_removed_edges,
+    q_diff_updated_concepts,
+    sql_string,
+)
+from snomed_characterization.vocabulary_diff import VocabularyDiff
+
+
+class ComputeVocabularyDiff:
+    """
+    Compares the `concept` and `concept_relationship` tables of two
+    vocabulary snapshots inside DuckDB (the old one is attached read-only to
+    the new one) and returns a VocabularyDiff.
+    """
+
+    def __init__(self, old_db_path: str, new_db_path: str):
+        self.old_db_path = old_db_path
+        self.new_db_path = new_db_path
+
+    def call(self) -> VocabularyDiff:
+        duckdb_conn = duckdb.connect(self.new_db_path, read_only=True)
+        duckdb_conn.execute(f"ATTACH {sql_string(self.old_db_path)} AS old (READ_ONLY)")
+
+        added_concepts = duckdb_conn.execute(q_diff_added_concepts).fetchdf()
+        removed = duckdb_conn.execute(q_diff_removed_concept_ids).fetchall()
+        updated_concepts = duckdb_conn.execute(q_diff_updated_concepts).fetchdf()
+        added_edges = duckdb_conn.execute(q_diff_added_edges).fetchall()
+        removed_edges = duckdb_conn.execute(q_diff_removed_edges).fetchall()
+        duckdb_conn.close()
+
+        diff = VocabularyDiff(
+            added_concepts=added_concepts,
+            removed_concept_ids=[concept_id for (concept_id,) in removed],
+            updated_concepts=updated_concepts,
+            added_edges=[tuple(edge) for edge in added_edges],
+            removed_edges=[tuple(edge) for edge in removed_edges],
+        )
+        print(
+            f"Concepts +{len(diff.added_concepts)} -{len(diff.removed_concept_ids)}"
+            f" ~{len(diff.updated_concepts)}, edges +{len(diff.added_edges)}"
+            f" -{len(diff.removed_edges)}"
+        )
+
+        return diff
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import duckdb
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Bump when the pickled graph layout changes, so old entries are never loaded
+CACHE_FORMAT_VERSION = 2
+
+OMOP_HIERARCHY_TABLES = (
+    "concept",
+    "concept_ancestor",
+    "concept_relationship",
+    "condition_occurrence",
+)
+
+
+class GraphBuildCache:
+    """
+    Content-addressed on-disk cache of built graphs.
+
+    Entries are keyed by a fingerprint of the source tables' contents (row
+    count and an order-independent hash of every row, computed by DuckDB),
+    the query text and the backend, so any change in the data or in the
+    loading code misses. Least recently used entries are evicted once the
+    cache grows past `max_bytes` or `max_entries`.
+    """
+
+    suffix = ".pickle"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = 4 * 1024**3,
+        max_entries: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def fingerprint(
+        self,
+        db_path: str,
+        tables: Iterable[str],
+        queries: Iterable[str],
+        backend: str,
+        connection: Optional[duckdb.DuckDBPyConnection] = None,
+    ) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_FORMAT_VERSION}:{backend}".encode())
+        for query in queries:
+            digest.update(query.encode())
+
+        if connection is not None:
+            duckdb_conn = connection.cursor()
+        else:
+            duckdb_conn = duckdb.connect(db_path, read_only=True)
+        try:
+            for table in tables:
+                count, row_hash = duckdb_conn.execute(
+                    f"SELECT count(*), bit_xor(hash(t)) FROM {table} t"
+                ).fetchone()
+                digest.update(f"{table}:{count}:{row_hash}".encode())
+        finally:
+            duckdb_conn.close()
+
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def load(self, key: str) -> Optional[Any]:
+        """Load a cached artifact, None on a miss (or an unreadable entry)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                artifact = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError):
+            os.remove(path)
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(path)
+        return artifact
+
+    def store(self, key: str, artifact: Any):
+        """Write atomically, so readers never see a partial entry."""
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(key, size, last use) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((name[: -len(self.suffix)], stat.st_size, stat.st_mtime))
+
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        entries = self.entries()
+        total_bytes = sum(size for _, size, _ in entries)
+
+        while entries and (
+            (self.max_bytes is not None and total_bytes > self.max_bytes)
+            or (self.max_entries is not None and len(entries) > self.max_entries)
+        ):
+            key, size, _ = entries.pop(0)
+            os.remove(self._path(key))
+            total_bytes -= size
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            os.remove(self._path(key))
@@ -0,0 +1,80 @@
+import numpy as np
+from typing import Any, Dict, List
+from pyroaring import BitMap
+
+from snomed_characterization.duckdb.queries import q_ancestor_closure
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.services.import_duckdb_concepts_base import (
+    ImportDuckDBConceptsBase,
+)
+
+
+class ImportDuckDBConceptAncestorClosure(ImportDuckDBConceptsBase):
+    """
+    Loads ancestor bitmaps and depth tables straight from the precomputed
+    OMOP concept_ancestor closure with one grouped query, for the people's
+    conditions and all their ancestors. No graph traversal is done.
+
+    After call():
+        snomed_graph: BitMapGraph with direct edges (min level 1) and the
+            ancestor closure of every loaded concept
+        ancestor_paths: concept -> {ancestor: min_levels_of_separation}, the
+            shape ConditionClusterAnalyzer(ancestor_paths=...) accepts
+    """
+
+    def __init__(self, db_path, connection=None):
+        super().__init__(db_path, None, connection)
+
+        self.snomed_graph = BitMapGraph()
+        self.ancestor_paths: Dict[int, Dict[int, int]] = {}
+
+    def _cache_queries(self) -> List[str]:
+        return [q_ancestor_closure]
+
+    def _cache_state(self) -> Dict[str, Any]:
+        return {
+            "snomed_graph": self.snomed_graph,
+            "ancestor_paths": self.ancestor_paths,
+        }
+
+    def _restore_cache_state(self, state: Dict[str, Any]):
+        self.snomed_graph = state["snomed_graph"]
+        self.ancestor_paths = state["ancestor_paths"]
+
+    def call(self):
+        closure = self._fetch(q_ancestor_closure, numpy=True)
+
+        child_ids, parent_ids = [], []
+        for concept_id, ancestor_ids, min_levels in zip(
+            closure["concept_id"].tolist(),
+            closure["ancestor_ids"],
+            closure["min_levels"],
+        ):
+            if ancestor_ids is None or np.ma.is_masked(ancestor_ids):
+                ancestor_ids = min_levels = np.empty(0, dtype=np.int64)
+
+            ancestor_ids = np.asarray(ancestor_ids, dtype=np.int64)
+            min_levels = np.asarray(min_levels, dtype=np.int64)
+
+            self.ancestor_paths[concept_id] = dict(
+                zip(ancestor_ids.tolist(), min_levels.tolist())
+            )
+            parents = ancestor_ids[min_levels == 1]
+            child_ids.append(np.full(len(parents), concept_id, dtype=np.int64))
+            parent_ids.append(parents)
+
+        concept_ids = closure["concept_id"]
+        self.snomed_graph.add_hierarchy_from(
+            concept_ids,
+            np.concatenate(child_ids) if child_ids else np.empty(0, dtype=np.int64),
+            np.concatenate(parent_ids) if parent_ids else np.empty(0, dtype=np.int64),
+        )
+        for concept_id, ancestors in self.ancestor_paths.items():
+            self.snomed_graph.set_ancestor_closure(
+                concept_id, BitMap(list(ancestors.keys()))
+            )
+
+        print(f"Total concepts in graph: {len(self.snomed_graph.nodes)}")
+        print("Finished loading ancestor closure")
+
+        return self.ancestor_paths
@@ -1,41 +1,180 @@
 import duckdb
-from typing import Union, Optional
-from pandas import DataFrame
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from snomed_characterization.graphs.snomed_complete_graph_builder import (
-    SNOMEDCompleteGraphBuilder,
+from snomed_characterization.duckdb.queries import (
+    get_q_concepts,
+    q_concepts_by_id,
+    q_hierarchy_edges,
+    q_people_concepts,
 )
-from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.graph_build_cache import (
+    GraphBuildCache,
+    OMOP_HIERARCHY_TABLES,
+)
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
-from snomed_characterization.duckdb.queries import q_concepts, q_people_concepts
+    from snomed_characterization.graphs.snomed_complete_graph_builder import (
+        SNOMEDCompleteGraphBuilder,
+    )
+    from snomed_characterization.graphs.snomed_graph_builder import (
+        SNOMEDGraphBuilder,
+    )
 
 
 class ImportDuckDBConceptsBase:
+    """
+    @connection: duckdb.DuckDBPyConnection
+    optional connection shared between importers; every load runs on its own
+    cursor of it, so loads can run in parallel threads. Without it each load
+    opens (and closes) a read-only connection to db_path.
+    """
+
+    # concept columns fetched besides level_1_ancestors, None for all
+    concept_columns: Optional[Sequence[str]] = ("concept_id",)
+    # restrict concepts in SQL to the people's conditions and their ancestors
+    people_concepts_only = True
+
     def __init__(
         self,
         db_path,
-        snomed_graph: Optional[Union[SNOMEDCompleteGraphBuilder, SNOMEDGraphBuilder]],
+        snomed_graph: Optional[
+            Union["SNOMEDCompleteGraphBuilder", "SNOMEDGraphBuilder"]
+        ],
+        connection: Optional[duckdb.DuckDBPyConnection] = None,
     ):
         self.db_path = db_path
         self.snomed_graph = snomed_graph
+        self.connection = connection
+
+    @contextmanager
+    def _connect(self):
+        if self.connection is not None:
+            duckdb_conn = self.connection.cursor()
+        else:
+            duckdb_conn = duckdb.connect(self.db_path, read_only=True)
+
+        try:
+            yield duckdb_conn
+        finally:
+            duckdb_conn.close()
+
+    def _fetch(self, query: str, numpy=False):
+        with self._connect() as duckdb_conn:
+            result = duckdb_conn.execute(query)
+            return result.fetchnumpy() if numpy else result.fetchdf()
+
+    def _fetch_concurrently(self, *queries: str, numpy=False):
+        """Run independent queries in parallel, each on its own connection."""
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            return list(executor.map(lambda q: self._fetch(q, numpy), queries))
+
+    def _load_concepts_to_df(self) -> "DataFrame":
+        return self._fetch(
+            get_q_concepts(self.concept_columns, self.people_concepts_only)
+        )
+
+    def _load_people_concepts_to_df(self) -> "DataFrame":
+        return self._fetch(q_people_concepts)
 
-    def _load_concepts_to_df(self) -> DataFrame:
-        data = None
-        duckdb_conn = duckdb.connect(self.db_path, read_only=True)
+    def _load_people_and_concepts(self) -> Tuple["DataFrame", "DataFrame"]:
+        """Load the people's concepts and the concepts table concurrently."""
+        people_concepts_df, concepts_df = self._fetch_concurrently(
+            q_people_concepts,
+            get_q_concepts(self.concept_columns, self.people_concepts_only),
+        )
+        return people_concepts_df, concepts_df
 
-        data = duckdb_conn.execute(q_concepts).fetchdf()
-        duckdb_conn.close()
+    def _load_reachable_hierarchy(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Load the (child, parent) edge arrays and the people's concepts as numpy
+        columns, and keep only what is reachable upwards from those concepts.
 
-        return data
+        Returns (concept_ids, child_ids, parent_ids).
+        """
+        edges, seeds = self._fetch_concurrently(
+            q_hierarchy_edges, q_people_concepts, numpy=True
+        )
 
-    def _load_people_concepts_to_df(self) -> DataFrame:
-        data = None
-        duckdb_conn = duckdb.connect(self.db_path, read_only=True)
+        return self._get_reachable_edges(
+            np.asarray(seeds["condition_concept_id"], dtype=np.int64),
+            np.asarray(edges["concept_id"], dtype=np.int64),
+            np.asarray(edges["parent_concept_id"], dtype=np.int64),
+        )
 
-        data = duckdb_conn.execute(q_people_concepts).fetchdf()
-        duckdb_conn.close()
+    @staticmethod
+    def _get_reachable_edges(
+        seed_ids: np.ndarray, child_ids: np.ndarray, parent_ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Upward closure of the seeds by vectorized frontier joins: each round
+        joins the new frontier against the child column, so every concept is
+        expanded exactly once.
+        """
+        reached = np.unique(seed_ids)
+        frontier = reached
+        while len(frontier):
+            parents = np.unique(parent_ids[np.isin(child_ids, frontier)])
+            frontier = np.setdiff1d(parents, reached, assume_unique=True)
+            reached = np.union1d(reached, frontier)
 
-        return data
+        edge_mask = np.isin(child_ids, reached)
+
+        return reached, child_ids[edge_mask], parent_ids[edge_mask]
+
+    def _cache_queries(self) -> List[str]:
+        """Every query call and call_bulk run, for the cache key."""
+        return [
+            get_q_concepts(self.concept_columns, self.people_concepts_only),
+            q_people_concepts,
+            q_hierarchy_edges,
+            q_concepts_by_id,
+        ]
+
+    def _cache_state(self) -> Dict[str, Any]:
+        """What call_cached stores after a build, by attribute name."""
+        return {"snomed_graph": self.snomed_graph}
+
+    def _restore_cache_state(self, state: Dict[str, Any]):
+        self.snomed_graph = state["snomed_graph"]
+
+    def call_cached(self, cache: GraphBuildCache, bulk=False):
+        """
+        Run call (or call_bulk) only when the cache has no state built from
+        the same tables and queries; otherwise restore the cached state
+        (see _cache_state). Returns self.snomed_graph.
+        """
+        backend = f"{type(self).__name__}.{'call_bulk' if bulk else 'call'}"
+        # Compact and bi-directed builders store different graphs
+        backend += f".compact={getattr(self.snomed_graph, 'compact', False)}"
+        key = cache.fingerprint(
+            self.db_path,
+            OMOP_HIERARCHY_TABLES,
+            self._cache_queries(),
+            backend,
+            self.connection,
+        )
+
+        cached = cache.load(key)
+        if cached is not None:
+            self._restore_cache_state(cached)
+            print(f"Loaded graph from cache ({key[:12]})")
+            return self.snomed_graph
+
+        if bulk:
+            self.call_bulk()
+        else:
+            self.call()
+        cache.store(key, self._cache_state())
+
+        return self.snomed_graph
 
     def call(self):
         raise NotImplementedError("Method not implemented")
+
+    def call_bulk(self):
+        raise NotImplementedError("Method not implemented")
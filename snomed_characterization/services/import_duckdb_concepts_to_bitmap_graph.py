@@ -9,25 +9,28 @@ from snomed_characterization.graphs.bitmap_graph import BitMapGraph
 
 
 class ImportDuckDBConceptsToBitMapGraph(ImportDuckDBConceptsBase):
-    def __init__(self, db_path):
-        super().__init__(db_path, None)
+    def __init__(self, db_path, connection=None):
+        super().__init__(db_path, None, connection)
 
         self.snomed_graph = BitMapGraph()
 
     def call(self):
         """Import concepts and build graph using BitMap for efficient storage."""
         missing_concepts = BitMap()
+        processed_concepts = BitMap()
 
-        # Load initial concept IDs
-        people_concepts_df = self._load_people_concepts_to_df()
+        # Load initial concept IDs and the concepts with their ancestors
+        people_concepts_df, concepts_df = self._load_people_and_concepts()
         initial_concepts = BitMap(people_concepts_df["condition_concept_id"].unique())
         queue = deque(initial_concepts)
-
-        # Load all concepts with their ancestors
-        concepts_df = self._load_concepts_to_df().set_index("concept_id")
+        concepts_df = concepts_df.set_index("concept_id")
 
         while queue:
             concept_id = queue.popleft()
+            if concept_id in processed_concepts:
+                continue
+            processed_concepts.add(concept_id)
+
             try:
                 concept_row = concepts_df.loc[concept_id]
                 ancestors = concept_row["level_1_ancestors"]
@@ -38,7 +41,7 @@ class ImportDuckDBConceptsToBitMapGraph(ImportDuckDBConceptsBase):
                 self.snomed_graph.add_concept(concept_id, ancestor_ids)
 
                 # Add new ancestors to queue (ones we haven't processed yet)
-                new_ancestors = ancestor_ids - self.snomed_graph.nodes
+                new_ancestors = ancestor_ids - processed_concepts
                 queue.extend(new_ancestors)
 
             except KeyError:
@@ -51,6 +54,20 @@ class ImportDuckDBConceptsToBitMapGraph(ImportDuckDBConceptsBase):
 
         return concepts_df
 
+    def call_bulk(self):
+        """
+        Build the same graph as call from vectorized edge arrays: the reachable
+        hierarchy is computed with numpy and grouped into BitMaps in one pass.
+        """
+        concept_ids, child_ids, parent_ids = self._load_reachable_hierarchy()
+
+        self.snomed_graph.add_hierarchy_from(concept_ids, child_ids, parent_ids)
+
+        print(f"Total concepts in graph: {len(self.snomed_graph.nodes)}")
+        print("Finished creating graph")
+
+        return concept_ids
+
     def get_concept_ancestors(self, concept_id: int) -> BitMap:
         """Get all ancestors for a given concept."""
         return self.snomed_graph.get_all_ancestors(concept_id)
@@ -71,3 +88,9 @@ class ImportDuckDBConceptsToBitMapGraph(ImportDuckDBConceptsBase):
         for concept_id in concept_ids[1:]:
             common &= self.snomed_graph.get_all_ancestors(concept_id)
         return common
+
+    def get_lowest_common_ancestors(self, concept_ids: list[int]) -> BitMap:
+        """Get the lowest common ancestors (LCS) for a list of concepts."""
+        return self.snomed_graph.prune_dominated_ancestors(
+            self.get_common_ancestors(concept_ids)
+        )
@@ -0,0 +1,40 @@
+import numpy as np
+from typing import List
+
+from snomed_characterization.duckdb.queries import get_q_concepts
+
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.services.import_duckdb_concepts_base import (
+    ImportDuckDBConceptsBase,
+)
+
+
+class ImportDuckDBConceptsToFrozenGraph(ImportDuckDBConceptsBase):
+    """
+    Imports the full Condition hierarchy, not only the concepts reachable from
+    the people in the database, so cohorts can be cut from it later with
+    SNOMEDSubgraphExtractor.
+    """
+
+    people_concepts_only = False
+
+    def __init__(self, db_path, connection=None):
+        super().__init__(db_path, None, connection)
+
+    def _cache_queries(self) -> List[str]:
+        return [get_q_concepts(self.concept_columns, self.people_concepts_only)]
+
+    def call(self):
+        concepts_df = self._load_concepts_to_df().set_index("concept_id")
+
+        parents = concepts_df["level_1_ancestors"].explode().dropna()
+        self.snomed_graph = FrozenGraph.from_edges(
+            parents.index.to_numpy(dtype=np.int64),
+            parents.to_numpy(dtype=np.int64),
+            concepts_df.index.to_numpy(dtype=np.int64),
+        )
+
+        print(f"Total concepts in graph: {len(self.snomed_graph)}")
+        print("Finished creating graph")
+
+        return concepts_df
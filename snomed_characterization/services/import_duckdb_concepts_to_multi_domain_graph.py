@@ -0,0 +1,54 @@
+from typing import Sequence
+
+from snomed_characterization.duckdb.queries import (
+    get_q_domain_concepts,
+    get_q_domain_hierarchy_edges,
+)
+from snomed_characterization.graphs.multi_domain_graph import MultiDomainGraph
+from snomed_characterization.services.import_duckdb_concepts_base import (
+    ImportDuckDBConceptsBase,
+)
+
+DEFAULT_DOMAIN_IDS = ("Condition", "Drug", "Procedure", "Measurement")
+
+
+class ImportDuckDBConceptsToMultiDomainGraph(ImportDuckDBConceptsBase):
+    """
+    Imports the full hierarchies of several domains in a single pass (one
+    concept query and one edge query, run concurrently) into a
+    MultiDomainGraph.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        domain_ids: Sequence[str] = DEFAULT_DOMAIN_IDS,
+        connection=None,
+    ):
+        super().__init__(db_path, None, connection)
+
+        self.domain_ids = tuple(domain_ids)
+        self.snomed_graph = MultiDomainGraph()
+
+    def _cache_queries(self):
+        return [
+            get_q_domain_concepts(self.domain_ids),
+            get_q_domain_hierarchy_edges(self.domain_ids),
+        ]
+
+    def call(self):
+        concepts, edges = self._fetch_concurrently(*self._cache_queries(), numpy=True)
+
+        self.snomed_graph.add_hierarchy_from(
+            concepts["concept_id"], edges["concept_id"], edges["parent_concept_id"]
+        )
+        self.snomed_graph.add_memberships(
+            concepts["concept_id"], concepts["domain_id"], concepts["vocabulary_id"]
+        )
+
+        for domain_id in self.domain_ids:
+            members = self.snomed_graph.domains.get(domain_id, ())
+            print(f"{domain_id}: {len(members)} concepts")
+        print("Finished creating graph")
+
+        return self.snomed_graph
@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
-from pandas import DataFrame
 from collections import deque
+from typing import Any, Dict
+
+from snomed_characterization.duckdb.queries import q_concepts_by_id
 
 from snomed_characterization.graphs.snomed_complete_graph_builder import (
     SNOMEDCompleteGraphBuilder,
@@ -15,61 +18,105 @@ from snomed_characterization.services.import_duckdb_concepts_base import (
 
 
 class ImportDuckDBConceptsToCompleteSNOMEDGraph(ImportDuckDBConceptsBase):
-    def _get_raw_ancestors_from_df(self, df: DataFrame, columns, ancestor_ids):
-        result = []
-        for ancestor_id in ancestor_ids:
-            try:
-                ancestor_row = df.loc[ancestor_id]
-                concept_dict = {
-                    **ancestor_row[columns].to_dict(),
-                    "concept_id": ancestor_id,
-                }
-                raw_ancestor = RawSNOMEDConcept(**concept_dict)
-                result.append(raw_ancestor)
-            except KeyError:
-                # print(f"Missing ancestor {ancestor_id}")
-                continue
+    concept_columns = tuple(RawSNOMEDConcept.__annotations__.keys())
 
-        return result
+    def _restore_cache_state(self, state: Dict[str, Any]):
+        # Fill the caller's builder in place
+        cached = state["snomed_graph"]
+        self.snomed_graph.graph = cached.graph
+        self.snomed_graph.concepts = cached.concepts
 
     def call(self):
+        """
+        Walk up from the people's concepts, collecting ids and edges only;
+        the reached concepts' attributes are then stored in one columnar
+        append, without building a RawSNOMEDConcept per parent occurrence.
+        Reached concepts without level 1 ancestors (roots) are looked up by
+        id, so the graph matches call_bulk.
+        """
         self.snomed_graph: SNOMEDCompleteGraphBuilder
 
         missing_concepts = set()
-        people_concepts_df = self._load_people_concepts_to_df()
+        processed_concepts = set()
+        child_ids, parent_ids = [], []
+        people_concepts_df, concepts_df = self._load_people_and_concepts()
         queue = deque(people_concepts_df["condition_concept_id"].unique())
-
-        concepts_df = self._load_concepts_to_df().set_index("concept_id")
-
-        needed_columns = list(RawSNOMEDConcept.__annotations__.keys())
-        needed_columns.remove("concept_id")
+        concepts_df = concepts_df.set_index("concept_id")
 
         while queue:
             concept_id = queue.popleft()
+            if concept_id in processed_concepts:
+                continue
+            processed_concepts.add(concept_id)
 
             try:
                 concept_row = concepts_df.loc[concept_id]
-                concept_dict = {
-                    **concept_row[needed_columns].to_dict(),
-                    "concept_id": concept_id,
-                }
-
-                raw_concept = RawSNOMEDConcept(**concept_dict)
             except KeyError:
                 missing_concepts.add(concept_id)
                 continue
 
             ancestors = concept_row["level_1_ancestors"]
             ancestors = [int(ancestor) for ancestor in ancestors]
-            raw_ancestors = self._get_raw_ancestors_from_df(
-                concepts_df, needed_columns, ancestors
-            )
 
-            self.snomed_graph.add_concept(raw_concept, raw_ancestors)
+            child_ids.extend([int(concept_id)] * len(ancestors))
+            parent_ids.extend(ancestors)
             queue.extend(ancestors)
 
+        reached = concepts_df.index.isin(list(processed_concepts - missing_concepts))
+        reached_df = pd.concat(
+            [
+                concepts_df[reached].reset_index(),
+                self._load_concepts_by_id(list(missing_concepts)),
+            ],
+            ignore_index=True,
+        )
+
+        # Parents without a concept row are left out, with their edges
+        known = set(reached_df["concept_id"].tolist())
+        edges = [
+            (child_id, parent_id)
+            for child_id, parent_id in zip(child_ids, parent_ids)
+            if parent_id in known
+        ]
+        self.snomed_graph.add_hierarchy_from(
+            reached_df,
+            [child_id for child_id, _ in edges],
+            [parent_id for _, parent_id in edges],
+        )
+
         return concepts_df
 
+    def _load_concepts_by_id(self, concept_ids) -> pd.DataFrame:
+        with self._connect() as duckdb_conn:
+            duckdb_conn.register(
+                "requested_concepts",
+                pd.DataFrame({"concept_id": np.asarray(concept_ids, dtype=np.int64)}),
+            )
+            return duckdb_conn.execute(q_concepts_by_id).fetchdf()
+
+    def call_bulk(self):
+        """
+        Build the complete graph from vectorized edge arrays. Attributes are
+        fetched once per reachable concept straight into the columnar concept
+        store; concepts without a `concept` row are left out, as in call.
+        """
+        self.snomed_graph: SNOMEDCompleteGraphBuilder
+        concept_ids, child_ids, parent_ids = self._load_reachable_hierarchy()
+
+        concepts_df = self._load_concepts_by_id(concept_ids)
+
+        known = np.isin(child_ids, concepts_df["concept_id"]) & np.isin(
+            parent_ids, concepts_df["concept_id"]
+        )
+        self.snomed_graph.add_hierarchy_from(
+            concepts_df, child_ids[known].tolist(), parent_ids[known].tolist()
+        )
+
+        print(f"Total concepts in graph: {len(concepts_df)}")
+        print("Finished creating graph")
+
+        return concepts_df.set_index("concept_id")
+
     # XXX: deprecated since we just want the conditions related to the people in the sample db
     def call_deprecated(self):
         # process to import the concepts from DuckDB to SNOMED Graph
@@ -87,8 +134,8 @@ class ImportDuckDBConceptsToCompleteSNOMEDGraph(ImportDuckDBConceptsBase):
 
         # Build edges list first
         edges_to_add = []
-        for _, node_data in graph.nodes(data=True):
-            concept = node_data["data"]
+        for node_id in graph.nodes:
+            concept = self.snomed_graph.get_concept(node_id)
             if not pd.isna(concept.ancestor_concept_id):
                 edges_to_add.append((concept.ancestor_concept_id, concept.concept_id))
 
@@ -1,21 +1,29 @@
 import pandas as pd
 from collections import deque
+from typing import Any, Dict
 
 from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
 from .import_duckdb_concepts_base import ImportDuckDBConceptsBase
 
 
 class ImportDuckDBConceptsToSNOMEDGraph(ImportDuckDBConceptsBase):
+    def _restore_cache_state(self, state: Dict[str, Any]):
+        # Fill the caller's builder in place
+        self.snomed_graph.graph = state["snomed_graph"].graph
+
     def call(self):
         self.snomed_graph: SNOMEDGraphBuilder
         missing_concepts = set()
-        people_concepts_df = self._load_people_concepts_to_df()
+        processed_concepts = set()
+        people_concepts_df, concepts_df = self._load_people_and_concepts()
         queue = deque(people_concepts_df["condition_concept_id"].unique())
-
-        concepts_df = self._load_concepts_to_df().set_index("concept_id")
+        concepts_df = concepts_df.set_index("concept_id")
 
         while queue:
             concept_id = queue.popleft()
+            if concept_id in processed_concepts:
+                continue
+            processed_concepts.add(concept_id)
 
             # get ancestors
             try:
@@ -36,6 +44,23 @@ class ImportDuckDBConceptsToSNOMEDGraph(ImportDuckDBConceptsBase):
 
         return concepts_df
 
+    def call_bulk(self):
+        """
+        Build the same graph as call from vectorized edge arrays: the reachable
+        hierarchy is computed with numpy and added with one bulk call.
+        """
+        self.snomed_graph: SNOMEDGraphBuilder
+        concept_ids, child_ids, parent_ids = self._load_reachable_hierarchy()
+
+        self.snomed_graph.add_hierarchy_from(
+            concept_ids.tolist(), child_ids.tolist(), parent_ids.tolist()
+        )
+
+        print(f"Total concepts in graph: {len(concept_ids)}")
+        print("Finished creating graph")
+
+        return concept_ids
+
     # XXX: deprecated since we just want the conditions related to the people in the sample db
     def call_deprecated(self):
         concepts_df = self._load_concepts_to_df()
@@ -1,118 +1,388 @@
-from neo4j import GraphDatabase
-from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
-    ImportDuckDBConceptsToCompleteSNOMEDGraph,
-)
-from snomed_characterization.graphs.snomed_complete_graph_builder import (
-    SNOMEDCompleteGraphBuilder,
-)
+import asyncio
+import csv
+import dataclasses
+import gzip
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+from snomed_characterization.snomed_concept import RawSNOMEDConcept
+
+NODE_PROPERTIES = [
+    name for name in RawSNOMEDConcept.__annotations__ if name != "concept_id"
+]
+
+# neo4j-admin reads untyped CSV columns as strings
+ADMIN_IMPORT_PROPERTY_TYPES = {"valid_start_date": "date", "valid_end_date": "date"}
+
+CONSTRAINTS = [
+    "CREATE CONSTRAINT concept_id IF NOT EXISTS FOR (n:SNOMEDConcept) REQUIRE n.concept_id IS UNIQUE",
+    "CREATE INDEX concept_code IF NOT EXISTS FOR (n:SNOMEDConcept) ON (n.concept_code)",
+]
+
+q_merge_nodes = """
+    UNWIND $rows AS row
+    MERGE (n:SNOMEDConcept {concept_id: row.concept_id})
+    ON CREATE SET n += row.properties
+    """
+
+
+def get_q_merge_relationships(relationship_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (source:SNOMEDConcept {{concept_id: row.source_id}})
+    MATCH (target:SNOMEDConcept {{concept_id: row.target_id}})
+    MERGE (source)-[r:{relationship_type}]->(target)
+    ON CREATE SET r += row.properties
+    """
+
+
+class ChunkedCsvWriter:
+    """
+    Writes header-less CSV rows into numbered files of at most `chunk_size`
+    rows (optionally gzip-compressed) next to a separate header file, the
+    layout `neo4j-admin database import` expects.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str,
+        header: List[str],
+        chunk_size: int,
+        compress: bool,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.header_path = os.path.join(directory, f"{prefix}-header.csv")
+        self.paths: List[str] = []
+        self._file = None
+        self._writer = None
+        self._rows_in_chunk = 0
+
+        with open(self.header_path, "w", newline="") as file:
+            csv.writer(file).writerow(header)
+
+    def _open_next(self):
+        self.close()
+        suffix = ".csv.gz" if self.compress else ".csv"
+        path = os.path.join(
+            self.directory, f"{self.prefix}-{len(self.paths) + 1:05d}{suffix}"
+        )
+        opener = gzip.open if self.compress else open
+        self._file = opener(path, "wt", newline="")
+        self._writer = csv.writer(self._file)
+        self._rows_in_chunk = 0
+        self.paths.append(path)
+
+    def writerow(self, row: list):
+        if self._file is None or self._rows_in_chunk >= self.chunk_size:
+            self._open_next()
+        self._writer.writerow(["" if value is None else value for value in row])
+        self._rows_in_chunk += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def argument(self) -> str:
+        """Comma separated header + data files, as neo4j-admin takes them."""
+        return ",".join([self.header_path, *self.paths])
+
+
+def admin_import_date(value) -> str:
+    """Format a date property as the YYYY-MM-DD neo4j-admin's `:date` expects."""
+    # NaT and NaN are the only values that differ from themselves
+    if value is None or value == "" or value != value:
+        return ""
+    if isinstance(value, str):
+        return value[:10]
+    if hasattr(value, "date"):
+        value = value.date()
+    return value.isoformat()
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
 
 
 class ImportNXGraphIntoNeo4J:
-    def __init__(self, uri: str, db_path: str, user: str, password: str):
+    """
+    Writes a SNOMED graph into Neo4j in UNWIND batches of `batch_size` rows,
+    each batch committed in its own transaction. Relationships are grouped by
+    type, since the type cannot be a query parameter. `driver` may be given
+    instead of uri/user/password (e.g. a stub in tests).
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        db_path: str,
+        user: str,
+        password: str,
+        batch_size: int = 10_000,
+        driver=None,
+    ):
         self.uri = uri
         self.user = user
         self.password = password
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.driver = driver
+
+    def build_graph(self):
+        """Build the complete SNOMED graph from the concepts in DuckDB."""
+        from snomed_characterization.graphs.snomed_complete_graph_builder import (
+            SNOMEDCompleteGraphBuilder,
+        )
+        from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
+            ImportDuckDBConceptsToCompleteSNOMEDGraph,
+        )
 
-    def call(self):
-        """Execute the import process from NetworkX to Neo4j."""
-        # Process to import the concepts from DuckDB to SNOMED Graph
         snomed = SNOMEDCompleteGraphBuilder()
         ImportDuckDBConceptsToCompleteSNOMEDGraph(self.db_path, snomed).call()
-        nx_graph = snomed.graph
+        return snomed
 
-        with GraphDatabase.driver(self.uri, auth=(self.user, self.password)) as driver:
-            with driver.session() as session:
-                # Create constraints and indexes first
-                self._create_constraints(session)
-                # Import the graph
-                session.write_transaction(self._create_neo4j_graph, nx_graph)
+    def call(self):
+        """Execute the import process from NetworkX to Neo4j."""
+        snomed = self.build_graph()
+
+        self.write_graph(snomed.graph, snomed.concepts)
 
         print("Graph successfully loaded into Neo4j")
 
-    def _create_constraints(self, session):
-        """Create necessary constraints and indexes in Neo4j."""
-        constraints = [
-            "CREATE CONSTRAINT concept_id IF NOT EXISTS FOR (n:SNOMEDConcept) REQUIRE n.concept_id IS UNIQUE",
-            "CREATE INDEX concept_code IF NOT EXISTS FOR (n:SNOMEDConcept) ON (n.concept_code)",
-        ]
+    def write_graph(self, graph, concepts=None) -> Dict[str, int]:
+        """Write nodes, then relationships; returns rows written per kind."""
+        if self.driver is not None:
+            return self._write_graph(self.driver, graph, concepts)
 
-        for constraint in constraints:
-            session.run(constraint)
+        from neo4j import GraphDatabase
 
-    def _create_neo4j_graph(self, tx, graph):
-        """
-        Creates nodes and relationships in Neo4j from a NetworkX graph.
+        with GraphDatabase.driver(self.uri, auth=(self.user, self.password)) as driver:
+            return self._write_graph(driver, graph, concepts)
+
+    def _write_graph(self, driver, graph, concepts) -> Dict[str, int]:
+        written = {}
+        with driver.session() as session:
+            # Create constraints and indexes first
+            self._create_constraints(session)
+
+            written["nodes"] = self._write_batches(
+                session, "nodes", q_merge_nodes, self._node_rows(graph, concepts)
+            )
+            for relationship_type, rows in self._relationship_batches(graph):
+                written[relationship_type] = written.get(
+                    relationship_type, 0
+                ) + self._write_batches(
+                    session,
+                    relationship_type,
+                    get_q_merge_relationships(relationship_type),
+                    rows,
+                )
 
-        Args:
-            tx: Neo4j transaction object
-            graph: NetworkX graph object
+        return written
+
+    def write_graph_async(
+        self, graph, concepts=None, concurrency: int = 4
+    ) -> Dict[str, int]:
+        """Write the graph over `concurrency` async sessions (see AsyncNeo4jWriter)."""
+        return asyncio.run(self._write_graph_async(graph, concepts, concurrency))
+
+    async def _write_graph_async(self, graph, concepts, concurrency):
+        from snomed_characterization.services.async_neo4j_writer import (
+            AsyncNeo4jWriter,
+        )
+
+        if self.driver is not None:
+            writer = AsyncNeo4jWriter(self.driver, self.batch_size, concurrency)
+            return await writer.write_graph(graph, concepts)
+
+        from neo4j import AsyncGraphDatabase
+
+        async with AsyncGraphDatabase.driver(
+            self.uri, auth=(self.user, self.password)
+        ) as driver:
+            writer = AsyncNeo4jWriter(driver, self.batch_size, concurrency)
+            return await writer.write_graph(graph, concepts)
+
+    def call_export(self, directory: str, chunk_size=1_000_000, compress=True):
+        """Build the complete graph from DuckDB and export it for neo4j-admin."""
+        snomed = self.build_graph()
+
+        return self.export_admin_import(
+            snomed.graph, directory, snomed.concepts, chunk_size, compress
+        )
+
+    def export_admin_import(
+        self,
+        graph,
+        directory: str,
+        concepts=None,
+        chunk_size: int = 1_000_000,
+        compress: bool = True,
+    ) -> Dict[str, ChunkedCsvWriter]:
         """
-        # Create nodes first
-        self._create_nodes(tx, graph)
-        # Then create relationships
-        self._create_relationships(tx, graph)
-
-    def _create_nodes(self, tx, graph):
-        """Create SNOMED CT concept nodes in Neo4j."""
-        query = """
-        MERGE (n:SNOMEDConcept {concept_id: $concept_id})
-        ON CREATE SET 
-            n.concept_name = $concept_name,
-            n.domain_id = $domain_id,
-            n.vocabulary_id = $vocabulary_id,
-            n.concept_class_id = $concept_class_id,
-            n.standard_concept = $standard_concept,
-            n.concept_code = $concept_code,
-            n.valid_start_date = $valid_start_date,
-            n.valid_end_date = $valid_end_date,
-            n.invalid_reason = $invalid_reason
+        Stream nodes and relationships into header + chunked CSV files for
+        `neo4j-admin database import full`. Nodes are written sorted by
+        concept_id and relationships sorted by (source, target), one file set
+        per relationship type; only the array of node ids is held in memory
+        besides the graph itself.
         """
-        for node_id, node_data in graph.nodes(data=True):
+        os.makedirs(directory, exist_ok=True)
+        node_ids = np.sort(np.fromiter(graph.nodes, dtype=np.int64))
+
+        nodes = ChunkedCsvWriter(
+            directory,
+            "nodes",
+            [
+                "concept_id:ID(SNOMEDConcept)",
+                *(
+                    (
+                        f"{name}:{ADMIN_IMPORT_PROPERTY_TYPES[name]}"
+                        if name in ADMIN_IMPORT_PROPERTY_TYPES
+                        else name
+                    )
+                    for name in NODE_PROPERTIES
+                ),
+                ":LABEL",
+            ],
+            chunk_size,
+            compress,
+        )
+        for node_id in node_ids.tolist():
+            properties = self.node_properties(node_id, graph.nodes[node_id], concepts)
+            for name in ADMIN_IMPORT_PROPERTY_TYPES:
+                properties[name] = admin_import_date(properties[name])
+            nodes.writerow(
+                [node_id, *(properties[name] for name in NODE_PROPERTIES)]
+                + ["SNOMEDConcept"]
+            )
+        nodes.close()
+
+        writers = {"nodes": nodes}
+        for node_id in node_ids.tolist():
+            for target in sorted(graph.successors(node_id)):
+                relationship_type, row = self.relationship_row(
+                    node_id, target, graph.edges[node_id, target]
+                )
+                writer = writers.get(relationship_type)
+                if writer is None:
+                    writer = writers[relationship_type] = ChunkedCsvWriter(
+                        directory,
+                        f"relationships-{relationship_type.lower()}",
+                        [
+                            ":START_ID(SNOMEDConcept)",
+                            ":END_ID(SNOMEDConcept)",
+                            "weight:double",
+                            ":TYPE",
+                        ],
+                        chunk_size,
+                        compress,
+                    )
+                writer.writerow(
+                    [
+                        row["source_id"],
+                        row["target_id"],
+                        row["properties"].get("weight", 1.0),
+                        relationship_type,
+                    ]
+                )
+        for writer in writers.values():
+            writer.close()
+
+        relationship_arguments = " ".join(
+            f"--relationships={writer.argument()}"
+            for name, writer in writers.items()
+            if name != "nodes"
+        )
+        # Integer ids, so concept_id matches the MERGE / MATCH of the other writers
+        print(
+            "neo4j-admin database import full --id-type=INTEGER"
+            f" --nodes={nodes.argument()} {relationship_arguments}"
+        )
+
+        return writers
+
+    def _create_constraints(self, session):
+        """Create necessary constraints and indexes in Neo4j."""
+        for constraint in CONSTRAINTS:
+            session.run(constraint)
+
+    @staticmethod
+    def _write_batch(tx, query: str, rows: List[dict]):
+        tx.run(query, rows=rows).consume()
+
+    def _write_batches(self, session, kind: str, query: str, rows) -> int:
+        """Commit rows chunk by chunk, reporting progress and throughput."""
+        started = time.perf_counter()
+        written = 0
+        for chunk in chunked(rows, self.batch_size):
+            session.execute_write(self._write_batch, query, chunk)
+            written += len(chunk)
+            self._report(kind, written, started)
+
+        return written
+
+    def _report(self, kind: str, written: int, started: float):
+        elapsed = time.perf_counter() - started
+        rate = written / elapsed if elapsed > 0 else float("inf")
+        print(f"{kind}: {written} written ({rate:,.0f} rows/s)")
+
+    @staticmethod
+    def node_properties(node_id, node_data, concepts=None) -> dict:
+        if concepts is not None and node_id in concepts:
+            node_data = concepts.get(node_id)
+        else:
             node_data = node_data.get("data", {})
-            if hasattr(node_data, "__dict__"):
-                node_data = node_data.__dict__
-            properties = {
-                "concept_id": node_id,  # Use node_id as concept_id
-                "concept_name": node_data.get("concept_name", ""),
-                "domain_id": node_data.get("domain_id", ""),
-                "vocabulary_id": node_data.get("vocabulary_id", ""),
-                "concept_class_id": node_data.get("concept_class_id", ""),
-                "standard_concept": node_data.get("standard_concept", ""),
-                "concept_code": node_data.get("concept_code", ""),
-                "valid_start_date": node_data.get("valid_start_date", ""),
-                "valid_end_date": node_data.get("valid_end_date", ""),
-                "invalid_reason": node_data.get("invalid_reason", ""),
+        if dataclasses.is_dataclass(node_data):
+            node_data = dataclasses.asdict(node_data)
+
+        return {name: node_data.get(name, "") for name in NODE_PROPERTIES}
+
+    def _node_rows(self, graph, concepts=None) -> Iterator[dict]:
+        for node_id, node_data in graph.nodes(data=True):
+            yield {
+                "concept_id": node_id,
+                "properties": self.node_properties(node_id, node_data, concepts),
             }
-            tx.run(query, **properties)
-
-    def _relationship_query(self, relationship_type: str):
-        return f"""
-            MATCH (source:SNOMEDConcept {{concept_id: $source_id}}),
-                  (target:SNOMEDConcept {{concept_id: $target_id}})
-            MERGE (source)-[r:{relationship_type}]->(target)
-            ON CREATE SET r += $properties
-        """
 
-    def _create_relationships(self, tx, graph):
-        """Create relationships between SNOMED CT concepts in Neo4j."""
+    @staticmethod
+    def relationship_row(source, target, edge_data) -> Tuple[str, dict]:
+        relationship_type = edge_data.get("relationship", "is_ancestor_of").upper()
+        properties = dict(edge_data)
+        properties.pop("relationship", None)
+
+        return relationship_type, {
+            "source_id": source,
+            "target_id": target,
+            "properties": properties,
+        }
+
+    def _relationship_batches(self, graph) -> Iterator[Tuple[str, List[dict]]]:
+        """
+        Group edges by relationship type in one pass, yielding a type's
+        buffer whenever it holds a full batch.
+        """
+        buffers: Dict[str, List[dict]] = {}
         for source, target, edge_data in graph.edges(data=True):
-            relationship_type = edge_data.get("relationship", "is_ancestor_of").upper()
-            properties = edge_data.copy()
-            properties.pop("relationship", None)
-
-            query = self._relationship_query(relationship_type)
-            tx.run(
-                query,
-                source_id=source,
-                target_id=target,
-                properties=edge_data or {},
-                relationship_type=relationship_type,
-            )
+            relationship_type, row = self.relationship_row(source, target, edge_data)
+            buffer = buffers.setdefault(relationship_type, [])
+            buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                yield relationship_type, buffers.pop(relationship_type)
+
+        yield from buffers.items()
 
 
-db_path = "data/full_data.duckdb"
-service = ImportNXGraphIntoNeo4J(
-    db_path=db_path, uri="bolt://localhost:", user="neo4j", password="12345678"
-)
-service.call()
+if __name__ == "__main__":
+    db_path = "data/full_data.duckdb"
+    service = ImportNXGraphIntoNeo4J(
+        db_path=db_path, uri="bolt://localhost:", user="neo4j", password="12345678"
+    )
+    service.call()
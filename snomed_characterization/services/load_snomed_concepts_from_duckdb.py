@@ -1,36 +1,100 @@
+import math
 import duckdb
-from typing import List
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence
 
+from snomed_characterization.concept_attribute_store import CONCEPT_COLUMNS
 from snomed_characterization.snomed_concept import RawSNOMEDConcept
 
-q_concepts = """
-    SELECT concept_id, concept_name,
-       domain_id,
-   vocabulary_id,
-concept_class_id,
-standard_concept,
-    concept_code,
-valid_start_date,
-  valid_end_date,
-  invalid_reason
-  FROM concept
-    """
+# DuckDB hands results over in vectors of this many rows
+DUCKDB_VECTOR_SIZE = 2048
 
 
 class LoadSNOMEDConceptsFromDuckdb:
-    def __init__(self, db_path):
+    """
+    Loads rows of the `concept` table, optionally filtered in SQL on domain,
+    vocabulary and standard status.
+
+    call() returns RawSNOMEDConcept objects; iter_concepts() streams them in
+    batches of `batch_size` rows, iter_batches() streams numpy columns and
+    call_columnar() returns whole numpy columns without building any
+    per-row objects.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        domain_ids: Optional[Sequence[str]] = None,
+        vocabulary_ids: Optional[Sequence[str]] = None,
+        standard_only: bool = False,
+        batch_size: int = 100_000,
+    ):
         self.db_path = db_path
+        self.domain_ids = domain_ids
+        self.vocabulary_ids = vocabulary_ids
+        self.standard_only = standard_only
+        self.batch_size = batch_size
 
-    def call(self) -> List[RawSNOMEDConcept]:
-        concepts_df = self._load_concepts()
+    def _query(self, columns: Sequence[str]):
+        unknown = set(columns) - set(CONCEPT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown concept columns: {sorted(unknown)}")
 
-        data = [RawSNOMEDConcept(**row.to_dict()) for _, row in concepts_df.iterrows()]
+        conditions, parameters = [], []
+        if self.domain_ids is not None:
+            conditions.append("list_contains(?, domain_id)")
+            parameters.append(list(self.domain_ids))
+        if self.vocabulary_ids is not None:
+            conditions.append("list_contains(?, vocabulary_id)")
+            parameters.append(list(self.vocabulary_ids))
+        if self.standard_only:
+            conditions.append("standard_concept = 'S'")
 
-        return data
+        query = f"SELECT {', '.join(columns)} FROM concept"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
 
-    def _load_concepts(self):
+        return query, parameters
+
+    def _execute(self, columns: Sequence[str]):
+        query, parameters = self._query(columns)
         db_conn = duckdb.connect(self.db_path, read_only=True)
-        df = db_conn.execute(q_concepts).fetchdf()
-        db_conn.close()
+        try:
+            return db_conn, db_conn.execute(query, parameters)
+        except BaseException:
+            db_conn.close()
+            raise
+
+    def call(self) -> List[RawSNOMEDConcept]:
+        return list(self.iter_concepts())
+
+    def iter_concepts(self) -> Iterator[RawSNOMEDConcept]:
+        """Stream concepts, holding at most one batch of rows at a time."""
+        db_conn, result = self._execute(CONCEPT_COLUMNS)
+        try:
+            while rows := result.fetchmany(self.batch_size):
+                yield from (RawSNOMEDConcept(*row) for row in rows)
+        finally:
+            db_conn.close()
+
+    def iter_batches(
+        self, columns: Sequence[str] = CONCEPT_COLUMNS
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Stream numpy column batches of (about) `batch_size` rows."""
+        vectors = max(1, math.ceil(self.batch_size / DUCKDB_VECTOR_SIZE))
+        db_conn, result = self._execute(columns)
+        try:
+            while len(batch := result.fetch_df_chunk(vectors)):
+                yield {column: batch[column].to_numpy() for column in columns}
+        finally:
+            db_conn.close()
 
-        return df
+    def call_columnar(
+        self, columns: Sequence[str] = ("concept_id", "concept_name")
+    ) -> Dict[str, np.ndarray]:
+        """Requested columns of every matching concept as numpy arrays."""
+        db_conn, result = self._execute(columns)
+        try:
+            return result.fetchnumpy()
+        finally:
+            db_conn.close()
@@ -0,0 +1,173 @@
+import duckdb
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional, Union
+from pyroaring import BitMap
+
+from snomed_characterization.duckdb.queries import q_concepts_by_id, q_hierarchy_edges
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.import_duckdb_concepts_base import (
+    ImportDuckDBConceptsBase,
+)
+from snomed_characterization.vocabulary_diff import VocabularyDiff
+
+
+class PatchSNOMEDGraph:
+    """
+    Applies a VocabularyDiff in place to a graph imported from the old
+    release.
+
+    Only the part of the diff that touches the graph is applied: added edges
+    whose child is in the graph, removed edges and concepts that are in it,
+    and (for the complete graph) attribute updates of its concepts. Parents
+    that enter the graph through an added edge are expanded with their own
+    ancestors from the new release when `db_path` is given, so the graph
+    stays upward closed.
+
+    call() returns the concepts whose ancestors may have changed (changed
+    children and their descendants). Their stored BitMapGraph closures are
+    dropped by the patch; other caches built on the graph (e.g.
+    LowestCommonSubsumerEngine, ConditionClusterAnalyzer.ancestor_paths)
+    should be refreshed for them.
+    """
+
+    def __init__(
+        self,
+        snomed_graph: Union[
+            SNOMEDGraphBuilder, SNOMEDCompleteGraphBuilder, BitMapGraph
+        ],
+        diff: VocabularyDiff,
+        db_path: Optional[str] = None,
+    ):
+        self.snomed_graph = snomed_graph
+        self.diff = diff
+        self.db_path = db_path
+
+    def _has_node(self, concept_id: int) -> bool:
+        if isinstance(self.snomed_graph, BitMapGraph):
+            return self.snomed_graph.exists_node(concept_id)
+        return self.snomed_graph.graph.has_node(concept_id)
+
+    def _node_ids(self) -> np.ndarray:
+        if isinstance(self.snomed_graph, BitMapGraph):
+            nodes = self.snomed_graph.nodes
+        else:
+            nodes = self.snomed_graph.graph.nodes
+        return np.fromiter(nodes, dtype=np.int64, count=len(nodes))
+
+    def _has_edge(self, child_id: int, parent_id: int) -> bool:
+        if isinstance(self.snomed_graph, BitMapGraph):
+            return self.snomed_graph.exists_edge(child_id, parent_id)
+        return self.snomed_graph.graph.has_edge(child_id, parent_id)
+
+    def _get_descendants(self, concept_id: int) -> BitMap:
+        if isinstance(self.snomed_graph, BitMapGraph):
+            return self.snomed_graph.get_all_descendants(concept_id)
+
+        graph = self.snomed_graph.graph
+        descendants = BitMap()
+        queue = [concept_id]
+        while queue:
+            for child, _, relationship in graph.in_edges(
+                queue.pop(), data="relationship"
+            ):
+                if relationship == "is_descendant_of" and child not in descendants:
+                    descendants.add(child)
+                    queue.append(child)
+        return descendants
+
+    def _load_new_ancestry(self, concept_ids: Iterable[int]):
+        """Hierarchy of the new release reachable upwards from concept_ids."""
+        duckdb_conn = duckdb.connect(self.db_path, read_only=True)
+        edges = duckdb_conn.execute(q_hierarchy_edges).fetchnumpy()
+        duckdb_conn.close()
+
+        return ImportDuckDBConceptsBase._get_reachable_edges(
+            np.fromiter(concept_ids, dtype=np.int64),
+            np.asarray(edges["concept_id"], dtype=np.int64),
+            np.asarray(edges["parent_concept_id"], dtype=np.int64),
+        )
+
+    def _load_attributes(self, concept_ids: np.ndarray) -> pd.DataFrame:
+        added = self.diff.added_concepts
+        attributes = added[added["concept_id"].isin(concept_ids)]
+        missing = np.setdiff1d(concept_ids, attributes["concept_id"])
+        if self.db_path is None or not len(missing):
+            return attributes
+
+        duckdb_conn = duckdb.connect(self.db_path, read_only=True)
+        duckdb_conn.register(
+            "requested_concepts", pd.DataFrame({"concept_id": missing})
+        )
+        loaded = duckdb_conn.execute(q_concepts_by_id).fetchdf()
+        duckdb_conn.close()
+
+        return pd.concat([attributes, loaded], ignore_index=True)
+
+    def call(self) -> BitMap:
+        graph = self.snomed_graph
+        changed = BitMap()
+        affected = BitMap()
+
+        for child_id, parent_id in self.diff.removed_edges:
+            if self._has_edge(child_id, parent_id):
+                changed.add(child_id)
+                graph.remove_edge(child_id, parent_id)
+
+        for concept_id in self.diff.removed_concept_ids:
+            if self._has_node(concept_id):
+                affected |= self._get_descendants(concept_id)
+                graph.remove_concept(concept_id)
+        affected -= BitMap(self.diff.removed_concept_ids)
+
+        added_edges = [
+            (child_id, parent_id)
+            for child_id, parent_id in self.diff.added_edges
+            if self._has_node(child_id) and not self._has_edge(child_id, parent_id)
+        ]
+        child_ids = np.array([c for c, _ in added_edges], dtype=np.int64)
+        parent_ids = np.array([p for _, p in added_edges], dtype=np.int64)
+        new_ids = np.unique(
+            [parent_id for parent_id in parent_ids if not self._has_node(parent_id)]
+        ).astype(np.int64)
+
+        if self.db_path is not None and len(new_ids):
+            reached, ancestry_children, ancestry_parents = self._load_new_ancestry(
+                new_ids
+            )
+            # Ancestors already in the graph keep their current edges
+            new_ids = reached[~np.isin(reached, self._node_ids())]
+            unknown = np.isin(ancestry_children, new_ids)
+            child_ids = np.concatenate([child_ids, ancestry_children[unknown]])
+            parent_ids = np.concatenate([parent_ids, ancestry_parents[unknown]])
+
+        if isinstance(graph, SNOMEDCompleteGraphBuilder):
+            graph.add_hierarchy_from(
+                self._load_attributes(new_ids), child_ids.tolist(), parent_ids.tolist()
+            )
+            graph.graph.add_nodes_from(new_ids.tolist())
+        elif isinstance(graph, BitMapGraph):
+            for child_id in np.unique(child_ids).tolist():
+                graph.invalidate_ancestor_closure(child_id)
+            graph.add_hierarchy_from(new_ids, child_ids, parent_ids)
+        else:
+            graph.add_hierarchy_from(
+                new_ids.tolist(), child_ids.tolist(), parent_ids.tolist()
+            )
+        changed |= BitMap(np.asarray(child_ids, dtype=np.uint32))
+
+        if isinstance(graph, SNOMEDCompleteGraphBuilder):
+            graph.concepts.update_from_dataframe(self.diff.updated_concepts)
+
+        for concept_id in changed:
+            if self._has_node(concept_id):
+                affected.add(concept_id)
+                affected |= self._get_descendants(concept_id)
+
+        print(f"Patched graph, {len(affected)} concepts affected")
+
+        return affected
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from snomed_characterization.services.import_nx_graph_into_neo4j import (
+    ImportNXGraphIntoNeo4J,
+)
+
+# (source_id, target_id, relationship type)
+RelationshipKey = Tuple[int, int, str]
+
+q_upsert_nodes = """
+    UNWIND $rows AS row
+    MERGE (n:SNOMEDConcept {concept_id: row.concept_id})
+    SET n += row.properties
+    """
+
+q_delete_nodes = """
+    UNWIND $rows AS row
+    MATCH (n:SNOMEDConcept {concept_id: row.concept_id})
+    DETACH DELETE n
+    """
+
+
+def get_q_upsert_relationships(relationship_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (source:SNOMEDConcept {{concept_id: row.source_id}})
+    MATCH (target:SNOMEDConcept {{concept_id: row.target_id}})
+    MERGE (source)-[r:{relationship_type}]->(target)
+    SET r = row.properties
+    """
+
+
+def get_q_delete_relationships(relationship_type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (:SNOMEDConcept {{concept_id: row.source_id}})
+          -[r:{relationship_type}]->
+          (:SNOMEDConcept {{concept_id: row.target_id}})
+    DELETE r
+    """
+
+
+def content_hash(properties: dict) -> bytes:
+    encoded = json.dumps(properties, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+@dataclass
+class Neo4jSyncManifest:
+    """Content hash of every node and relationship last pushed to Neo4j."""
+
+    nodes: Dict[int, bytes] = field(default_factory=dict)
+    relationships: Dict[RelationshipKey, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> "Neo4jSyncManifest":
+        """Load a manifest, an empty one if nothing was pushed yet."""
+        try:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path: str):
+        """Write atomically, so a failed run leaves the old manifest."""
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+
+@dataclass
+class Neo4jSyncPlan:
+    """Rows to send to bring Neo4j from a manifest to the current graph."""
+
+    created_nodes: List[dict] = field(default_factory=list)
+    updated_nodes: List[dict] = field(default_factory=list)
+    deleted_nodes: List[dict] = field(default_factory=list)
+    # Rows keyed by relationship type
+    created_relationships: Dict[str, List[dict]] = field(default_factory=dict)
+    updated_relationships: Dict[str, List[dict]] = field(default_factory=dict)
+    deleted_relationships: Dict[str, List[dict]] = field(default_factory=dict)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            name: (
+                sum(map(len, rows.values())) if isinstance(rows, dict) else len(rows)
+            )
+            for name, rows in vars(self).items()
+        }
+
+    def is_empty(self) -> bool:
+        return not any(self.counts().values())
+
+
+class SyncNXGraphWithNeo4J(ImportNXGraphIntoNeo4J):
+    """
+    Incremental alternative to ImportNXGraphIntoNeo4J: compares the graph
+    with the manifest of the previous push (content hashes per node and
+    relationship) and only sends creates, updates and deletes.
+
+    The manifest is replaced once every batch is committed. Upserts are
+    MERGEs, so rerunning after a failed sync is safe.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        db_path: str,
+        user: str,
+        password: str,
+        manifest_path: str,
+        batch_size: int = 10_000,
+        driver=None,
+    ):
+        super().__init__(uri, db_path, user, password, batch_size, driver)
+        self.manifest_path = manifest_path
+
+    def call(self):
+        """Rebuild the graph from DuckDB and push only what changed."""
+        snomed = self.build_graph()
+
+        counts = self.write_graph(snomed.graph, snomed.concepts)
+
+        print(f"Graph synced with Neo4j: {counts}")
+
+    def plan(
+        self, graph, concepts=None, manifest: Optional[Neo4jSyncManifest] = None
+    ) -> Tuple[Neo4jSyncPlan, Neo4jSyncManifest]:
+        """Diff the graph against a manifest; returns the plan and the new manifest."""
+        if manifest is None:
+            manifest = Neo4jSyncManifest.load(self.manifest_path)
+        plan = Neo4jSyncPlan()
+        current = Neo4jSyncManifest()
+
+        for node_id, node_data in graph.nodes(data=True):
+            properties = self.node_properties(node_id, node_data, concepts)
+            digest = current.nodes[node_id] = content_hash(properties)
+            previous = manifest.nodes.get(node_id)
+            if previous == digest:
+                continue
+            row = {"concept_id": node_id, "properties": properties}
+            if previous is None:
+                plan.created_nodes.append(row)
+            else:
+                plan.updated_nodes.append(row)
+
+        for source, target, edge_data in graph.edges(data=True):
+            relationship_type, row = self.relationship_row(source, target, edge_data)
+            key = (source, target, relationship_type)
+            digest = current.relationships[key] = content_hash(row["properties"])
+            previous = manifest.relationships.get(key)
+            if previous == digest:
+                continue
+            rows = (
+                plan.created_relationships
+                if previous is None
+                else plan.updated_relationships
+            )
+            rows.setdefault(relationship_type, []).append(row)
+
+        for node_id in manifest.nodes.keys() - current.nodes.keys():
+            plan.deleted_nodes.append({"concept_id": node_id})
+        for source, target, relationship_type in (
+            manifest.relationships.keys() - current.relationships.keys()
+        ):
+            # DETACH DELETE already drops the relationships of deleted nodes
+            if source not in current.nodes or target not in current.nodes:
+                continue
+            plan.deleted_relationships.setdefault(relationship_type, []).append(
+                {"source_id": source, "target_id": target}
+            )
+
+        return plan, current
+
+    def write_graph_async(self, graph, concepts=None, concurrency: int = 4):
+        # A full async write would bypass the manifest and leave it stale
+        raise TypeError(
+            f"{type(self).__name__} syncs through the manifest; use write_graph"
+        )
+
+    def _write_graph(self, driver, graph, concepts) -> Dict[str, int]:
+        plan, manifest = self.plan(graph, concepts)
+        if plan.is_empty():
+            print("Neo4j is up to date")
+            return plan.counts()
+
+        with driver.session() as session:
+            self._create_constraints(session)
+
+            for relationship_type, rows in plan.deleted_relationships.items():
+                self._write_batches(
+                    session,
+                    f"deleted {relationship_type}",
+                    get_q_delete_relationships(relationship_type),
+                    rows,
+                )
+            self._write_batches(
+                session, "deleted nodes", q_delete_nodes, plan.deleted_nodes
+            )
+            self._write_batches(
+                session,
+                "upserted nodes",
+                q_upsert_nodes,
+                plan.created_nodes + plan.updated_nodes,
+            )
+            for relationships in (
+                plan.created_relationships,
+                plan.updated_relationships,
+            ):
+                for relationship_type, rows in relationships.items():
+                    self._write_batches(
+                        session,
+                        f"upserted {relationship_type}",
+                        get_q_upsert_relationships(relationship_type),
+                        rows,
+                    )
+
+        manifest.save(self.manifest_path)
+
+        return plan.counts()
+
+
+if __name__ == "__main__":
+    db_path = "data/full_data.duckdb"
+    service = SyncNXGraphWithNeo4J(
+        db_path=db_path,
+        uri="bolt://localhost:",
+        user="neo4j",
+        password="12345678",
+        manifest_path="data/neo4j_manifest.pickle",
+    )
+    service.call()
@@ -0,0 +1,44 @@
+from typing import Mapping
+
+
+def get_depth_similarity(
+    code1: int,
+    ancestors1: Mapping[int, int],
+    code2: int,
+    ancestors2: Mapping[int, int],
+) -> float:
+    """
+    Similarity based on the closest shared ancestor, given each concept's
+    ancestors mapped to their depth. Pure function, safe to call concurrently.
+    """
+    if code1 == code2:
+        return 1.0
+
+    # Find shared ancestors
+    shared_ancestors = ancestors1.keys() & ancestors2.keys()
+
+    if not shared_ancestors:
+        # Check if one is ancestor of another
+        if code1 in ancestors2:
+            return 1.0 / (1.0 + ancestors2[code1])
+        if code2 in ancestors1:
+            return 1.0 / (1.0 + ancestors1[code2])
+        return 0.0
+
+    # Similarity decreases with ancestor distance
+    closest = min(
+        max(ancestors1[ancestor], ancestors2[ancestor]) for ancestor in shared_ancestors
+    )
+    return 1.0 / (1.0 + closest)
+
+
+def get_jaccard_similarity(
+    frequency1: int, frequency2: int, intersection: int
+) -> float:
+    """Jaccard similarity from two condition frequencies and their co-occurrence"""
+    union = frequency1 + frequency2
+
+    if union == 0:
+        return 0
+
+    return intersection / (union - intersection)
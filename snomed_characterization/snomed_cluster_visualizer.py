@@ -1,184 +1,482 @@
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pandas as pd
-import networkx as nx
+import multiprocessing
+import os
 import numpy as np
-from typing import List, Dict, Set
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from typing import TYPE_CHECKING, List, Dict, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    import networkx as nx
+    import pandas as pd
+
+    from snomed_characterization.graphs.similarity_edge_list import (
+        SimilarityEdgeList,
+    )
 
 HQ_DPI = 300
 
 
+@cache
+def _load_plotting():
+    """
+    Import seaborn and pyplot at the first plot rather than at module
+    import (together they take seconds), and set the style once.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+    plt.rcParams["figure.figsize"] = [12, 8]
+
+    return sns, plt
+
+
+def _draw_cluster_sizes(sns, plt, cluster_sizes: "pd.DataFrame"):
+    plt.figure()
+    sns.histplot(cluster_sizes["size"].to_numpy(), bins=20)
+    plt.title("Distribution of Cluster Sizes")
+    plt.xlabel("Cluster Size")
+    plt.ylabel("Count")
+
+
+def _draw_similarity_distribution(sns, plt, similarities: "pd.DataFrame"):
+    plt.figure()
+    sns.histplot(similarities["weight"].to_numpy(), bins=30)
+    plt.title("Distribution of Similarity Scores")
+    plt.xlabel("Similarity Score")
+    plt.ylabel("Count")
+
+
+def _draw_concept_connectivity(sns, plt, connectivity: "pd.DataFrame", top_n: int):
+    plt.figure(figsize=(15, 8))
+    sns.barplot(data=connectivity.head(top_n), x="connections", y="concept")
+    plt.title(f"Top {top_n} Most Connected Concepts")
+    plt.xlabel("Number of Connections")
+
+
+def _draw_cluster_similarity_heatmap(sns, plt, heatmap: "pd.DataFrame"):
+    plt.figure(figsize=(12, 10))
+    sns.heatmap(
+        heatmap,
+        cmap="viridis",
+        xticklabels=list(heatmap.columns),
+        yticklabels=list(heatmap.index),
+    )
+    plt.title("Inter-cluster Similarity Heatmap")
+
+
+def _draw_cluster_compositions(
+    sns, plt, compositions: "pd.DataFrame", top_clusters: int, concepts_per_cluster: int
+):
+    plt.figure(figsize=(15, 10))
+    sns.barplot(data=compositions, x="connections", y="concept", hue="cluster")
+    plt.title(f"Top {concepts_per_cluster} Concepts in {top_clusters} Largest Clusters")
+    plt.xlabel("Number of Connections")
+
+
+# plot name -> (draw function, summary table it renders, options it takes)
+REPORT_PLOTS = {
+    "cluster_sizes": (_draw_cluster_sizes, "cluster_sizes", ()),
+    "similarities": (_draw_similarity_distribution, "similarities", ()),
+    "connectivity": (
+        _draw_concept_connectivity,
+        "concept_connectivity",
+        ("top_n",),
+    ),
+    "cluster_similarity": (
+        _draw_cluster_similarity_heatmap,
+        "cluster_similarity_heatmap",
+        (),
+    ),
+    "cluster_composition": (
+        _draw_cluster_compositions,
+        "cluster_compositions",
+        ("top_clusters", "concepts_per_cluster"),
+    ),
+}
+
+
+def _use_headless_backend():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_plot(plot: str, table: "pd.DataFrame", options: dict, path: str, dpi: int):
+    """Draw one report figure and write it to `path` (runs in a worker)."""
+    sns, plt = _load_plotting()
+    draw, _, option_names = REPORT_PLOTS[plot]
+    draw(sns, plt, table, *(options[name] for name in option_names))
+    plt.savefig(path, dpi=dpi)
+    plt.close("all")
+
+    return path
+
+
+def write_batch_reports(
+    visualizers: Dict[str, "SNOMEDClusterVisualizer"],
+    output_dir: str,
+    max_workers: Optional[int] = None,
+    dpi: int = HQ_DPI,
+    data_format: str = "csv",
+    top_n: int = 20,
+    max_clusters: int = 50,
+    top_clusters: int = 5,
+    concepts_per_cluster: int = 5,
+) -> Dict[str, List[str]]:
+    """
+    Write every report plot and its summary tables for each cohort into
+    `output_dir/<cohort>/`, without displaying anything.
+
+    Summary tables are computed once per cohort in this process; figures
+    are rendered in a process pool on the non-interactive Agg backend.
+    `data_format` is "csv" or "parquet" (which needs a parquet engine such
+    as pyarrow). Returns the written paths per cohort.
+    """
+    if data_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported data format: {data_format}")
+
+    options = {
+        "top_n": top_n,
+        "top_clusters": top_clusters,
+        "concepts_per_cluster": concepts_per_cluster,
+    }
+    written: Dict[str, List[str]] = {}
+    with ProcessPoolExecutor(
+        max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_use_headless_backend,
+    ) as executor:
+        renders = []
+        for cohort, visualizer in visualizers.items():
+            directory = os.path.join(output_dir, cohort)
+            os.makedirs(directory, exist_ok=True)
+            tables = visualizer.get_summary_tables(
+                top_clusters=top_clusters,
+                concepts_per_cluster=concepts_per_cluster,
+                max_clusters=max_clusters,
+            )
+
+            paths = written[cohort] = []
+            for plot, (_, table, _) in REPORT_PLOTS.items():
+                path = os.path.join(directory, f"{plot}.png")
+                renders.append(
+                    executor.submit(
+                        _render_plot, plot, tables[table], options, path, dpi
+                    )
+                )
+                paths.append(path)
+
+            for name, table in tables.items():
+                path = os.path.join(directory, f"{name}.{data_format}")
+                if data_format == "csv":
+                    table.to_csv(path)
+                else:
+                    table.to_parquet(path)
+                paths.append(path)
+
+        for render in renders:
+            render.result()
+
+    return written
+
+
 class SNOMEDClusterVisualizer:
     def __init__(
-        self, sim_graph: nx.Graph, clusters: List[Set[int]], conditions_df: pd.DataFrame
+        self,
+        sim_graph: Union["nx.Graph", "SimilarityEdgeList"],
+        clusters: List[Set[int]],
+        conditions_df: "pd.DataFrame",
     ):
         """
         Initialize visualizer with similarity graph, clusters and condition information.
 
         Args:
-            sim_graph: NetworkX graph with similarity edges
+            sim_graph: NetworkX graph with similarity edges, or the
+                SimilarityEdgeList of ConditionClusterAnalyzer.get_condition_cluster_edges
             clusters: List of sets containing clustered concept IDs
             conditions_df: DataFrame with concept information, indexed by concept_id
         """
         self.sim_graph = sim_graph
         self.clusters = clusters
         self.conditions_df = conditions_df
+        self._edges = None
+
+    @property
+    def edges(self) -> "SimilarityEdgeList":
+        """The similarity graph as a columnar edge list, all statistics are computed from it."""
+        if self._edges is None:
+            from snomed_characterization.graphs.similarity_edge_list import (
+                SimilarityEdgeList,
+            )
 
-        # Set style
-        sns.set_style("whitegrid")
-        plt.rcParams["figure.figsize"] = [12, 8]
-
-    def plot_cluster_sizes(self, save_path: str = None):
-        """Plot distribution of cluster sizes"""
-        cluster_sizes = [len(cluster) for cluster in self.clusters]
-
-        plt.figure()
-        sns.histplot(cluster_sizes, bins=20)
-        plt.title("Distribution of Cluster Sizes")
-        plt.xlabel("Cluster Size")
-        plt.ylabel("Count")
+            if isinstance(self.sim_graph, SimilarityEdgeList):
+                self._edges = self.sim_graph
+            else:
+                self._edges = SimilarityEdgeList.from_networkx(self.sim_graph)
+        return self._edges
 
+    def _show(self, plt, save_path: Optional[str]):
         if save_path:
             plt.savefig(save_path, dpi=HQ_DPI)
         plt.show()
 
+    def plot_cluster_sizes(self, save_path: str = None):
+        """Plot distribution of cluster sizes"""
+        sns, plt = _load_plotting()
+        _draw_cluster_sizes(sns, plt, self.get_cluster_sizes())
+        self._show(plt, save_path)
+
     def plot_similarity_distribution(self, save_path: str = None):
         """Plot distribution of similarity scores from edges"""
-        similarities = [
-            data["weight"] for _, _, data in self.sim_graph.edges(data=True)
-        ]
-
-        plt.figure()
-        sns.histplot(similarities, bins=30)
-        plt.title("Distribution of Similarity Scores")
-        plt.xlabel("Similarity Score")
-        plt.ylabel("Count")
-
-        if save_path:
-            plt.savefig(save_path, dpi=HQ_DPI)
-        plt.show()
+        sns, plt = _load_plotting()
+        _draw_similarity_distribution(sns, plt, self.get_similarities())
+        self._show(plt, save_path)
 
     def plot_concept_connectivity(self, top_n: int = 20, save_path: str = None):
         """Plot top N most connected concepts"""
-        # Get degree of each node
-        degrees = dict(self.sim_graph.degree())
+        sns, plt = _load_plotting()
+        _draw_concept_connectivity(sns, plt, self.get_concept_connectivity(), top_n)
+        self._show(plt, save_path)
 
-        # Get top N by degree
-        top_concepts = sorted(degrees.items(), key=lambda x: x[1], reverse=True)[:top_n]
+    def plot_cluster_similarity_heatmap(
+        self, save_path: str = None, max_clusters: int = 50
+    ):
+        """
+        Plot heatmap of inter-cluster similarities. Beyond `max_clusters`
+        only the largest clusters are shown; rows are ordered so that
+        strongly linked clusters sit next to each other.
+        """
+        sns, plt = _load_plotting()
+        _draw_cluster_similarity_heatmap(
+            sns, plt, self.get_cluster_similarity_heatmap(max_clusters)
+        )
+        self._show(plt, save_path)
 
-        name_field = "concept_name"
+    def plot_cluster_compositions(
+        self,
+        top_clusters: int = 5,
+        concepts_per_cluster: int = 5,
+        save_path: str = None,
+    ):
+        """Plot top concepts in largest clusters"""
+        sns, plt = _load_plotting()
+        _draw_cluster_compositions(
+            sns,
+            plt,
+            self.get_cluster_compositions(
+                self.get_concept_connectivity(), top_clusters, concepts_per_cluster
+            ),
+            top_clusters,
+            concepts_per_cluster,
+        )
+        self._show(plt, save_path)
 
-        # Create DataFrame with concept names
-        concept_data = []
-        for concept_id, degree in top_concepts:
-            name = (
-                self.conditions_df.loc[concept_id, name_field]
-                if name_field in self.conditions_df.columns
-                else str(concept_id)
-            )
-            concept_data.append({"concept": name, "connections": degree})
+    def get_summary_tables(
+        self,
+        top_clusters: int = 5,
+        concepts_per_cluster: int = 5,
+        max_clusters: int = 50,
+    ) -> Dict[str, "pd.DataFrame"]:
+        """Every table behind the plots, each computed once (see write_batch_reports)."""
+        import pandas as pd
+
+        connectivity = self.get_concept_connectivity()
+        cluster_1, cluster_2, similarities = self.get_cluster_similarities()
+
+        return {
+            "cluster_sizes": self.get_cluster_sizes(),
+            "similarities": self.get_similarities(),
+            "concept_connectivity": connectivity,
+            "cluster_similarities": pd.DataFrame(
+                {
+                    "cluster_1": cluster_1 + 1,
+                    "cluster_2": cluster_2 + 1,
+                    "similarity": similarities,
+                }
+            ),
+            "cluster_similarity_heatmap": self.get_cluster_similarity_heatmap(
+                max_clusters
+            ),
+            "cluster_compositions": self.get_cluster_compositions(
+                connectivity, top_clusters, concepts_per_cluster
+            ),
+        }
+
+    def get_cluster_sizes(self) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "cluster": np.arange(1, len(self.clusters) + 1),
+                "size": [len(cluster) for cluster in self.clusters],
+            }
+        ).set_index("cluster")
+
+    def get_similarities(self) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "source": self.edges.sources,
+                "target": self.edges.targets,
+                "weight": self.edges.weights,
+            }
+        )
 
-        df = pd.DataFrame(concept_data)
+    def get_concept_connectivity(self) -> "pd.DataFrame":
+        """
+        Degree, name and cluster (by position, from 1) of every concept, most
+        connected first. Names come from one join with conditions_df and fall
+        back to the concept id.
+        """
+        import pandas as pd
 
-        plt.figure(figsize=(15, 8))
-        sns.barplot(data=df, x="connections", y="concept")
-        plt.title(f"Top {top_n} Most Connected Concepts")
-        plt.xlabel("Number of Connections")
+        degrees = pd.Series(self.edges.degrees(), index=self.edges.nodes)
+        connectivity = pd.DataFrame(
+            {"connections": degrees}, index=degrees.index.rename("concept_id")
+        )
 
-        if save_path:
-            plt.savefig(save_path, dpi=HQ_DPI)
-        plt.show()
+        labels = pd.Series(
+            np.repeat(
+                np.arange(1, len(self.clusters) + 1),
+                [len(cluster) for cluster in self.clusters],
+            ),
+            index=[node for cluster in self.clusters for node in cluster],
+        )
+        labels = labels[~labels.index.duplicated()]
+        connectivity = connectivity.reindex(
+            connectivity.index.union(labels.index), fill_value=0
+        )
+        connectivity["cluster"] = labels.reindex(connectivity.index).astype("Int64")
+
+        names = connectivity.index.astype(str).to_series(index=connectivity.index)
+        if "concept_name" in self.conditions_df.columns:
+            names = (
+                self.conditions_df["concept_name"]
+                .reindex(connectivity.index)
+                .fillna(names)
+            )
+        connectivity["concept"] = names
 
-    def plot_cluster_similarity_heatmap(self, save_path: str = None):
-        """Plot heatmap of inter-cluster similarities"""
-        n_clusters = len(self.clusters)
-        similarity_matrix = np.zeros((n_clusters, n_clusters))
+        return connectivity.sort_values("connections", ascending=False, kind="stable")
 
-        # Calculate average similarity between clusters
-        for i in range(n_clusters):
-            for j in range(i + 1, n_clusters):
-                avg_sim = self._calculate_cluster_similarity(
-                    self.clusters[i], self.clusters[j]
-                )
-                similarity_matrix[i, j] = avg_sim
-                similarity_matrix[j, i] = avg_sim
-
-        plt.figure(figsize=(12, 10))
-        sns.heatmap(
-            similarity_matrix,
-            cmap="viridis",
-            xticklabels=[f"C{i+1}" for i in range(n_clusters)],
-            yticklabels=[f"C{i+1}" for i in range(n_clusters)],
+    def get_cluster_compositions(
+        self,
+        connectivity: "pd.DataFrame",
+        top_clusters: int = 5,
+        concepts_per_cluster: int = 5,
+    ) -> "pd.DataFrame":
+        """Most connected concepts of the largest clusters, from the connectivity table."""
+        sizes = np.array([len(cluster) for cluster in self.clusters])
+        largest = np.argsort(-sizes, kind="stable")[:top_clusters] + 1
+        rank = {int(cluster): rank for rank, cluster in enumerate(largest)}
+
+        compositions = connectivity[connectivity["cluster"].isin(largest)].copy()
+        compositions["rank"] = compositions["cluster"].map(rank)
+        compositions = (
+            compositions.sort_values(
+                ["rank", "connections"], ascending=[True, False], kind="stable"
+            )
+            .groupby("rank")
+            .head(concepts_per_cluster)
         )
-        plt.title("Inter-cluster Similarity Heatmap")
+        compositions["cluster"] = "Cluster " + (compositions["rank"] + 1).astype(str)
 
-        if save_path:
-            plt.savefig(save_path, dpi=HQ_DPI)
-        plt.show()
+        return compositions.drop(columns="rank")
 
-    def _calculate_cluster_similarity(
-        self, cluster1: Set[int], cluster2: Set[int]
-    ) -> float:
-        """Calculate average similarity between two clusters"""
-        similarities = []
-        for c1 in cluster1:
-            for c2 in cluster2:
-                if self.sim_graph.has_edge(c1, c2):
-                    similarities.append(self.sim_graph.edges[c1, c2]["weight"])
+    def get_cluster_similarity_heatmap(self, max_clusters: int = 50) -> "pd.DataFrame":
+        """Similarity matrix of the largest `max_clusters` clusters, ordered for display."""
+        import pandas as pd
 
-        return np.mean(similarities) if similarities else 0
+        selected = sorted(
+            range(len(self.clusters)), key=lambda i: len(self.clusters[i]), reverse=True
+        )[:max_clusters]
+        similarity_matrix = self.get_cluster_similarity_matrix(selected)
+        order = self._order_by_similarity(similarity_matrix)
+        labels = [f"C{selected[i]+1}" for i in order]
 
-    def plot_cluster_compositions(
-        self,
-        top_clusters: int = 5,
-        concepts_per_cluster: int = 5,
-        save_path: str = None,
-    ):
-        """Plot top concepts in largest clusters"""
-        # Sort clusters by size
-        sorted_clusters = sorted(self.clusters, key=len, reverse=True)[:top_clusters]
-
-        # Prepare data for plotting
-        plot_data = []
-        for i, cluster in enumerate(sorted_clusters):
-            # Get concept names and their degrees
-            name_field = "concept_name"
-            cluster_concepts = []
-            for concept_id in cluster:
-                name = (
-                    self.conditions_df.loc[concept_id, name_field]
-                    if name_field in self.conditions_df.columns
-                    else str(concept_id)
-                )
-                degree = self.sim_graph.degree(concept_id)
-                cluster_concepts.append((name, degree))
-
-            # Get top concepts by degree
-            top_concepts = sorted(cluster_concepts, key=lambda x: x[1], reverse=True)[
-                :concepts_per_cluster
-            ]
-
-            for name, degree in top_concepts:
-                plot_data.append(
-                    {
-                        "cluster": f"Cluster {i+1}",
-                        "concept": name,
-                        "connections": degree,
-                    }
-                )
+        return pd.DataFrame(
+            similarity_matrix[np.ix_(order, order)], index=labels, columns=labels
+        )
 
-        df = pd.DataFrame(plot_data)
+    def get_cluster_similarities(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Average similarity of the edges between clusters, as sparse
+        (cluster_1, cluster_2, similarity) arrays with cluster_1 < cluster_2;
+        pairs without edges are left out.
 
-        plt.figure(figsize=(15, 10))
-        sns.barplot(data=df, x="connections", y="concept", hue="cluster")
-        plt.title(
-            f"Top {concepts_per_cluster} Concepts in {top_clusters} Largest Clusters"
+        Computed in one pass over the edge list: both endpoints are mapped
+        to cluster labels through a sorted label array, and the weights are
+        summed per (cluster, cluster) cell.
+        """
+        n_clusters = len(self.clusters)
+        members = np.fromiter(
+            (node for cluster in self.clusters for node in cluster), dtype=np.int64
+        )
+        member_labels = np.repeat(
+            np.arange(n_clusters), [len(cluster) for cluster in self.clusters]
+        )
+        order = np.argsort(members, kind="stable")
+        members, member_labels = members[order], member_labels[order]
+
+        edges = self.edges
+        if not len(members) or not len(edges):
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, np.array([], dtype=np.float64)
+        sources, targets, weights = edges.sources, edges.targets, edges.weights
+
+        def to_labels(nodes: np.ndarray) -> np.ndarray:
+            positions = np.minimum(np.searchsorted(members, nodes), len(members) - 1)
+            return np.where(members[positions] == nodes, member_labels[positions], -1)
+
+        labels_1, labels_2 = to_labels(sources), to_labels(targets)
+        between = (labels_1 >= 0) & (labels_2 >= 0) & (labels_1 != labels_2)
+        labels_1, labels_2 = labels_1[between], labels_2[between]
+        cells = np.minimum(labels_1, labels_2) * n_clusters + np.maximum(
+            labels_1, labels_2
         )
-        plt.xlabel("Number of Connections")
 
-        if save_path:
-            plt.savefig(save_path, dpi=HQ_DPI)
-        plt.show()
+        cells, inverse = np.unique(cells, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights[between], minlength=len(cells))
+        counts = np.bincount(inverse, minlength=len(cells))
+
+        return cells // n_clusters, cells % n_clusters, totals / counts
+
+    def get_cluster_similarity_matrix(self, clusters: List[int] = None) -> np.ndarray:
+        """
+        Dense symmetric matrix of average inter-cluster similarities (0 where
+        clusters share no edge), restricted to the `clusters` indices if given.
+        """
+        clusters = list(range(len(self.clusters)) if clusters is None else clusters)
+        positions = np.full(len(self.clusters), -1)
+        positions[clusters] = np.arange(len(clusters))
+
+        rows, columns, similarities = self.get_cluster_similarities()
+        rows, columns = positions[rows], positions[columns]
+        kept = (rows >= 0) & (columns >= 0)
+
+        similarity_matrix = np.zeros((len(clusters), len(clusters)))
+        similarity_matrix[rows[kept], columns[kept]] = similarities[kept]
+        similarity_matrix[columns[kept], rows[kept]] = similarities[kept]
+
+        return similarity_matrix
+
+    @staticmethod
+    def _order_by_similarity(similarity_matrix: np.ndarray) -> List[int]:
+        """Greedy chain: start at the first row, always step to the most similar unvisited one."""
+        if not len(similarity_matrix):
+            return []
+
+        order = [0]
+        unvisited = np.ones(len(similarity_matrix), dtype=bool)
+        unvisited[0] = False
+        while unvisited.any():
+            candidates = np.where(unvisited, similarity_matrix[order[-1]], -np.inf)
+            order.append(int(np.argmax(candidates)))
+            unvisited[order[-1]] = False
+
+        return order
 
 
 # Example usage:
@@ -192,4 +490,7 @@ visualizer.plot_similarity_distribution('similarities.png')
 visualizer.plot_concept_connectivity(top_n=20, save_path='connectivity.png')
 visualizer.plot_cluster_similarity_heatmap('cluster_similarity.png')
 visualizer.plot_cluster_compositions(save_path='cluster_composition.png')
+
+# Or write every plot and its data for many cohorts, headless
+write_batch_reports({'cohort_a': visualizer, ...}, 'reports/')
 """
@@ -8,7 +8,7 @@ class SNOMEDConcept:
     name: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class RawSNOMEDConcept:
     concept_id: int
     concept_name: Optional[str]
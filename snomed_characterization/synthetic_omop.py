@@ -0,0 +1,356 @@
+"""
+SNOMED-shaped synthetic OMOP databases for benchmarking at scale.
+
+SNOMED CT clinical findings form a shallow, wide DAG: most concepts sit
+5-10 levels below the root, a few parents have hundreds of children while
+most have a handful, and roughly a third of the concepts have more than
+one parent. Patient data is Zipfian: a few conditions are coded for much
+of the cohort while most are rare, and code counts per patient are
+right-skewed (a median of a few codes, a long tail of complex patients).
+
+    python -m snomed_characterization.synthetic_omop data/synthetic.duckdb \
+        --concepts 1000000 --patients 100000
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import duckdb
+import numpy as np
+
+# Patients per chunk written to condition_occurrence
+COHORT_CHUNK_SIZE = 100_000
+
+
+@dataclass
+class SyntheticHierarchy:
+    """Concepts with their level below the root and direct 'Is a' edges."""
+
+    concept_ids: np.ndarray
+    levels: np.ndarray
+    child_ids: np.ndarray
+    parent_ids: np.ndarray
+
+    @property
+    def depth(self) -> int:
+        return int(self.levels.max()) if len(self.levels) else 0
+
+
+def get_level_sizes(num_concepts: int, depth: int, fan_out: float) -> np.ndarray:
+    """
+    Concepts per level: the root, then levels growing `fan_out` times. If
+    `depth` levels can't hold every concept the levels below the root are
+    scaled up, if fewer levels are enough the last one is partial.
+    """
+    sizes = fan_out ** np.arange(depth + 1, dtype=np.float64)
+    cumulative = np.cumsum(sizes)
+
+    if cumulative[-1] >= num_concepts:
+        last = int(np.searchsorted(cumulative, num_concepts))
+        sizes = np.floor(sizes[: last + 1]).astype(np.int64)
+        sizes[-1] = num_concepts - sizes[:-1].sum()
+    else:
+        sizes[1:] *= (num_concepts - 1) / sizes[1:].sum()
+        sizes = np.floor(sizes).astype(np.int64)
+        sizes[0] = 1
+        sizes[-1] += num_concepts - sizes.sum()
+
+    return sizes[sizes > 0]
+
+
+def _choose(rng: np.random.Generator, cumulative_weights: np.ndarray, size: int):
+    """Weighted draw with replacement of positions, given cumulative weights."""
+    draws = rng.random(size) * cumulative_weights[-1]
+    return np.searchsorted(cumulative_weights, draws, side="right")
+
+
+def generate_snomed_hierarchy(
+    num_concepts: int,
+    depth: int = 12,
+    fan_out: float = 4.0,
+    multi_parent_rate: float = 0.35,
+    first_concept_id: int = 1,
+    seed: int = 0,
+) -> SyntheticHierarchy:
+    """
+    Random single-rooted DAG shaped like SNOMED clinical findings.
+
+    Each concept below the root gets a primary parent on the level above,
+    drawn with heavy-tailed (Pareto) weights so child counts vary from
+    none to hundreds around a mean of `fan_out`. A `multi_parent_rate`
+    share of the concepts below level 1 also get 1-3 extra parents a level
+    or two higher. Parents are always on shallower levels, so the graph is
+    acyclic; a concept's level is its longest path to the root.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = get_level_sizes(num_concepts, depth, fan_out)
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    levels = np.repeat(np.arange(len(sizes)), sizes)
+    # How many children a concept attracts, relative to its level
+    weights = rng.pareto(1.5, num_concepts) + 1.0
+
+    def parents_on(level: int, count: int) -> np.ndarray:
+        start, stop = starts[level], starts[level + 1]
+        return start + _choose(rng, np.cumsum(weights[start:stop]), count)
+
+    child_chunks, parent_chunks = [], []
+    for level in range(1, len(sizes)):
+        children = np.arange(starts[level], starts[level + 1])
+        child_chunks.append(children)
+        parent_chunks.append(parents_on(level - 1, len(children)))
+
+        if level < 2:
+            continue
+        extra = children[rng.random(len(children)) < multi_parent_rate]
+        extra = np.repeat(extra, np.minimum(rng.geometric(0.6, len(extra)), 3))
+        parent_levels = np.maximum(level - rng.geometric(0.7, len(extra)), 1)
+        for parent_level in np.unique(parent_levels):
+            selected = extra[parent_levels == parent_level]
+            child_chunks.append(selected)
+            parent_chunks.append(parents_on(parent_level, len(selected)))
+
+    edges = np.unique(
+        np.column_stack(
+            [
+                np.concatenate(child_chunks or [np.empty(0, dtype=np.int64)]),
+                np.concatenate(parent_chunks or [np.empty(0, dtype=np.int64)]),
+            ]
+        ),
+        axis=0,
+    )
+
+    return SyntheticHierarchy(
+        concept_ids=np.arange(num_concepts, dtype=np.int64) + first_concept_id,
+        levels=levels,
+        child_ids=edges[:, 0] + first_concept_id,
+        parent_ids=edges[:, 1] + first_concept_id,
+    )
+
+
+def generate_cohort(
+    concept_ids: np.ndarray,
+    num_patients: int,
+    zipf_exponent: float = 1.1,
+    median_codes: float = 6.0,
+    codes_sigma: float = 0.9,
+    max_codes: int = 500,
+    chunk_size: int = COHORT_CHUNK_SIZE,
+    seed: int = 0,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Chunks of (person_ids, condition_concept_ids), one row per condition
+    occurrence. Conditions are ranked in random order and drawn with
+    Zipfian prevalence, rank ** -zipf_exponent; occurrences per patient
+    are log-normal around `median_codes`, between 1 and `max_codes`.
+    Repeated codes of a patient stand for repeated diagnoses.
+    """
+    rng = np.random.default_rng(seed)
+    ranked = rng.permutation(np.asarray(concept_ids, dtype=np.int64))
+    cumulative_weights = np.cumsum(
+        np.arange(1, len(ranked) + 1, dtype=np.float64) ** -zipf_exponent
+    )
+
+    for first in range(0, num_patients, chunk_size):
+        person_ids = np.arange(first, min(first + chunk_size, num_patients)) + 1
+        counts = np.clip(
+            np.rint(rng.lognormal(np.log(median_codes), codes_sigma, len(person_ids))),
+            1,
+            max_codes,
+        ).astype(np.int64)
+
+        yield np.repeat(person_ids, counts), ranked[
+            _choose(rng, cumulative_weights, int(counts.sum()))
+        ]
+
+
+q_create_concept = """
+    CREATE TABLE concept AS
+    SELECT
+        concept_id::INTEGER AS concept_id,
+        'Synthetic finding ' || concept_id AS concept_name,
+        'Condition' AS domain_id,
+        'SNOMED' AS vocabulary_id,
+        'Clinical Finding' AS concept_class_id,
+        'S' AS standard_concept,
+        concept_id::VARCHAR AS concept_code,
+        DATE '1970-01-01' AS valid_start_date,
+        DATE '2099-12-31' AS valid_end_date,
+        NULL::VARCHAR AS invalid_reason
+    FROM concept_levels
+    ORDER BY concept_id
+    """
+
+q_create_concept_relationship = """
+    CREATE TABLE concept_relationship AS
+    SELECT
+        child_id::INTEGER AS concept_id_1,
+        parent_id::INTEGER AS concept_id_2,
+        'Is a' AS relationship_id
+    FROM is_a
+    UNION ALL
+    SELECT parent_id::INTEGER, child_id::INTEGER, 'Subsumes'
+    FROM is_a
+    """
+
+# Concepts are their own ancestors at level 0, as in OMOP
+q_create_concept_ancestor = """
+    CREATE TABLE concept_ancestor AS
+    SELECT
+        concept_id::INTEGER AS ancestor_concept_id,
+        concept_id::INTEGER AS descendant_concept_id,
+        0 AS min_levels_of_separation,
+        0 AS max_levels_of_separation
+    FROM concept_levels
+    """
+
+# Parents are always on shallower levels, so one level at a time the
+# closure of every parent is complete before its children are added
+q_insert_level_ancestors = """
+    INSERT INTO concept_ancestor
+    SELECT
+        ca.ancestor_concept_id,
+        r.child_id,
+        MIN(ca.min_levels_of_separation) + 1,
+        MAX(ca.max_levels_of_separation) + 1
+    FROM is_a r
+    JOIN concept_levels cl ON cl.concept_id = r.child_id AND cl.level = $level
+    JOIN concept_ancestor ca ON ca.descendant_concept_id = r.parent_id
+    GROUP BY ca.ancestor_concept_id, r.child_id
+    """
+
+q_create_condition_occurrence = """
+    CREATE TABLE condition_occurrence (
+        condition_occurrence_id BIGINT,
+        person_id INTEGER,
+        condition_concept_id INTEGER,
+        condition_start_date DATE
+    )
+    """
+
+q_insert_condition_occurrences = """
+    INSERT INTO condition_occurrence
+    SELECT
+        $offset + row_number() OVER (),
+        person_id,
+        condition_concept_id,
+        DATE '2000-01-01' + (hash(row_number() OVER (), $seed) % 8766)::INTEGER
+    FROM occurrences
+    """
+
+
+def write_synthetic_omop_database(
+    db_path: str,
+    hierarchy: SyntheticHierarchy,
+    num_patients: int,
+    seed: int = 0,
+    **cohort_options,
+):
+    """
+    Write the OMOP tables the importers read: concept, concept_relationship
+    ('Is a' and 'Subsumes'), concept_ancestor (full transitive closure with
+    min/max levels of separation) and condition_occurrence. Patients are
+    coded with concepts below the root. Any existing file is replaced.
+    """
+    import pandas as pd
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    with duckdb.connect(db_path) as connection:
+        connection.register(
+            "concept_levels",
+            pd.DataFrame(
+                {"concept_id": hierarchy.concept_ids, "level": hierarchy.levels}
+            ),
+        )
+        connection.register(
+            "is_a",
+            pd.DataFrame(
+                {"child_id": hierarchy.child_ids, "parent_id": hierarchy.parent_ids}
+            ),
+        )
+
+        connection.execute(q_create_concept)
+        connection.execute(q_create_concept_relationship)
+        connection.execute(q_create_concept_ancestor)
+        for level in range(1, hierarchy.depth + 1):
+            connection.execute(q_insert_level_ancestors, {"level": level})
+
+        connection.execute(q_create_condition_occurrence)
+        offset = 0
+        for person_ids, condition_concept_ids in generate_cohort(
+            hierarchy.concept_ids[hierarchy.levels > 0],
+            num_patients,
+            seed=seed,
+            **cohort_options,
+        ):
+            connection.register(
+                "occurrences",
+                pd.DataFrame(
+                    {
+                        "person_id": person_ids,
+                        "condition_concept_id": condition_concept_ids,
+                    }
+                ),
+            )
+            connection.execute(
+                q_insert_condition_occurrences, {"offset": offset, "seed": seed}
+            )
+            connection.unregister("occurrences")
+            offset += len(person_ids)
+
+
+def generate_synthetic_omop_database(
+    db_path: str,
+    num_concepts: int,
+    num_patients: int,
+    depth: int = 12,
+    fan_out: float = 4.0,
+    multi_parent_rate: float = 0.35,
+    seed: int = 0,
+    **cohort_options,
+) -> SyntheticHierarchy:
+    hierarchy = generate_snomed_hierarchy(
+        num_concepts, depth, fan_out, multi_parent_rate, seed=seed
+    )
+    write_synthetic_omop_database(
+        db_path, hierarchy, num_patients, seed=seed, **cohort_options
+    )
+    return hierarchy
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("db_path")
+    parser.add_argument("--concepts", type=int, default=100_000)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=12)
+    parser.add_argument("--fan-out", type=float, default=4.0)
+    parser.add_argument("--multi-parent-rate", type=float, default=0.35)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--median-codes", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    hierarchy = generate_synthetic_omop_database(
+        args.db_path,
+        args.concepts,
+        args.patients,
+        depth=args.depth,
+        fan_out=args.fan_out,
+        multi_parent_rate=args.multi_parent_rate,
+        seed=args.seed,
+        zipf_exponent=args.zipf_exponent,
+        median_codes=args.median_codes,
+    )
+    print(
+        f"Wrote {len(hierarchy.concept_ids)} concepts, {len(hierarchy.child_ids)}"
+        f" 'Is a' links over {hierarchy.depth} levels and {args.patients} patients"
+        f" to {args.db_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from pandas import DataFrame
+
+
+@dataclass
+class VocabularyDiff:
+    """
+    Changes to the Condition hierarchy between two vocabulary releases.
+    Concepts are the standard, valid Condition concepts; edges are 'Is a'
+    (child, parent) pairs.
+    """
+
+    added_concepts: DataFrame
+    removed_concept_ids: List[int]
+    updated_concepts: DataFrame
+    added_edges: List[Tuple[int, int]] = field(default_factory=list)
+    removed_edges: List[Tuple[int, int]] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (
+            len(self.added_concepts)
+            or self.removed_concept_ids
+            or len(self.updated_concepts)
+            or self.added_edges
+            or self.removed_edges
+        )
@@ -0,0 +1,22 @@
+import unittest
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+
+
+class TestBitMapGraph(unittest.TestCase):
+    def test_bulk_add_drops_stale_ancestor_closures(self):
+        graph = BitMapGraph()
+        graph.add_hierarchy_from([1, 2, 3], [3, 2], [2, 1])
+        graph.set_ancestor_closure(3, BitMap([1, 2]))
+        graph.set_ancestor_closure(2, BitMap([1]))
+
+        # 0 becomes a new root above 1
+        graph.add_hierarchy_from([0], [1], [0])
+
+        self.assertEqual(graph.get_all_ancestors(3), BitMap([0, 1, 2]))
+        self.assertEqual(graph.get_all_ancestors(2), BitMap([0, 1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import pickle
+import tempfile
+import unittest
+
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+
+
+class FrozenGraphTest(unittest.TestCase):
+    def setUp(self):
+        #       1
+        #      / \
+        #     2   3
+        #    / \ /
+        #   4   5
+        self.bitmap_graph = BitMapGraph()
+        self.snomed = SNOMEDGraphBuilder()
+        for concept_id, parent_ids in [(2, [1]), (3, [1]), (4, [2]), (5, [2, 3])]:
+            self.bitmap_graph.add_concept(concept_id, parent_ids)
+            self.snomed.add_concept(concept_id, parent_ids)
+        self.bitmap_graph.add_concept(6, [])
+
+    def assert_hierarchy(self, frozen: FrozenGraph):
+        self.assertEqual(frozen.get_parents(5), BitMap([2, 3]))
+        self.assertEqual(frozen.get_children(2), BitMap([4, 5]))
+        self.assertEqual(frozen.get_all_ancestors(5), BitMap([1, 2, 3]))
+        self.assertEqual(frozen.get_all_descendants(1), BitMap([2, 3, 4, 5]))
+        self.assertEqual(frozen.get_common_ancestors([4, 5]), BitMap([1, 2]))
+        self.assertEqual(frozen.get_ancestors_with_depths(4), {2: 1, 1: 2})
+        self.assertEqual(frozen.get_all_ancestors(42), BitMap())
+
+    def test_from_bitmap_graph(self):
+        frozen = FrozenGraph.from_bitmap_graph(self.bitmap_graph)
+        self.assert_hierarchy(frozen)
+        self.assertTrue(frozen.exists_node(6))
+
+    def test_from_networkx(self):
+        frozen = FrozenGraph.from_networkx(self.snomed.graph)
+        self.assert_hierarchy(frozen)
+        self.assertEqual(frozen.get_hierarchical_similarity(4, 5), 0.5)
+
+    def test_shared_memory_attach(self):
+        with FrozenGraph.from_bitmap_graph(
+            self.bitmap_graph
+        ).to_shared_memory() as frozen:
+            attached = FrozenGraph.attach(frozen.shm_name)
+            self.assert_hierarchy(attached)
+            attached.close()
+
+            # pickling sends only the name of the block
+            self.assertLess(len(pickle.dumps(frozen)), 200)
+            self.assert_hierarchy(pickle.loads(pickle.dumps(frozen)))
+
+    def test_memory_mapped_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.bin")
+            FrozenGraph.from_bitmap_graph(self.bitmap_graph).save(path)
+            frozen = FrozenGraph.open(path)
+            self.assert_hierarchy(frozen)
+            self.assert_hierarchy(pickle.loads(pickle.dumps(frozen)))
+
+    def test_spawned_workers(self):
+        context = multiprocessing.get_context("spawn")
+        with FrozenGraph.from_bitmap_graph(
+            self.bitmap_graph
+        ).to_shared_memory() as frozen:
+            with context.Pool(2) as pool:
+                result = pool.map(frozen.get_all_ancestors, [4, 5])
+        self.assertEqual(result, [BitMap([1, 2]), BitMap([1, 2, 3])])
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.graphs.bitmap_hierarchy import BitMapHierarchy
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.graphs.frozen_hierarchy import FrozenHierarchy
+from snomed_characterization.graphs.hierarchy import as_hierarchy
+from snomed_characterization.graphs.networkx_hierarchy import NetworkXHierarchy
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+
+EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5)]
+PATIENTS = [[4, 6], [4, 5], [2, 6], [5]]
+
+
+def build_backends():
+    default, compact = SNOMEDGraphBuilder(), SNOMEDGraphBuilder(compact=True)
+    bitmap = BitMapGraph()
+    for child, parent in EDGES:
+        default.add_concept(child, [parent])
+        compact.add_concept(child, [parent])
+        bitmap.add_concept(child, [parent])
+
+    return {
+        "networkx": default.graph,
+        "compact": compact.graph,
+        "bitmap": bitmap,
+        "frozen": FrozenGraph.from_edges(
+            [c for c, _ in EDGES], [p for _, p in EDGES], range(1, 7)
+        ),
+    }
+
+
+class TestHierarchy(unittest.TestCase):
+    def setUp(self):
+        self.backends = build_backends()
+
+    def test_as_hierarchy(self):
+        self.assertIsInstance(as_hierarchy(self.backends["compact"]), NetworkXHierarchy)
+        self.assertIsInstance(as_hierarchy(self.backends["bitmap"]), BitMapHierarchy)
+        self.assertIsInstance(as_hierarchy(self.backends["frozen"]), FrozenHierarchy)
+        with self.assertRaises(TypeError):
+            as_hierarchy({})
+
+    def test_backends_agree(self):
+        for name, graph in self.backends.items():
+            with self.subTest(backend=name):
+                hierarchy = as_hierarchy(graph)
+                self.assertEqual(sorted(hierarchy.get_parents(4)), [2, 3])
+                self.assertEqual(
+                    hierarchy.get_ancestors_with_depths(6), {5: 1, 3: 2, 1: 3}
+                )
+                self.assertEqual(
+                    hierarchy.get_ancestors_with_depths(6, 2), {5: 1, 3: 2}
+                )
+                self.assertEqual(list(hierarchy.get_all_ancestors(4)), [1, 2, 3])
+                self.assertEqual(sorted(hierarchy.get_edges()), sorted(EDGES))
+
+    def test_analyzer_results_do_not_depend_on_backend(self):
+        pairs = [(4, 6), (4, 5), (2, 6), (5, 6)]
+        expected = None
+        for name, graph in self.backends.items():
+            with self.subTest(backend=name):
+                analyzer = ConditionClusterAnalyzer(PATIENTS, graph)
+                results = (
+                    dict(analyzer.ancestor_paths),
+                    analyzer.get_enhanced_similarities(pairs).tolist(),
+                    analyzer.get_ic_similarities(pairs, "lin").tolist(),
+                    dict(analyzer.enrich_clusters_with_snomed({4: 0, 6: 1})),
+                    analyzer.snapshot().get_enhanced_similarities(pairs).tolist(),
+                )
+                if expected is None:
+                    expected = results
+                self.assertEqual(results[:2], expected[:2])
+                np.testing.assert_allclose(results[2], expected[2])
+                self.assertEqual(results[3], {0: {1, 2, 3}, 1: {1, 3, 5}})
+                np.testing.assert_allclose(results[4], expected[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
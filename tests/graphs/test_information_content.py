@@ -0,0 +1,90 @@
+import math
+import unittest
+
+import numpy as np
+
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.information_content import InformationContent
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+
+
+class InformationContentTest(unittest.TestCase):
+    def setUp(self):
+        #       1
+        #      / \
+        #     2   3
+        #    / \ /
+        #   4   5
+        self.snomed = SNOMEDGraphBuilder()
+        self.snomed.add_concept(2, [1])
+        self.snomed.add_concept(3, [1])
+        self.snomed.add_concept(4, [2])
+        self.snomed.add_concept(5, [2, 3])
+
+    def test_descendant_counts(self):
+        ic = InformationContent(self.snomed.graph)
+        counts = dict(zip(ic.node_ids.tolist(), ic.descendant_counts.tolist()))
+        self.assertEqual(counts, {1: 4, 2: 2, 3: 1, 4: 0, 5: 0})
+
+    def test_intrinsic_ic(self):
+        ic = InformationContent(self.snomed.graph)
+        self.assertAlmostEqual(ic.get_ic(1), 0.0)
+        self.assertAlmostEqual(ic.get_ic(4), 1.0)
+        self.assertAlmostEqual(ic.get_ic(2), 1.0 - math.log(3) / math.log(5))
+        self.assertEqual(ic.get_ic(42), 0.0)
+
+    def test_corpus_ic(self):
+        ic = InformationContent(self.snomed.graph, {4: 3, 5: 1})
+        # 5 is shared by 2 and 3 but counted once at the root
+        self.assertAlmostEqual(ic.get_ic(1), -math.log(5 / 5))
+        self.assertAlmostEqual(ic.get_ic(3), -math.log(2 / 5))
+        self.assertAlmostEqual(ic.get_ic(2), -math.log(5 / 5))
+
+    def test_batched_mica_matches_pairwise(self):
+        ic = InformationContent(self.snomed.graph, {4: 3, 5: 1})
+        subsumers = ic.to_positions([4, 2, 1])
+        others = [ic.to_positions(codes) for codes in ([5, 2, 3, 1], [3, 1], [], [42])]
+
+        np.testing.assert_allclose(
+            ic.get_mica_ics(subsumers, others),
+            [ic.get_mica_ic(subsumers, other) for other in others],
+        )
+        self.assertEqual(ic.get_mica_ics(ic.to_positions([]), others).tolist(), [0] * 4)
+
+    def test_similarity_measures(self):
+        ic = InformationContent(self.snomed.graph)
+        mica = ic.get_mica_ic(ic.to_positions([4, 2, 1]), ic.to_positions([5, 2, 3, 1]))
+        self.assertAlmostEqual(mica, ic.get_ic(2))
+
+        ic_4, ic_5 = ic.get_ic(4), ic.get_ic(5)
+        lin = ic.get_similarities("lin", [ic_4], [ic_5], [mica])
+        self.assertAlmostEqual(lin[0], 2 * mica / (ic_4 + ic_5))
+        resnik = ic.get_similarities("resnik", [ic_4], [ic_5], [mica])
+        self.assertAlmostEqual(resnik[0], mica)
+        jc = ic.get_similarities("jiang_conrath", [ic_4], [ic_5], [mica])
+        self.assertAlmostEqual(jc[0], 1.0 / (1.0 + ic_4 + ic_5 - 2 * mica))
+
+        with self.assertRaises(ValueError):
+            ic.get_similarities("unknown", [ic_4], [ic_5], [mica])
+
+    def test_analyzer_ic_similarity(self):
+        analyzer = ConditionClusterAnalyzer(
+            [[4, 5], [4], [3]], self.snomed.graph, hierarchical_measure="lin"
+        )
+        analyzer.precompute_information_content(corpus_based=True)
+
+        pairs = [(4, 5), (4, 3), (5, 3), (4, 4)]
+        vectorized = analyzer.get_enhanced_similarities(pairs)
+        scalar = [analyzer.get_enhanced_similarity(c1, c2) for c1, c2 in pairs]
+        np.testing.assert_allclose(vectorized, scalar)
+
+        self.assertEqual(analyzer.get_ic_similarity(4, 4), 1.0)
+        self.assertGreater(
+            analyzer.get_ic_similarity(4, 5), analyzer.get_ic_similarity(4, 3)
+        )
+
+    def test_analyzer_rejects_unknown_measure(self):
+        with self.assertRaises(ValueError):
+            ConditionClusterAnalyzer([[4]], self.snomed.graph, hierarchical_measure="x")
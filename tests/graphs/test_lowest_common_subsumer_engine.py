@@ -0,0 +1,65 @@
+import unittest
+from pyroaring import BitMap
+
+from snomed_characterization.graphs.bitmap_graph import BitMapGraph
+from snomed_characterization.graphs.lowest_common_subsumer_engine import (
+    LowestCommonSubsumerEngine,
+)
+
+
+class LowestCommonSubsumerEngineTest(unittest.TestCase):
+    def setUp(self):
+        #        1
+        #      /   \
+        #     2     3
+        #    / \   /
+        #   4   5 /
+        #    \   X
+        #     6 7
+        self.graph = BitMapGraph()
+        self.graph.add_concept(2, [1])
+        self.graph.add_concept(3, [1])
+        self.graph.add_concept(4, [2])
+        self.graph.add_concept(5, [2, 3])
+        self.graph.add_concept(6, [4])
+        self.graph.add_concept(7, [5, 3])
+        self.engine = LowestCommonSubsumerEngine(self.graph)
+
+    def test_get_subsumers(self):
+        self.assertEqual(self.engine.get_subsumers(7), BitMap([1, 2, 3, 5, 7]))
+        self.assertEqual(self.engine.get_subsumers(1), BitMap([1]))
+
+    def test_get_lcs(self):
+        self.assertEqual(self.engine.get_lcs(6, 7), BitMap([2]))
+        self.assertEqual(self.engine.get_lcs(4, 3), BitMap([1]))
+        # a concept and its ancestor share the ancestor as LCS
+        self.assertEqual(self.engine.get_lcs(7, 3), BitMap([3]))
+        self.assertEqual(self.engine.get_lcs(6, 6), BitMap([6]))
+
+    def test_get_lcs_is_memoized_per_pair(self):
+        first = self.engine.get_lcs(6, 7)
+        self.assertIs(self.engine.get_lcs(7, 6), first)
+
+    def test_get_lcs_multiple_lcs(self):
+        self.graph.add_concept(8, [2, 3])
+        self.engine.clear_cache()
+        self.assertEqual(self.engine.get_lcs(5, 8), BitMap([2, 3]))
+
+    def test_get_lcs_pairs(self):
+        result = self.engine.get_lcs_pairs([(6, 7), (4, 3)])
+        self.assertEqual(result, [BitMap([2]), BitMap([1])])
+
+    def test_get_lcs_set(self):
+        self.assertEqual(self.engine.get_lcs_set([4, 5, 6]), BitMap([2]))
+        self.assertEqual(self.engine.get_lcs_set([6, 7, 3]), BitMap([1]))
+        self.assertEqual(self.engine.get_lcs_set([]), BitMap())
+
+    def test_cache_size_limit(self):
+        engine = LowestCommonSubsumerEngine(self.graph, max_cache_size=1)
+        engine.get_lcs(6, 7)
+        engine.get_lcs(4, 3)
+        self.assertEqual(len(engine._pair_cache), 1)
+
+    def test_bitmap_graph_lowest_common_ancestors(self):
+        self.assertEqual(self.graph.get_lowest_common_ancestors([6, 7]), BitMap([2]))
+        self.assertEqual(self.graph.get_common_ancestors([6, 7]), BitMap([1, 2]))
@@ -0,0 +1,113 @@
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.similarity_edge_list import SimilarityEdgeList
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+
+
+def as_sorted_components(components):
+    return sorted(sorted(component) for component in components)
+
+
+class SimilarityEdgeListTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.graph = nx.Graph()
+        self.graph.add_nodes_from(range(1000, 1200, 2))
+        for source, target in rng.choice(range(1000, 1200, 2), size=(80, 2)):
+            if source != target:
+                self.graph.add_edge(
+                    int(source), int(target), weight=float(rng.random())
+                )
+        self.edges = SimilarityEdgeList.from_networkx(self.graph)
+
+    def test_connected_components_match_networkx(self):
+        self.assertEqual(
+            as_sorted_components(self.edges.connected_components()),
+            as_sorted_components(nx.connected_components(self.graph)),
+        )
+
+    def test_degrees_match_networkx(self):
+        degrees = dict(zip(self.edges.nodes.tolist(), self.edges.degrees().tolist()))
+        self.assertEqual(degrees, dict(self.graph.degree()))
+
+    def test_round_trips_through_networkx(self):
+        graph = self.edges.to_networkx()
+
+        self.assertEqual(sorted(graph.nodes), sorted(self.graph.nodes))
+        self.assertEqual(
+            {(*sorted(edge[:2]), edge[2]) for edge in graph.edges(data="weight")},
+            {(*sorted(edge[:2]), edge[2]) for edge in self.graph.edges(data="weight")},
+        )
+
+
+class AnalyzerEdgeListTest(unittest.TestCase):
+    def setUp(self):
+        #       1
+        #      / \
+        #     2   3
+        #    / \ /
+        #   4   5   6
+        snomed = SNOMEDGraphBuilder()
+        snomed.add_concept(2, [1])
+        snomed.add_concept(3, [1])
+        snomed.add_concept(4, [2])
+        snomed.add_concept(5, [2, 3])
+        snomed.add_concept(6, [])
+        self.analyzer = ConditionClusterAnalyzer(
+            [[4, 5], [4], [3, 5], [6], [2, 4]], snomed.graph
+        )
+        self.sim_graph, self.clusters = self.analyzer.get_condition_clusters(0.3)
+
+    def assert_matches_sim_graph(self, edges: SimilarityEdgeList):
+        self.assertEqual(sorted(edges.nodes.tolist()), sorted(self.sim_graph.nodes))
+        scored = {
+            (source, target): weight
+            for source, target, weight in zip(
+                edges.sources.tolist(), edges.targets.tolist(), edges.weights.tolist()
+            )
+        }
+        expected = {
+            tuple(sorted((source, target))): weight
+            for source, target, weight in self.sim_graph.edges(data="weight")
+        }
+        self.assertEqual(scored.keys(), expected.keys())
+        for pair, weight in expected.items():
+            self.assertAlmostEqual(scored[pair], weight)
+
+    def test_edge_list_matches_condition_clusters(self):
+        edges, clusters = self.analyzer.get_condition_cluster_edges(0.3, chunk_size=2)
+
+        self.assert_matches_sim_graph(edges)
+        self.assertEqual(
+            as_sorted_components(clusters), as_sorted_components(self.clusters)
+        )
+
+    def test_writes_edge_list_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            clusters = self.analyzer.write_condition_cluster_edges(
+                directory, 0.3, chunk_size=2
+            )
+            edges = SimilarityEdgeList.load(directory)
+
+        self.assert_matches_sim_graph(edges)
+        self.assertEqual(
+            as_sorted_components(clusters), as_sorted_components(self.clusters)
+        )
+
+    def test_directory_with_a_quote(self):
+        with tempfile.TemporaryDirectory(prefix="o'brien") as directory:
+            self.analyzer.write_condition_cluster_edges(directory, 0.3, chunk_size=2)
+            edges = SimilarityEdgeList.load(directory)
+
+        self.assert_matches_sim_graph(edges)
+
+
+if __name__ == "__main__":
+    unittest.main()
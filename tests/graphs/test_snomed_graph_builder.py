@@ -1,4 +1,7 @@
 import unittest
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
 from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
 import networkx
 
@@ -19,3 +22,65 @@ class SNOMEDGraphTest(unittest.TestCase):
 
         # validate edges
         self.assertEqual(list(snomed.graph.edges), [(1, 2), (1, 3), (2, 1), (3, 1)])
+
+
+class CompactSNOMEDGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.edges = [(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5)]
+        self.compact = SNOMEDGraphBuilder(compact=True)
+        self.default = SNOMEDGraphBuilder()
+        for builder in (self.compact, self.default):
+            for child, parent in self.edges:
+                builder.add_concept(child, [parent])
+
+    def test_edges_stored_once_with_shared_attributes(self):
+        graph = self.compact.graph
+        self.assertEqual(set(graph.edges), set(self.edges))
+        self.assertIs(graph.edges[2, 1], graph.edges[6, 5])
+        self.assertEqual(graph.edges[2, 1]["relationship"], "is_descendant_of")
+        with self.assertRaises(TypeError):
+            graph.edges[2, 1]["weight"] = 2.0
+
+    def test_parents_and_children_views(self):
+        for builder in (self.compact, self.default):
+            self.assertEqual(sorted(builder.get_parents(4)), [2, 3])
+            self.assertEqual(sorted(builder.get_children(3)), [4, 5])
+
+    def test_add_edge_with_relationship_stores_child_to_parent(self):
+        self.compact.add_edge_with_relationship(1, 7, relationship="is_ancestor_of")
+        self.compact.add_edge_with_relationship(8, 1, relationship="is_descendant_of")
+
+        self.assertTrue(self.compact.exists_edge(7, 1))
+        self.assertFalse(self.compact.exists_edge(1, 7))
+        self.assertEqual(sorted(self.compact.get_children(1)), [2, 3, 7, 8])
+        with self.assertRaises(ValueError):
+            self.compact.add_edge_with_relationship(1, 7, relationship="has_finding")
+
+    def test_add_edge_with_weight(self):
+        self.compact.add_edge(3, 1)
+        self.compact.add_edge(7, 1, weight=0.5)
+
+        graph = self.compact.graph
+        self.assertEqual(graph.edges[7, 1]["weight"], 0.5)
+        self.assertEqual(graph.edges[7, 1]["relationship"], "is_descendant_of")
+        # Other edges keep the shared default attributes
+        self.assertEqual(graph.edges[3, 1]["weight"], 1.0)
+        self.assertIs(graph.edges[3, 1], graph.edges[2, 1])
+
+    def test_bulk_matches_add_concept(self):
+        bulk = SNOMEDGraphBuilder(compact=True)
+        bulk.add_hierarchy_from(
+            range(1, 7), [c for c, _ in self.edges], [p for _, p in self.edges]
+        )
+        self.assertEqual(set(bulk.graph.edges), set(self.compact.graph.edges))
+
+    def test_analyzer_results_unchanged(self):
+        patients = [[4, 6], [4, 5], [2]]
+        compact = ConditionClusterAnalyzer(patients, self.compact.graph)
+        default = ConditionClusterAnalyzer(patients, self.default.graph)
+
+        self.assertEqual(dict(compact.ancestor_paths), dict(default.ancestor_paths))
+        self.assertEqual(
+            compact.get_enhanced_similarity(4, 6),
+            default.get_enhanced_similarity(4, 6),
+        )
@@ -0,0 +1,64 @@
+import unittest
+
+from pyroaring import BitMap
+
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.frozen_graph import FrozenGraph
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.graphs.subgraph_extractor import SNOMEDSubgraphExtractor
+
+
+class SNOMEDSubgraphExtractorTest(unittest.TestCase):
+    def setUp(self):
+        #       1
+        #      / \
+        #     2   3
+        #    / \ / \
+        #   4   5   6
+        self.snomed = SNOMEDGraphBuilder()
+        for concept_id, parent_ids in [
+            (2, [1]),
+            (3, [1]),
+            (4, [2]),
+            (5, [2, 3]),
+            (6, [3]),
+        ]:
+            self.snomed.add_concept(concept_id, parent_ids)
+
+    def test_get_closure(self):
+        extractor = SNOMEDSubgraphExtractor.from_networkx(self.snomed.graph)
+        self.assertEqual(extractor.get_closure([4]), BitMap([1, 2, 4]))
+        self.assertEqual(extractor.get_closure([4, 6, 42]), BitMap([1, 2, 3, 4, 6]))
+
+    def test_extract_frozen(self):
+        extractor = SNOMEDSubgraphExtractor.from_networkx(self.snomed.graph)
+        subgraph = extractor.extract([4, 5])
+        self.assertEqual(BitMap(subgraph.node_ids), BitMap([1, 2, 3, 4, 5]))
+        self.assertEqual(subgraph.get_parents(5), BitMap([2, 3]))
+        self.assertEqual(subgraph.get_children(3), BitMap([5]))
+
+    def test_extract_networkx_view(self):
+        extractor = SNOMEDSubgraphExtractor.from_networkx(self.snomed.graph)
+        view = extractor.extract_networkx([4])
+        self.assertEqual(set(view.nodes), {1, 2, 4})
+        self.assertEqual(set(view.edges), {(4, 2), (2, 4), (2, 1), (1, 2)})
+
+    def test_extract_without_networkx_matches_builder_shape(self):
+        frozen = FrozenGraph.from_networkx(self.snomed.graph)
+        extracted = SNOMEDSubgraphExtractor(frozen).extract_networkx([4, 6])
+        expected = self.snomed.graph.subgraph([1, 2, 3, 4, 6])
+        self.assertEqual(set(extracted.edges), set(expected.edges))
+        self.assertEqual(
+            extracted.edges[4, 2]["relationship"], expected.edges[4, 2]["relationship"]
+        )
+
+    def test_cohorts_share_the_full_graph(self):
+        extractor = SNOMEDSubgraphExtractor.from_networkx(self.snomed.graph)
+        for cohort in [[[4, 5]], [[6], [5]]]:
+            analyzer = ConditionClusterAnalyzer(
+                cohort, extractor.extract_for_patients(cohort)
+            )
+            full = ConditionClusterAnalyzer(cohort, self.snomed.graph)
+            self.assertEqual(analyzer.ancestor_paths, full.ancestor_paths)
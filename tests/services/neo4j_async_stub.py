@@ -0,0 +1,100 @@
+import asyncio
+from typing import List, Set, Tuple
+from neo4j.exceptions import TransientError
+
+
+class AsyncStubResult:
+    async def consume(self):
+        return None
+
+
+class AsyncStubTransaction:
+    def __init__(self, driver: "AsyncStubDriver"):
+        self.driver = driver
+        self.runs: List[Tuple[str, dict]] = []
+        self.locks: Set[int] = set()
+
+    async def run(self, query: str, **parameters):
+        # Lock every node the batch touches, as a MERGE would
+        locks = set()
+        for row in parameters.get("rows", []):
+            locks.update(
+                row[key]
+                for key in ("concept_id", "source_id", "target_id")
+                if key in row
+            )
+        if locks & self.driver.locked:
+            self.driver.conflicts += 1
+            raise TransientError("lock conflict with a concurrent transaction")
+        self.driver.locked |= locks
+        self.locks |= locks
+
+        self.runs.append((query, parameters))
+        await asyncio.sleep(self.driver.latency)
+        return AsyncStubResult()
+
+
+class AsyncStubSession:
+    def __init__(self, driver: "AsyncStubDriver"):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query: str, **parameters):
+        self.driver.statements.append((query, parameters))
+        return AsyncStubResult()
+
+    async def execute_write(self, work, *args, **kwargs):
+        driver = self.driver
+        driver.attempts += 1
+        driver.in_flight += 1
+        driver.peak_in_flight = max(driver.peak_in_flight, driver.in_flight)
+        tx = AsyncStubTransaction(driver)
+        try:
+            if driver.fail_every and driver.attempts % driver.fail_every == 0:
+                raise driver.error("injected failure")
+            result = await work(tx, *args, **kwargs)
+            driver.transactions.append(tx.runs)
+            return result
+        finally:
+            driver.locked -= tx.locks
+            driver.in_flight -= 1
+
+
+class AsyncStubDriver:
+    """
+    Stands in for a neo4j AsyncDriver: each write transaction holds locks
+    on the nodes of its rows for `latency` seconds and fails with a
+    TransientError on overlap with another one in flight, as a deadlock
+    would; every `fail_every`-th attempt fails too, with `error`.
+    """
+
+    def __init__(
+        self, latency: float = 0.001, fail_every: int = 0, error=TransientError
+    ):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.error = error
+        self.statements: List[Tuple[str, dict]] = []
+        self.transactions: List[List[Tuple[str, dict]]] = []
+        self.locked: Set[int] = set()
+        self.attempts = 0
+        self.conflicts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def session(self, **config):
+        return AsyncStubSession(self)
+
+    def batches(self, keyword: str) -> List[list]:
+        """Row batches of the committed queries containing `keyword`."""
+        return [
+            parameters["rows"]
+            for runs in self.transactions
+            for query, parameters in runs
+            if keyword in query
+        ]
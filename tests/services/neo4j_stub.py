@@ -0,0 +1,59 @@
+from typing import List, Tuple
+
+
+class StubResult:
+    def consume(self):
+        return None
+
+
+class StubTransaction:
+    def __init__(self):
+        self.runs: List[Tuple[str, dict]] = []
+
+    def run(self, query: str, **parameters):
+        self.runs.append((query, parameters))
+        return StubResult()
+
+
+class StubSession:
+    def __init__(self, driver: "StubDriver"):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def run(self, query: str, **parameters):
+        self.driver.statements.append((query, parameters))
+        return StubResult()
+
+    def execute_write(self, work, *args, **kwargs):
+        tx = StubTransaction()
+        result = work(tx, *args, **kwargs)
+        self.driver.transactions.append(tx.runs)
+        return result
+
+
+class StubDriver:
+    """
+    Stands in for a neo4j Driver: records auto-commit statements and the
+    queries of every committed write transaction.
+    """
+
+    def __init__(self):
+        self.statements: List[Tuple[str, dict]] = []
+        self.transactions: List[List[Tuple[str, dict]]] = []
+
+    def session(self, **config):
+        return StubSession(self)
+
+    def batches(self, keyword: str) -> List[list]:
+        """Row batches of the committed queries containing `keyword`."""
+        return [
+            parameters["rows"]
+            for runs in self.transactions
+            for query, parameters in runs
+            if keyword in query
+        ]
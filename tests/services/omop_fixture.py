@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+
+# 2 -> 1, 3 -> 1, 4 -> 2, 4 -> 3, 5 -> 3, 6 -> 5; 7 is a drug
+DEFAULT_EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5)]
+DEFAULT_DOMAINS = {7: "Drug"}
+DEFAULT_PEOPLE_CONDITIONS = [(1, 4), (1, 6), (2, 4)]
+
+
+def create_omop_database(
+    db_path: str,
+    edges: List[Tuple[int, int]] = DEFAULT_EDGES,
+    domains: Optional[Dict[int, str]] = None,
+    people_conditions: List[Tuple[int, int]] = DEFAULT_PEOPLE_CONDITIONS,
+):
+    """
+    Write a tiny OMOP database with the tables the importers read.
+    `edges` are direct (child, parent) 'Is a' links; concept_ancestor gets
+    their full transitive closure with min/max levels of separation.
+    """
+    domains = DEFAULT_DOMAINS if domains is None else domains
+    concept_ids = sorted({c for edge in edges for c in edge} | set(domains))
+
+    conn = duckdb.connect(db_path)
+    conn.execute("""
+        CREATE TABLE concept (
+            concept_id INTEGER, concept_name VARCHAR, domain_id VARCHAR,
+            vocabulary_id VARCHAR, concept_class_id VARCHAR,
+            standard_concept VARCHAR, concept_code VARCHAR,
+            valid_start_date DATE, valid_end_date DATE, invalid_reason VARCHAR
+        )
+        """)
+    conn.executemany(
+        "INSERT INTO concept VALUES (?, ?, ?, 'SNOMED', 'Clinical Finding', 'S', ?,"
+        " DATE '1970-01-01', DATE '2099-12-31', NULL)",
+        [(c, f"concept {c}", domains.get(c, "Condition"), str(c)) for c in concept_ids],
+    )
+
+    conn.execute("""
+        CREATE TABLE concept_relationship (
+            concept_id_1 INTEGER, concept_id_2 INTEGER, relationship_id VARCHAR
+        )
+        """)
+    conn.executemany(
+        "INSERT INTO concept_relationship VALUES (?, ?, 'Is a')", list(edges)
+    )
+
+    conn.execute("""
+        CREATE TABLE concept_ancestor AS
+        WITH RECURSIVE paths(ancestor_concept_id, descendant_concept_id, levels) AS (
+            SELECT concept_id_2, concept_id_1, 1 FROM concept_relationship
+            UNION ALL
+            SELECT cr.concept_id_2, p.descendant_concept_id, p.levels + 1
+            FROM paths p
+            JOIN concept_relationship cr ON cr.concept_id_1 = p.ancestor_concept_id
+        )
+        SELECT ancestor_concept_id, descendant_concept_id,
+            MIN(levels) AS min_levels_of_separation,
+            MAX(levels) AS max_levels_of_separation
+        FROM paths
+        GROUP BY ancestor_concept_id, descendant_concept_id
+        """)
+
+    conn.execute(
+        "CREATE TABLE condition_occurrence (person_id INTEGER, condition_concept_id INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO condition_occurrence VALUES (?, ?)", list(people_conditions)
+    )
+    conn.close()
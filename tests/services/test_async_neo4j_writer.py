@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from neo4j.exceptions import ClientError, TransientError
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.services.async_neo4j_writer import (
+    AsyncNeo4jWriter,
+    get_pair_rounds,
+)
+from snomed_characterization.services.import_nx_graph_into_neo4j import (
+    ImportNXGraphIntoNeo4J,
+)
+
+from .neo4j_async_stub import AsyncStubDriver
+from .test_import_nx_graph_into_neo4j import make_concept
+
+
+def build_graph(size: int = 200) -> SNOMEDCompleteGraphBuilder:
+    """A wide hierarchy where most concepts have two parents."""
+    builder = SNOMEDCompleteGraphBuilder()
+    for child in range(2, size + 1):
+        parents = {child // 2, max(1, child // 3)}
+        builder.add_concept(
+            make_concept(child), [make_concept(parent) for parent in parents]
+        )
+    return builder
+
+
+class TestGetPairRounds(unittest.TestCase):
+    def test_covers_every_pair_once_with_disjoint_rounds(self):
+        for buckets in (2, 4, 8):
+            rounds = get_pair_rounds(buckets)
+            cells = [cell for cells in rounds for cell in cells]
+
+            self.assertEqual(len(cells), len(set(cells)))
+            self.assertEqual(
+                set(cells),
+                {(a, b) for a in range(buckets) for b in range(a, buckets)},
+            )
+            for cells in rounds:
+                used = [bucket for cell in cells for bucket in set(cell)]
+                self.assertEqual(len(used), len(set(used)))
+
+
+class TestAsyncNeo4jWriter(unittest.TestCase):
+    def setUp(self):
+        self.builder = build_graph()
+        self.graph = self.builder.graph
+
+    def write(self, driver, **kwargs):
+        writer = AsyncNeo4jWriter(driver, batch_size=16, retry_delay=0, **kwargs)
+        return writer, asyncio.run(
+            writer.write_graph(self.graph, self.builder.concepts)
+        )
+
+    def written_rows(self, driver):
+        nodes = [
+            row["concept_id"] for rows in driver.batches("MERGE (n") for row in rows
+        ]
+        edges = [
+            (row["source_id"], row["target_id"])
+            for rows in driver.batches("MERGE (source)")
+            for row in rows
+        ]
+        return nodes, edges
+
+    def test_writes_every_row_exactly_once(self):
+        driver = AsyncStubDriver()
+        _, written = self.write(driver)
+
+        nodes, edges = self.written_rows(driver)
+        self.assertEqual(sorted(nodes), sorted(self.graph.nodes))
+        self.assertEqual(sorted(edges), sorted(self.graph.edges))
+        self.assertEqual(
+            written["nodes"] + written["IS_ANCESTOR_OF"] + written["IS_DESCENDANT_OF"],
+            self.graph.number_of_nodes() + self.graph.number_of_edges(),
+        )
+        self.assertEqual(len(driver.statements), 2)
+
+    def test_runs_sessions_concurrently_without_lock_conflicts(self):
+        driver = AsyncStubDriver()
+        writer, _ = self.write(driver, concurrency=4)
+
+        self.assertGreater(driver.peak_in_flight, 1)
+        self.assertLessEqual(driver.peak_in_flight, 4)
+        self.assertEqual(driver.conflicts, 0)
+        self.assertEqual(writer.retries, 0)
+
+    def test_retries_transient_failures(self):
+        driver = AsyncStubDriver(fail_every=5)
+        writer, _ = self.write(driver)
+
+        nodes, edges = self.written_rows(driver)
+        self.assertGreater(writer.retries, 0)
+        self.assertEqual(sorted(nodes), sorted(self.graph.nodes))
+        self.assertEqual(sorted(edges), sorted(self.graph.edges))
+
+    def test_permanent_errors_propagate(self):
+        for error, max_retries in [(ClientError, 5), (TransientError, 1)]:
+            with self.subTest(error=error.__name__):
+                driver = AsyncStubDriver(fail_every=1, error=error)
+                writer = AsyncNeo4jWriter(
+                    driver,
+                    batch_size=1,
+                    queue_size=1,
+                    max_retries=max_retries,
+                    retry_delay=0,
+                )
+
+                with self.assertRaises(error):
+                    asyncio.run(
+                        asyncio.wait_for(
+                            writer.write_graph(self.graph, self.builder.concepts),
+                            timeout=5,
+                        )
+                    )
+
+    def test_service_writes_through_async_driver(self):
+        driver = AsyncStubDriver()
+        service = ImportNXGraphIntoNeo4J(
+            uri=None, db_path=None, user=None, password=None, driver=driver
+        )
+
+        written = service.write_graph_async(
+            self.graph, self.builder.concepts, concurrency=2
+        )
+
+        self.assertEqual(written["nodes"], self.graph.number_of_nodes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import duckdb
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.graph_build_cache import GraphBuildCache
+from snomed_characterization.services.import_duckdb_concept_ancestor_closure import (
+    ImportDuckDBConceptAncestorClosure,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_bitmap_graph import (
+    ImportDuckDBConceptsToBitMapGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_frozen_graph import (
+    ImportDuckDBConceptsToFrozenGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_multi_domain_graph import (
+    ImportDuckDBConceptsToMultiDomainGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
+    ImportDuckDBConceptsToCompleteSNOMEDGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
+    ImportDuckDBConceptsToSNOMEDGraph,
+)
+
+from .omop_fixture import create_omop_database
+
+
+class TestGraphBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        create_omop_database(self.db_path)
+        self.cache = GraphBuildCache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snomed_graph_hit_skips_build(self):
+        built = SNOMEDGraphBuilder()
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, built).call_cached(self.cache)
+
+        cached = SNOMEDGraphBuilder()
+        importer = ImportDuckDBConceptsToSNOMEDGraph(self.db_path, cached)
+        with patch.object(importer, "call", side_effect=AssertionError("rebuilt")):
+            importer.call_cached(self.cache)
+
+        self.assertEqual(set(cached.graph.edges), set(built.graph.edges))
+        self.assertEqual(len(self.cache.entries()), 1)
+
+    def test_compact_and_default_builders_do_not_share_entries(self):
+        default = SNOMEDGraphBuilder()
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, default).call_cached(self.cache)
+        compact = SNOMEDGraphBuilder(compact=True)
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, compact).call_cached(self.cache)
+
+        self.assertEqual(len(self.cache.entries()), 2)
+        self.assertTrue(compact.compact)
+        self.assertEqual(
+            compact.graph.number_of_edges() * 2, default.graph.number_of_edges()
+        )
+
+    def test_complete_and_bitmap_graphs(self):
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(
+            self.db_path, SNOMEDCompleteGraphBuilder()
+        ).call_cached(self.cache, bulk=True)
+        ImportDuckDBConceptsToBitMapGraph(self.db_path).call_cached(self.cache)
+
+        complete = SNOMEDCompleteGraphBuilder()
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(self.db_path, complete).call_cached(
+            self.cache, bulk=True
+        )
+        bitmap = ImportDuckDBConceptsToBitMapGraph(self.db_path)
+        bitmap.call_cached(self.cache)
+
+        self.assertEqual(len(self.cache.entries()), 2)
+        self.assertEqual(complete.get_concept(4).concept_name, "concept 4")
+        self.assertEqual(list(bitmap.get_concept_ancestors(6)), [1, 3, 5])
+
+    def test_every_importer_restores_its_state_on_a_hit(self):
+        importers = {
+            "snomed": lambda: ImportDuckDBConceptsToSNOMEDGraph(
+                self.db_path, SNOMEDGraphBuilder()
+            ),
+            "complete": lambda: ImportDuckDBConceptsToCompleteSNOMEDGraph(
+                self.db_path, SNOMEDCompleteGraphBuilder()
+            ),
+            "bitmap": lambda: ImportDuckDBConceptsToBitMapGraph(self.db_path),
+            "frozen": lambda: ImportDuckDBConceptsToFrozenGraph(self.db_path),
+            "multi_domain": lambda: ImportDuckDBConceptsToMultiDomainGraph(
+                self.db_path
+            ),
+            "closure": lambda: ImportDuckDBConceptAncestorClosure(self.db_path),
+        }
+        ancestors = {
+            "snomed": lambda graph: set(graph.get_parents(4)),
+            "complete": lambda graph: {graph.get_concept(4).concept_name},
+            "bitmap": lambda graph: set(graph.get_all_ancestors(6)),
+            "frozen": lambda graph: set(graph.get_all_ancestors(6)),
+            "multi_domain": lambda graph: set(graph.get_all_ancestors(6)),
+            "closure": lambda graph: set(graph.get_all_ancestors(6)),
+        }
+        for name, make_importer in importers.items():
+            with self.subTest(importer=name):
+                built = make_importer()
+                built.call_cached(self.cache)
+
+                cached = make_importer()
+                with patch.object(
+                    cached, "call", side_effect=AssertionError("rebuilt")
+                ):
+                    graph = cached.call_cached(self.cache)
+
+                self.assertIs(graph, cached.snomed_graph)
+                self.assertEqual(
+                    ancestors[name](graph), ancestors[name](built.snomed_graph)
+                )
+                if name == "closure":
+                    self.assertEqual(cached.ancestor_paths, built.ancestor_paths)
+                    self.assertEqual(cached.ancestor_paths[6], {5: 1, 3: 2, 1: 3})
+
+    def test_changed_table_misses(self):
+        ImportDuckDBConceptsToSNOMEDGraph(
+            self.db_path, SNOMEDGraphBuilder()
+        ).call_cached(self.cache)
+
+        connection = duckdb.connect(self.db_path)
+        connection.execute("INSERT INTO condition_occurrence VALUES (3, 2)")
+        connection.close()
+
+        ImportDuckDBConceptsToSNOMEDGraph(
+            self.db_path, SNOMEDGraphBuilder()
+        ).call_cached(self.cache)
+        self.assertEqual(len(self.cache.entries()), 2)
+
+    def test_eviction_keeps_most_recently_used(self):
+        cache = GraphBuildCache(self.cache.directory, max_entries=2)
+        cache.store("a", [1])
+        cache.store("b", [2])
+        os.utime(cache._path("a"), (0, 0))
+        os.utime(cache._path("b"), (1, 1))
+        cache.load("a")
+        cache.store("c", [3])
+
+        self.assertEqual({key for key, _, _ in cache.entries()}, {"a", "c"})
+        self.assertIsNone(cache.load("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.import_duckdb_concept_ancestor_closure import (
+    ImportDuckDBConceptAncestorClosure,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_bitmap_graph import (
+    ImportDuckDBConceptsToBitMapGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
+    ImportDuckDBConceptsToSNOMEDGraph,
+)
+
+from .omop_fixture import create_omop_database
+
+
+class TestImportDuckDBConceptAncestorClosure(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        create_omop_database(
+            self.db_path,
+            edges=[(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5), (8, 2)],
+        )
+        self.service = ImportDuckDBConceptAncestorClosure(self.db_path)
+        self.service.call()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ancestor_paths(self):
+        self.assertEqual(set(self.service.ancestor_paths), {1, 2, 3, 4, 5, 6})
+        self.assertEqual(self.service.ancestor_paths[4], {1: 2, 2: 1, 3: 1})
+        self.assertEqual(self.service.ancestor_paths[6], {1: 3, 3: 2, 5: 1})
+        self.assertEqual(self.service.ancestor_paths[1], {})
+
+    def test_closure_matches_bfs(self):
+        bfs = ImportDuckDBConceptsToBitMapGraph(self.db_path)
+        bfs.call()
+        graph = self.service.snomed_graph
+
+        self.assertEqual(graph.nodes, bfs.snomed_graph.nodes)
+        for concept_id in graph.nodes:
+            self.assertEqual(
+                graph.get_all_ancestors(concept_id),
+                bfs.get_concept_ancestors(concept_id),
+            )
+            self.assertEqual(
+                graph.get_all_descendants(concept_id),
+                bfs.get_concept_descendants(concept_id),
+            )
+
+    def test_analyzer_uses_closure(self):
+        builder = SNOMEDGraphBuilder()
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, builder).call()
+        patient_conditions = [[4, 6], [4]]
+
+        traversed = ConditionClusterAnalyzer(patient_conditions, builder.graph)
+        precomputed = ConditionClusterAnalyzer(
+            patient_conditions,
+            builder.graph,
+            ancestor_paths=self.service.ancestor_paths,
+        )
+
+        self.assertEqual(
+            dict(precomputed.ancestor_paths), dict(traversed.ancestor_paths)
+        )
+        self.assertEqual(
+            precomputed.get_hierarchical_similarity(4, 6),
+            traversed.get_hierarchical_similarity(4, 6),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
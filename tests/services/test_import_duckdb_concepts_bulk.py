@@ -0,0 +1,97 @@
+import duckdb
+import os
+import tempfile
+import unittest
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.import_duckdb_concepts_to_bitmap_graph import (
+    ImportDuckDBConceptsToBitMapGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
+    ImportDuckDBConceptsToCompleteSNOMEDGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
+    ImportDuckDBConceptsToSNOMEDGraph,
+)
+
+from .omop_fixture import create_omop_database
+
+
+class TestImportDuckDBConceptsBulk(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        # 8 is nobody's condition, so it must not be imported
+        create_omop_database(
+            self.db_path,
+            edges=[(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5), (8, 2)],
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snomed_graph_bulk_matches_bfs(self):
+        bfs, bulk = SNOMEDGraphBuilder(), SNOMEDGraphBuilder()
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, bfs).call()
+        ImportDuckDBConceptsToSNOMEDGraph(self.db_path, bulk).call_bulk()
+
+        self.assertEqual(set(bulk.graph.nodes), {1, 2, 3, 4, 5, 6})
+        self.assertEqual(set(bulk.graph.nodes), set(bfs.graph.nodes))
+        self.assertEqual(
+            set(bulk.graph.edges(data="relationship")),
+            set(bfs.graph.edges(data="relationship")),
+        )
+
+    def test_bitmap_graph_bulk_matches_bfs(self):
+        bfs = ImportDuckDBConceptsToBitMapGraph(self.db_path)
+        bulk = ImportDuckDBConceptsToBitMapGraph(self.db_path)
+        bfs.call()
+        bulk.call_bulk()
+
+        self.assertEqual(bulk.snomed_graph.nodes, bfs.snomed_graph.nodes)
+        for concept_id in bulk.snomed_graph.nodes:
+            self.assertEqual(
+                bulk.get_concept_ancestors(concept_id),
+                bfs.get_concept_ancestors(concept_id),
+            )
+            self.assertEqual(
+                bulk.get_concept_descendants(concept_id),
+                bfs.get_concept_descendants(concept_id),
+            )
+
+    def test_complete_graph_bulk(self):
+        bulk = SNOMEDCompleteGraphBuilder()
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(self.db_path, bulk).call_bulk()
+
+        self.assertEqual(set(bulk.graph.nodes), {1, 2, 3, 4, 5, 6})
+        self.assertEqual(bulk.get_concept(4).concept_name, "concept 4")
+        self.assertEqual(bulk.graph.edges[6, 5]["relationship"], "is_descendant_of")
+        self.assertEqual(bulk.graph.edges[5, 6]["relationship"], "is_ancestor_of")
+
+    def test_complete_graph_call_matches_bulk(self):
+        bulk = SNOMEDCompleteGraphBuilder()
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(self.db_path, bulk).call_bulk()
+        walked = SNOMEDCompleteGraphBuilder()
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(self.db_path, walked).call()
+
+        self.assertEqual(set(walked.graph.nodes), set(bulk.graph.nodes))
+        self.assertEqual(set(walked.graph.edges), set(bulk.graph.edges))
+        self.assertEqual(walked.get_concept(1).concept_name, "concept 1")
+
+    def test_shared_connection_loads_pruned_columns(self):
+        connection = duckdb.connect(self.db_path, read_only=True)
+        builder = SNOMEDGraphBuilder()
+        importer = ImportDuckDBConceptsToSNOMEDGraph(self.db_path, builder, connection)
+
+        concepts_df = importer._load_concepts_to_df()
+        self.assertEqual(list(concepts_df.columns), ["concept_id", "level_1_ancestors"])
+        # 8 is nobody's condition nor an ancestor of one
+        self.assertEqual(set(concepts_df["concept_id"]), {2, 3, 4, 5, 6})
+
+        importer.call()
+        connection.close()
+
+        self.assertEqual(set(builder.graph.nodes), {1, 2, 3, 4, 5, 6})
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from pyroaring import BitMap
+
+from snomed_characterization.services.import_duckdb_concepts_to_frozen_graph import (
+    ImportDuckDBConceptsToFrozenGraph,
+)
+
+from .omop_fixture import create_omop_database
+
+
+class TestImportDuckDBConceptsToFrozenGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        create_omop_database(self.db_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_call_imports_full_hierarchy(self):
+        importer = ImportDuckDBConceptsToFrozenGraph(self.db_path)
+        concepts_df = importer.call()
+
+        graph = importer.snomed_graph
+        self.assertEqual(BitMap(graph.node_ids), BitMap([1, 2, 3, 4, 5, 6]))
+        self.assertEqual(graph.get_parents(4), BitMap([2, 3]))
+        self.assertEqual(graph.get_all_ancestors(6), BitMap([1, 3, 5]))
+        self.assertEqual(concepts_df.index.name, "concept_id")
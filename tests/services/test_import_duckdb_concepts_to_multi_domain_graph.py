@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from snomed_characterization.services.import_duckdb_concepts_to_multi_domain_graph import (
+    ImportDuckDBConceptsToMultiDomainGraph,
+)
+
+from .omop_fixture import DEFAULT_EDGES, create_omop_database
+
+
+class TestImportDuckDBConceptsToMultiDomainGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        # 9 (Procedure) is a child of condition 3
+        create_omop_database(
+            self.db_path,
+            edges=DEFAULT_EDGES + [(7, 8), (9, 3)],
+            domains={7: "Drug", 8: "Drug", 9: "Procedure"},
+        )
+        service = ImportDuckDBConceptsToMultiDomainGraph(
+            self.db_path, ["Condition", "Drug", "Procedure"]
+        )
+        service.call()
+        self.graph = service.snomed_graph
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memberships(self):
+        self.assertEqual(list(self.graph.domains["Condition"]), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(list(self.graph.domains["Drug"]), [7, 8])
+        self.assertEqual(list(self.graph.vocabularies["SNOMED"]), list(range(1, 10)))
+        self.assertEqual(self.graph.get_domain(9), "Procedure")
+        self.assertEqual(list(self.graph.get_members(["Drug", "Procedure"])), [7, 8, 9])
+
+    def test_domain_filtered_queries(self):
+        self.assertEqual(list(self.graph.get_all_descendants(3)), [4, 5, 6, 9])
+        self.assertEqual(
+            list(self.graph.get_descendants_in(3, ["Condition"])), [4, 5, 6]
+        )
+        self.assertEqual(list(self.graph.get_ancestors_in(9, ["Condition"])), [1, 3])
+        self.assertEqual(
+            list(self.graph.get_ancestors_in(7, ["Drug"], ["SNOMED"])), [8]
+        )
+        self.assertEqual(
+            list(self.graph.get_ancestors_in(7, vocabulary_ids=["RxNorm"])), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
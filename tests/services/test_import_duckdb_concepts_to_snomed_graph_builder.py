@@ -2,33 +2,12 @@ import unittest
 from unittest.mock import patch, Mock, call
 import pandas as pd
 
+from snomed_characterization.duckdb.queries import get_q_concepts, q_people_concepts
 from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
     ImportDuckDBConceptsToSNOMEDGraph,
 )
 
-q_concepts = """
-    WITH grouped_ancestors AS (
-        SELECT 
-            descendant_concept_id,
-            ARRAY_AGG(ancestor_concept_id ORDER BY ancestor_concept_id) as level_1_ancestors
-        FROM concept_ancestor ca
-        WHERE min_levels_of_separation = 1
-        GROUP BY descendant_concept_id
-    )
-    SELECT 
-        c.*,
-        ga.level_1_ancestors
-    FROM concept c
-    INNER JOIN grouped_ancestors ga ON c.concept_id = ga.descendant_concept_id
-    WHERE c.invalid_reason IS NULL 
-        AND c.standard_concept = 'S'
-        AND c.domain_id = 'Condition';
-    """
-
-q_people_concepts = """
-    select distinct condition_concept_id
-    from condition_occurrence;
-    """
+q_concepts = get_q_concepts(columns=("concept_id",), people_only=True)
 
 
 class TestImportDuckDBConceptsToSNOMEDGraphBuilder(unittest.TestCase):
@@ -53,10 +32,12 @@ class TestImportDuckDBConceptsToSNOMEDGraphBuilder(unittest.TestCase):
 
         # mock connection
         mock_connection = Mock()
-        mock_connection.execute.side_effect = [
-            Mock(fetchdf=Mock(return_value=mock_people_concepts_df)),
-            Mock(fetchdf=Mock(return_value=mock_concepts_df)),
-        ]
+        # both loads run concurrently, so answer by query rather than by order
+        results = {
+            q_people_concepts: Mock(fetchdf=Mock(return_value=mock_people_concepts_df)),
+            q_concepts: Mock(fetchdf=Mock(return_value=mock_concepts_df)),
+        }
+        mock_connection.execute.side_effect = results.__getitem__
         mock_connect.return_value = mock_connection
 
         # graph
@@ -78,7 +59,7 @@ class TestImportDuckDBConceptsToSNOMEDGraphBuilder(unittest.TestCase):
         pd.testing.assert_frame_equal(result, indexed_mock_concepts_df)
 
         mock_connection.execute.assert_has_calls(
-            [call(q_people_concepts), call(q_concepts)], any_order=False
+            [call(q_people_concepts), call(q_concepts)], any_order=True
         )
 
         # Validate SNOMEDGraph interactions
@@ -0,0 +1,167 @@
+import contextlib
+import csv
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.services.import_nx_graph_into_neo4j import (
+    ImportNXGraphIntoNeo4J,
+)
+from snomed_characterization.snomed_concept import RawSNOMEDConcept
+
+from .neo4j_stub import StubDriver
+from .omop_fixture import create_omop_database
+
+EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (6, 5)]
+
+
+def make_concept(concept_id: int) -> RawSNOMEDConcept:
+    return RawSNOMEDConcept(
+        concept_id,
+        f"concept {concept_id}",
+        "Condition",
+        "SNOMED",
+        "Clinical Finding",
+        "S",
+        str(concept_id),
+        "1970-01-01",
+        "2099-12-31",
+        None,
+    )
+
+
+class TestImportNXGraphIntoNeo4J(unittest.TestCase):
+    def setUp(self):
+        self.builder = SNOMEDCompleteGraphBuilder()
+        for child, parent in EDGES:
+            self.builder.add_concept(make_concept(child), [make_concept(parent)])
+        self.driver = StubDriver()
+        self.service = ImportNXGraphIntoNeo4J(
+            uri=None,
+            db_path=None,
+            user=None,
+            password=None,
+            batch_size=4,
+            driver=self.driver,
+        )
+
+    def test_writes_unwind_batches_per_transaction(self):
+        written = self.service.write_graph(self.builder.graph, self.builder.concepts)
+
+        self.assertEqual(
+            written, {"nodes": 6, "IS_DESCENDANT_OF": 6, "IS_ANCESTOR_OF": 6}
+        )
+        self.assertEqual(len(self.driver.statements), 2)
+        # every transaction holds exactly one UNWIND batch
+        self.assertTrue(all(len(runs) == 1 for runs in self.driver.transactions))
+        self.assertTrue(
+            all("UNWIND $rows" in runs[0][0] for runs in self.driver.transactions)
+        )
+
+        node_batches = self.driver.batches("MERGE (n:SNOMEDConcept")
+        self.assertEqual([len(batch) for batch in node_batches], [4, 2])
+        row = node_batches[0][0]
+        self.assertEqual(
+            row["properties"]["concept_name"], f"concept {row['concept_id']}"
+        )
+
+    def test_relationships_grouped_by_type(self):
+        self.service.write_graph(self.builder.graph, self.builder.concepts)
+
+        descendant_batches = self.driver.batches("[r:IS_DESCENDANT_OF]")
+        ancestor_batches = self.driver.batches("[r:IS_ANCESTOR_OF]")
+        self.assertEqual(sum(map(len, descendant_batches)), 6)
+        self.assertEqual(sum(map(len, ancestor_batches)), 6)
+        self.assertIn(
+            {"source_id": 6, "target_id": 5, "properties": {"weight": 1.0}},
+            [row for batch in descendant_batches for row in batch],
+        )
+
+
+class TestExportAdminImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.builder = SNOMEDCompleteGraphBuilder()
+        for child, parent in reversed(EDGES):
+            self.builder.add_concept(make_concept(child), [make_concept(parent)])
+        self.service = ImportNXGraphIntoNeo4J(
+            uri=None, db_path=None, user=None, password=None
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_rows(self, writer, opener=open):
+        rows = []
+        for path in writer.paths:
+            with opener(path, "rt", newline="") as file:
+                rows.extend(csv.reader(file))
+        return rows
+
+    def test_sorted_chunked_files(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            writers = self.service.export_admin_import(
+                self.builder.graph,
+                self.directory.name,
+                self.builder.concepts,
+                chunk_size=4,
+                compress=False,
+            )
+
+        self.assertEqual(set(writers), {"nodes", "IS_DESCENDANT_OF", "IS_ANCESTOR_OF"})
+        with open(writers["nodes"].header_path) as file:
+            header = file.readline().strip().split(",")
+        self.assertEqual(header[0], "concept_id:ID(SNOMEDConcept)")
+        self.assertIn("valid_start_date:date", header)
+        self.assertIn("valid_end_date:date", header)
+        self.assertIn("--id-type=INTEGER", output.getvalue())
+
+        nodes = self.read_rows(writers["nodes"])
+        self.assertEqual(len(writers["nodes"].paths), 2)
+        self.assertEqual([row[0] for row in nodes], ["1", "2", "3", "4", "5", "6"])
+        self.assertEqual(nodes[3][1], "concept 4")
+        self.assertEqual(nodes[3][-2], "")  # invalid_reason is NULL
+
+        descendant_edges = [
+            (int(row[0]), int(row[1]))
+            for row in self.read_rows(writers["IS_DESCENDANT_OF"])
+        ]
+        self.assertEqual(descendant_edges, sorted(EDGES))
+
+    def test_compressed(self):
+        writers = self.service.export_admin_import(
+            self.builder.graph, self.directory.name, self.builder.concepts
+        )
+
+        self.assertTrue(writers["nodes"].paths[0].endswith(".csv.gz"))
+        self.assertEqual(len(self.read_rows(writers["IS_ANCESTOR_OF"], gzip.open)), 6)
+
+    def test_dates_from_duckdb(self):
+        db_path = os.path.join(self.directory.name, "omop.duckdb")
+        create_omop_database(db_path)
+        service = ImportNXGraphIntoNeo4J(
+            uri=None, db_path=db_path, user=None, password=None
+        )
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            writers = service.call_export(
+                os.path.join(self.directory.name, "export"), compress=False
+            )
+
+        with open(writers["nodes"].header_path) as file:
+            header = file.readline().strip().split(",")
+        nodes = self.read_rows(writers["nodes"])
+        start = header.index("valid_start_date:date")
+        end = header.index("valid_end_date:date")
+        self.assertEqual({row[start] for row in nodes}, {"1970-01-01"})
+        self.assertEqual({row[end] for row in nodes}, {"2099-12-31"})
+
+
+if __name__ == "__main__":
+    unittest.main()
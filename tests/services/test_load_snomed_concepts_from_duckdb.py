@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from snomed_characterization.services.load_snomed_concepts_from_duckdb import (
+    LoadSNOMEDConceptsFromDuckdb,
+)
+from snomed_characterization.snomed_concept import RawSNOMEDConcept
+
+from .omop_fixture import create_omop_database
+
+
+class TestLoadSNOMEDConceptsFromDuckdb(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "omop.duckdb")
+        create_omop_database(self.db_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_call(self):
+        concepts = LoadSNOMEDConceptsFromDuckdb(self.db_path).call()
+
+        self.assertEqual(len(concepts), 7)
+        self.assertIsInstance(concepts[0], RawSNOMEDConcept)
+        self.assertEqual(concepts[3].concept_name, "concept 4")
+
+    def test_filters_and_streaming(self):
+        service = LoadSNOMEDConceptsFromDuckdb(
+            self.db_path,
+            domain_ids=["Condition"],
+            vocabulary_ids=["SNOMED"],
+            standard_only=True,
+            batch_size=2,
+        )
+
+        ids = [concept.concept_id for concept in service.iter_concepts()]
+        self.assertEqual(sorted(ids), [1, 2, 3, 4, 5, 6])
+
+        drugs = LoadSNOMEDConceptsFromDuckdb(self.db_path, domain_ids=["Drug"])
+        self.assertEqual([c.concept_id for c in drugs.iter_concepts()], [7])
+
+    def test_columnar(self):
+        service = LoadSNOMEDConceptsFromDuckdb(self.db_path, domain_ids=["Condition"])
+
+        columns = service.call_columnar()
+        self.assertEqual(set(columns), {"concept_id", "concept_name"})
+        self.assertEqual(sorted(columns["concept_id"].tolist()), [1, 2, 3, 4, 5, 6])
+
+        batches = list(service.iter_batches(["concept_id"]))
+        self.assertEqual(
+            sorted(id for batch in batches for id in batch["concept_id"].tolist()),
+            [1, 2, 3, 4, 5, 6],
+        )
+
+        # Columns are validated before a connection is opened
+        with patch("duckdb.connect") as connect, self.assertRaises(ValueError):
+            service.call_columnar(["concept_id; DROP TABLE concept"])
+        connect.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import duckdb
+import os
+import tempfile
+import unittest
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+from snomed_characterization.services.compute_vocabulary_diff import (
+    ComputeVocabularyDiff,
+)
+from snomed_characterization.services.import_duckdb_concept_ancestor_closure import (
+    ImportDuckDBConceptAncestorClosure,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_complete_graph import (
+    ImportDuckDBConceptsToCompleteSNOMEDGraph,
+)
+from snomed_characterization.services.import_duckdb_concepts_to_snomed_graph import (
+    ImportDuckDBConceptsToSNOMEDGraph,
+)
+from snomed_characterization.services.patch_snomed_graph import PatchSNOMEDGraph
+
+from .omop_fixture import create_omop_database
+
+# 6 moves from 5 to 2, 5 stops being a Condition, 4 gains the new parent 9
+NEW_EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (4, 9), (9, 1), (6, 2), (5, 3)]
+
+
+class TestPatchSNOMEDGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # A quote in the path must not break the ATTACH statement
+        self.old_path = os.path.join(self.directory.name, "old's.duckdb")
+        self.new_path = os.path.join(self.directory.name, "new.duckdb")
+        create_omop_database(self.old_path)
+        create_omop_database(self.new_path, NEW_EDGES, domains={5: "Drug"})
+
+        connection = duckdb.connect(self.new_path)
+        connection.execute(
+            "UPDATE concept SET concept_name = 'renamed' WHERE concept_id = 3"
+        )
+        connection.close()
+
+        self.diff = ComputeVocabularyDiff(self.old_path, self.new_path).call()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_diff(self):
+        self.assertEqual(self.diff.added_concepts["concept_id"].tolist(), [9])
+        self.assertEqual(self.diff.removed_concept_ids, [5])
+        self.assertEqual(self.diff.updated_concepts["concept_id"].tolist(), [3])
+        self.assertEqual(set(self.diff.added_edges), {(4, 9), (9, 1), (6, 2)})
+        self.assertEqual(set(self.diff.removed_edges), {(5, 3), (6, 5)})
+
+    def test_patched_graph_matches_fresh_import(self):
+        patched, fresh = SNOMEDGraphBuilder(), SNOMEDGraphBuilder()
+        ImportDuckDBConceptsToSNOMEDGraph(self.old_path, patched).call()
+        ImportDuckDBConceptsToSNOMEDGraph(self.new_path, fresh).call()
+
+        affected = PatchSNOMEDGraph(patched, self.diff, self.new_path).call()
+
+        self.assertEqual(set(patched.graph.nodes), {1, 2, 3, 4, 6, 9})
+        self.assertEqual(
+            set(patched.graph.edges(data="relationship")),
+            set(fresh.graph.edges(data="relationship")),
+        )
+        self.assertEqual(list(affected), [4, 6, 9])
+
+    def test_complete_graph_attributes(self):
+        builder = SNOMEDCompleteGraphBuilder()
+        ImportDuckDBConceptsToCompleteSNOMEDGraph(self.old_path, builder).call_bulk()
+
+        PatchSNOMEDGraph(builder, self.diff, self.new_path).call()
+
+        self.assertEqual(builder.get_concept(3).concept_name, "renamed")
+        self.assertEqual(builder.get_concept(9).concept_name, "concept 9")
+        self.assertIsNone(builder.get_concept(5))
+        self.assertTrue(builder.graph.has_edge(9, 1))
+
+    def test_bitmap_closures_are_refreshed(self):
+        service = ImportDuckDBConceptAncestorClosure(self.old_path)
+        service.call()
+        graph = service.snomed_graph
+        self.assertEqual(list(graph.get_all_ancestors(6)), [1, 3, 5])
+
+        PatchSNOMEDGraph(graph, self.diff, self.new_path).call()
+
+        self.assertEqual(list(graph.get_all_ancestors(6)), [1, 2])
+        self.assertEqual(list(graph.get_all_ancestors(4)), [1, 2, 3, 9])
+        self.assertEqual(list(graph.get_all_ancestors(2)), [1])
+        self.assertNotIn(5, graph.nodes)
+
+
+if __name__ == "__main__":
+    unittest.main()
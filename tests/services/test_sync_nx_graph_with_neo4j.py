@@ -0,0 +1,119 @@
+import dataclasses
+import os
+import tempfile
+import unittest
+from pandas import DataFrame
+
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.services.sync_nx_graph_with_neo4j import (
+    Neo4jSyncManifest,
+    SyncNXGraphWithNeo4J,
+)
+
+from .neo4j_stub import StubDriver
+from .test_import_nx_graph_into_neo4j import EDGES, make_concept
+
+
+class TestSyncNXGraphWithNeo4J(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.manifest_path = os.path.join(self.directory.name, "manifest.pickle")
+        self.builder = SNOMEDCompleteGraphBuilder()
+        for child, parent in EDGES:
+            self.builder.add_concept(make_concept(child), [make_concept(parent)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def sync(self):
+        driver = StubDriver()
+        service = SyncNXGraphWithNeo4J(
+            uri=None,
+            db_path=None,
+            user=None,
+            password=None,
+            manifest_path=self.manifest_path,
+            batch_size=4,
+            driver=driver,
+        )
+        counts = service.write_graph(self.builder.graph, self.builder.concepts)
+        return driver, counts
+
+    def test_first_sync_creates_everything(self):
+        driver, counts = self.sync()
+
+        self.assertEqual(counts["created_nodes"], 6)
+        self.assertEqual(counts["created_relationships"], 12)
+        self.assertEqual(sum(map(len, driver.batches("SET n += row"))), 6)
+        manifest = Neo4jSyncManifest.load(self.manifest_path)
+        self.assertEqual(len(manifest.nodes), 6)
+        self.assertEqual(len(manifest.relationships), 12)
+
+    def test_async_full_write_is_refused(self):
+        service = SyncNXGraphWithNeo4J(
+            uri=None,
+            db_path=None,
+            user=None,
+            password=None,
+            manifest_path=self.manifest_path,
+        )
+
+        with self.assertRaises(TypeError):
+            service.write_graph_async(self.builder.graph, self.builder.concepts)
+        self.assertFalse(os.path.exists(self.manifest_path))
+
+    def test_unchanged_graph_sends_nothing(self):
+        self.sync()
+        driver, counts = self.sync()
+
+        self.assertFalse(any(counts.values()))
+        self.assertEqual(driver.transactions, [])
+        self.assertEqual(driver.statements, [])
+
+    def test_sends_only_the_changes(self):
+        self.sync()
+        renamed = dataclasses.asdict(make_concept(4))
+        renamed["concept_name"] = "renamed"
+        self.builder.concepts.update_from_dataframe(DataFrame([renamed]))
+        self.builder.remove_concept(6)
+        self.builder.remove_edge(5, 3)
+        self.builder.add_concept(make_concept(7), [make_concept(2)])
+
+        driver, counts = self.sync()
+
+        self.assertEqual(
+            counts,
+            {
+                "created_nodes": 1,
+                "updated_nodes": 1,
+                "deleted_nodes": 1,
+                "created_relationships": 2,
+                "updated_relationships": 0,
+                "deleted_relationships": 2,
+            },
+        )
+        upserted = [row for rows in driver.batches("SET n += row") for row in rows]
+        self.assertEqual(sorted(row["concept_id"] for row in upserted), [4, 7])
+        self.assertEqual(
+            [
+                row["concept_id"]
+                for rows in driver.batches("DETACH DELETE")
+                for row in rows
+            ],
+            [6],
+        )
+        deleted = [
+            (row["source_id"], row["target_id"])
+            for rows in driver.batches("DELETE r")
+            for row in rows
+        ]
+        self.assertEqual(sorted(deleted), [(3, 5), (5, 3)])
+
+        _, counts = self.sync()
+        self.assertFalse(any(counts.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+from pyroaring import BitMap
+
+from snomed_characterization.batch_query_executor import BatchQueryExecutor
+from snomed_characterization.condition_cluster_analyzer import (
+    ConditionClusterAnalyzer,
+)
+from snomed_characterization.graphs.snomed_graph_builder import SNOMEDGraphBuilder
+
+
+class BatchQueryExecutorTest(unittest.TestCase):
+    def setUp(self):
+        snomed = SNOMEDGraphBuilder()
+        snomed.add_concept(2, [1])
+        snomed.add_concept(3, [1])
+        snomed.add_concept(4, [2])
+        snomed.add_concept(5, [2, 3])
+        self.analyzer = ConditionClusterAnalyzer([[4, 5], [4], [3, 5]], snomed.graph)
+
+    def test_snapshot_matches_analyzer(self):
+        snapshot = self.analyzer.snapshot()
+        for code1 in [1, 2, 3, 4, 5]:
+            for code2 in [1, 2, 3, 4, 5]:
+                self.assertAlmostEqual(
+                    snapshot.get_enhanced_similarity(code1, code2),
+                    self.analyzer.get_enhanced_similarity(code1, code2),
+                )
+
+    def test_snapshot_is_immutable(self):
+        snapshot = self.analyzer.snapshot()
+        with self.assertRaises(Exception):
+            snapshot.jaccard_coefficient = 1.0
+        with self.assertRaises(TypeError):
+            snapshot.ancestor_paths[4][1] = 0
+
+    def test_get_condition_clusters_does_not_mutate_coefficients(self):
+        self.analyzer.get_condition_clusters(
+            jaccard_coefficient=0.9, hierarchy_coefficient=0.1
+        )
+        self.assertEqual(self.analyzer.jaccard_coefficient, 0.4)
+        self.assertEqual(self.analyzer.hierarchy_coefficient, 0.6)
+
+    def test_batch_queries(self):
+        snapshot = self.analyzer.snapshot()
+        pairs = [(4, 5), (3, 4), (4, 4)] * 10
+        with BatchQueryExecutor(snapshot, max_workers=4, chunk_size=4) as executor:
+            ancestors = executor.get_all_ancestors([4, 5, 1])
+            descendants = executor.get_all_descendants([2])
+            similarities = executor.get_enhanced_similarities(pairs)
+
+        self.assertEqual(ancestors, [BitMap([1, 2]), BitMap([1, 2, 3]), BitMap()])
+        self.assertEqual(descendants, [BitMap([4, 5])])
+        np.testing.assert_allclose(
+            similarities, [snapshot.get_enhanced_similarity(*pair) for pair in pairs]
+        )
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import benchmark  # noqa: E402
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_runs_scenarios_on_synthetic_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            inputs = [
+                benchmark.generate_synthetic_input(directory, 300, num_patients=50)
+            ]
+
+            results = benchmark.run(inputs, ["*"], repeat=1)
+
+        records = {record["scenario"]: record for record in results["results"]}
+        self.assertEqual(records.keys(), benchmark.SCENARIOS.keys())
+        for name in [
+            "import/bitmap_graph",
+            "ancestors/bitmap",
+            "clustering/edge_list",
+            "community/label_propagation",
+        ]:
+            self.assertGreater(records[name]["seconds_median"], 0)
+        self.assertEqual(
+            records["ancestors/bitmap"]["operations"], benchmark.NUM_QUERIES
+        )
+        self.assertIn("peak_rss_delta_mb", records["build/bitmap"])
+        self.assertIn("tracemalloc", results["memory"])
+        # JSON serializable
+        json.dumps(results)
+
+    def test_peak_rss_delta_sees_freed_allocations(self):
+        def work():
+            block = bytearray(64 * 1024**2)
+            del block
+
+        delta = benchmark.measure_peak_rss_delta(work)
+        if delta is None:
+            self.skipTest("no /proc/self")
+        self.assertGreater(delta, 50)
+
+    def test_skips_database_without_omop_tables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "empty.duckdb")
+            benchmark.duckdb.connect(db_path).close()
+
+            results = benchmark.run(
+                [benchmark.BenchmarkInput(name="empty", db_path=db_path)],
+                ["import/*", "ancestors/*"],
+                repeat=1,
+            )
+
+        self.assertTrue(all("skipped" in record for record in results["results"]))
+
+    def test_compare_flags_regressions(self):
+        def results(**seconds):
+            return {
+                "results": [
+                    {"scenario": name, "input": "x", "seconds_median": value}
+                    for name, value in seconds.items()
+                ]
+            }
+
+        current = results(fast=0.5, slow=1.5, noise=0.0002, new=1.0)
+        current["results"].append(
+            {"scenario": "skipped", "input": "x", "skipped": "no patients"}
+        )
+        changes = benchmark.compare(
+            results(fast=1.0, slow=1.0, noise=0.0001, gone=1.0, skipped=1.0),
+            current,
+            threshold=0.1,
+        )
+
+        self.assertEqual(
+            {
+                change["scenario"]: (change["regression"], change["status"])
+                for change in changes
+            },
+            {
+                "fast": (False, "measured"),
+                "slow": (True, "measured"),
+                "noise": (False, "measured"),
+                "gone": (True, "missing"),
+                "skipped": (True, "skipped: no patients"),
+            },
+        )
+
+    def test_compare_command_exit_code(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, seconds in [("baseline", 1.0), ("current", 2.0)]:
+                path = os.path.join(directory, f"{name}.json")
+                with open(path, "w") as file:
+                    json.dump(
+                        {
+                            "results": [
+                                {
+                                    "scenario": "s",
+                                    "input": "x",
+                                    "seconds_median": seconds,
+                                }
+                            ]
+                        },
+                        file,
+                    )
+                paths.append(path)
+
+            self.assertEqual(benchmark.main(["compare", *paths]), 1)
+            self.assertEqual(benchmark.main(["compare", paths[0], paths[0]]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
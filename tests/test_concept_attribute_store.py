@@ -0,0 +1,67 @@
+import unittest
+from dataclasses import asdict
+import pandas as pd
+
+from snomed_characterization.concept_attribute_store import ConceptAttributeStore
+from snomed_characterization.graphs.snomed_complete_graph_builder import (
+    SNOMEDCompleteGraphBuilder,
+)
+from snomed_characterization.snomed_concept import RawSNOMEDConcept
+
+
+def make_concept(concept_id: int) -> RawSNOMEDConcept:
+    return RawSNOMEDConcept(
+        concept_id=concept_id,
+        concept_name=f"concept {concept_id}",
+        domain_id="Condition",
+        vocabulary_id="SNOMED",
+        concept_class_id="Clinical Finding",
+        standard_concept="S",
+        concept_code=str(concept_id),
+        valid_start_date="1970-01-01",
+        valid_end_date="2099-12-31",
+        invalid_reason=None,
+    )
+
+
+class TestConceptAttributeStore(unittest.TestCase):
+    def test_add_and_get(self):
+        store = ConceptAttributeStore()
+        store.add(make_concept(10))
+        store.add(make_concept(20))
+        store.add(make_concept(10))
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.index, {10: 0, 20: 1})
+        self.assertEqual(store.get(20), make_concept(20))
+        self.assertEqual(store.get(20).concept_name, "concept 20")
+        self.assertIsNone(store.get(30))
+        self.assertEqual(store.column("concept_id").tolist(), [10, 20])
+
+    def test_extend_from_dataframe(self):
+        store = ConceptAttributeStore()
+        store.add(make_concept(1))
+        df = pd.DataFrame([asdict(make_concept(c)) for c in (2, 1, 3, 2)])
+        df.loc[2, "invalid_reason"] = float("nan")
+        store.extend_from_dataframe(df)
+
+        self.assertEqual(store.index, {1: 0, 2: 1, 3: 2})
+        self.assertIsNone(store.get_attribute(3, "invalid_reason"))
+        self.assertEqual(store.get(2).concept_code, "2")
+        self.assertIsInstance(store.get(3).concept_id, int)
+
+    def test_views_are_slotted(self):
+        concept = make_concept(1)
+        self.assertFalse(hasattr(concept, "__dict__"))
+
+    def test_complete_graph_builder_keeps_ids_on_nodes(self):
+        builder = SNOMEDCompleteGraphBuilder()
+        builder.add_concept(make_concept(2), [make_concept(1)])
+
+        self.assertEqual(dict(builder.graph.nodes(data=True)), {2: {}, 1: {}})
+        self.assertEqual(builder.get_concept(1).concept_name, "concept 1")
+        self.assertEqual(builder.graph.edges[2, 1]["relationship"], "is_descendant_of")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import pkgutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import snomed_characterization
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LIGHT_MODULES = [
+    "snomed_characterization.condition_cluster_analyzer",
+    "snomed_characterization.batch_query_executor",
+    "snomed_characterization.snomed_cluster_visualizer",
+    # command line entry points
+    "snomed_characterization.services.import_nx_graph_into_neo4j",
+    "snomed_characterization.services.sync_nx_graph_with_neo4j",
+    "snomed_characterization.services.import_duckdb_concepts_to_bitmap_graph",
+    "snomed_characterization.synthetic_omop",
+]
+HEAVY_DEPENDENCIES = ["networkx", "pandas", "matplotlib", "seaborn", "neo4j"]
+
+# Cumulative import time of LIGHT_MODULES, numpy, pyroaring and duckdb included
+IMPORT_TIME_BUDGET_US = 1_000_000
+
+
+def run_python(code: str, cwd: str = ROOT, *args: str) -> subprocess.CompletedProcess:
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        cwd=cwd,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+class TestImportTime(unittest.TestCase):
+    def test_heavy_dependencies_load_lazily(self):
+        result = run_python(
+            "import sys\n"
+            + "".join(f"import {module}\n" for module in LIGHT_MODULES)
+            + f"print(*[m for m in {HEAVY_DEPENDENCIES!r} if m in sys.modules])"
+        )
+
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_import_time_within_budget(self):
+        result = run_python(
+            "".join(f"import {module}\n" for module in LIGHT_MODULES),
+            ROOT,
+            "-X",
+            "importtime",
+        )
+
+        # "import time: self [us] | cumulative | imported package", nested
+        # imports are indented, so top level lines add up to the total
+        total = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit() and not name.startswith("  "):
+                total += int(cumulative)
+
+        self.assertLess(total, IMPORT_TIME_BUDGET_US)
+
+    def test_modules_do_no_work_at_import(self):
+        modules = [
+            module.name
+            for module in pkgutil.walk_packages(
+                snomed_characterization.__path__, "snomed_characterization."
+            )
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = run_python(
+                "".join(f"import {module}\n" for module in modules), directory
+            )
+
+            self.assertEqual(result.stdout, "")
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+
+import matplotlib
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from snomed_characterization.snomed_cluster_visualizer import (
+    REPORT_PLOTS,
+    SNOMEDClusterVisualizer,
+    write_batch_reports,
+)
+
+matplotlib.use("Agg")
+
+
+def brute_force_similarity(sim_graph, cluster1, cluster2) -> float:
+    similarities = [
+        sim_graph.edges[c1, c2]["weight"]
+        for c1 in cluster1
+        for c2 in cluster2
+        if sim_graph.has_edge(c1, c2)
+    ]
+    return np.mean(similarities) if similarities else 0
+
+
+class TestSNOMEDClusterVisualizer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.sim_graph = nx.Graph()
+        self.sim_graph.add_nodes_from(range(100, 160))
+        for source, target in rng.integers(100, 160, size=(300, 2)):
+            if source != target:
+                self.sim_graph.add_edge(
+                    int(source), int(target), weight=float(rng.random())
+                )
+        nodes = list(self.sim_graph.nodes)
+        # the last few nodes belong to no cluster
+        self.clusters = [set(nodes[i : i + 7]) for i in range(0, 56, 7)]
+        conditions_df = pd.DataFrame(
+            {"concept_name": [f"concept {node}" for node in nodes]}, index=nodes
+        )
+        self.visualizer = SNOMEDClusterVisualizer(
+            self.sim_graph, self.clusters, conditions_df
+        )
+
+    def test_similarity_matrix_matches_pairwise_average(self):
+        matrix = self.visualizer.get_cluster_similarity_matrix()
+
+        expected = np.zeros((len(self.clusters), len(self.clusters)))
+        for i, cluster1 in enumerate(self.clusters):
+            for j, cluster2 in enumerate(self.clusters):
+                if i != j:
+                    expected[i, j] = brute_force_similarity(
+                        self.sim_graph, cluster1, cluster2
+                    )
+        np.testing.assert_allclose(matrix, expected)
+
+    def test_similarity_matrix_of_selected_clusters(self):
+        full = self.visualizer.get_cluster_similarity_matrix()
+
+        matrix = self.visualizer.get_cluster_similarity_matrix([5, 2, 0])
+
+        np.testing.assert_allclose(matrix, full[np.ix_([5, 2, 0], [5, 2, 0])])
+
+    def test_order_by_similarity_visits_every_cluster(self):
+        matrix = self.visualizer.get_cluster_similarity_matrix()
+
+        order = SNOMEDClusterVisualizer._order_by_similarity(matrix)
+
+        self.assertEqual(sorted(order), list(range(len(self.clusters))))
+        self.assertEqual(order[1], int(np.argmax(matrix[0])))
+
+    def test_heatmap_is_capped_at_max_clusters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "heatmap.png")
+
+            self.visualizer.plot_cluster_similarity_heatmap(path, max_clusters=4)
+
+            self.assertTrue(os.path.getsize(path) > 0)
+
+    def test_concept_connectivity_joins_names_and_clusters(self):
+        connectivity = self.visualizer.get_concept_connectivity()
+
+        self.assertEqual(len(connectivity), self.sim_graph.number_of_nodes())
+        self.assertTrue(connectivity["connections"].is_monotonic_decreasing)
+        for concept_id, row in connectivity.iterrows():
+            self.assertEqual(row["connections"], self.sim_graph.degree(concept_id))
+            self.assertEqual(row["concept"], f"concept {concept_id}")
+        cluster = connectivity["cluster"]
+        self.assertEqual(cluster.isna().sum(), 4)
+        self.assertIn(next(iter(self.clusters[2])), cluster[cluster == 3].index)
+
+    def test_cluster_compositions_take_top_concepts_of_largest_clusters(self):
+        self.clusters[3] |= self.clusters.pop()
+        compositions = self.visualizer.get_cluster_compositions(
+            self.visualizer.get_concept_connectivity(), 2, 3
+        )
+
+        self.assertEqual(
+            list(compositions["cluster"]), ["Cluster 1"] * 3 + ["Cluster 2"] * 3
+        )
+        largest = compositions[compositions["cluster"] == "Cluster 1"]
+        degrees = sorted(
+            (self.sim_graph.degree(node) for node in self.clusters[3]), reverse=True
+        )
+        self.assertEqual(list(largest["connections"]), degrees[:3])
+
+    def test_writes_batch_reports(self):
+        other = SNOMEDClusterVisualizer(
+            self.sim_graph, self.clusters[:3], pd.DataFrame()
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            written = write_batch_reports(
+                {"cohort_a": self.visualizer, "cohort_b": other},
+                directory,
+                max_workers=2,
+                dpi=50,
+            )
+
+            for cohort in ["cohort_a", "cohort_b"]:
+                names = sorted(os.listdir(os.path.join(directory, cohort)))
+                self.assertEqual(
+                    sorted(os.path.basename(path) for path in written[cohort]), names
+                )
+                for plot in REPORT_PLOTS:
+                    self.assertIn(f"{plot}.png", names)
+                self.assertIn("cluster_similarities.csv", names)
+            sizes = pd.read_csv(
+                os.path.join(directory, "cohort_b", "cluster_sizes.csv")
+            )
+            self.assertEqual(list(sizes["size"]), [7, 7, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
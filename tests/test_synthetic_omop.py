@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import duckdb
+import networkx as nx
+import numpy as np
+
+from snomed_characterization.services.import_duckdb_concepts_to_frozen_graph import (
+    ImportDuckDBConceptsToFrozenGraph,
+)
+from snomed_characterization.synthetic_omop import (
+    generate_cohort,
+    generate_snomed_hierarchy,
+    generate_synthetic_omop_database,
+    get_level_sizes,
+)
+
+
+class TestSyntheticOMOP(unittest.TestCase):
+    def test_level_sizes(self):
+        # Partial last level when fewer levels are enough
+        self.assertEqual(get_level_sizes(30, 12, 4.0).tolist(), [1, 4, 16, 9])
+        # Scaled up levels when `depth` levels are too few
+        sizes = get_level_sizes(1_000, 2, 4.0)
+        self.assertEqual(sizes.sum(), 1_000)
+        self.assertEqual(len(sizes), 3)
+        self.assertEqual(sizes[0], 1)
+
+    def test_hierarchy_is_a_single_rooted_multi_parent_dag(self):
+        hierarchy = generate_snomed_hierarchy(5_000, multi_parent_rate=0.35, seed=1)
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(hierarchy.concept_ids.tolist())
+        graph.add_edges_from(
+            zip(hierarchy.child_ids.tolist(), hierarchy.parent_ids.tolist())
+        )
+        self.assertTrue(nx.is_directed_acyclic_graph(graph))
+        self.assertEqual([n for n, d in graph.out_degree if d == 0], [1])
+
+        level = dict(zip(hierarchy.concept_ids.tolist(), hierarchy.levels.tolist()))
+        self.assertTrue(all(level[p] < level[c] for c, p in graph.edges))
+        self.assertLessEqual(hierarchy.depth, 12)
+
+        multi_parent = np.mean([d > 1 for _, d in graph.out_degree])
+        self.assertGreater(multi_parent, 0.2)
+        self.assertLess(multi_parent, 0.4)
+
+    def test_cohort_is_zipfian(self):
+        chunks = list(
+            generate_cohort(np.arange(1, 1_001), 2_000, chunk_size=500, seed=2)
+        )
+        person_ids = np.concatenate([person_ids for person_ids, _ in chunks])
+        concept_ids = np.concatenate([concept_ids for _, concept_ids in chunks])
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(np.unique(person_ids).tolist(), list(range(1, 2_001)))
+        self.assertTrue(np.isin(concept_ids, np.arange(1, 1_001)).all())
+        self.assertAlmostEqual(np.median(np.bincount(person_ids)[1:]), 6, delta=1)
+
+        prevalence = np.sort(np.bincount(concept_ids))[::-1]
+        # The top 10% of conditions hold most of the occurrences
+        self.assertGreater(prevalence[:100].sum() / prevalence.sum(), 0.5)
+
+    def test_database_has_omop_closure_and_loads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "synthetic.duckdb")
+            hierarchy = generate_synthetic_omop_database(db_path, 500, 100, seed=3)
+
+            with duckdb.connect(db_path, read_only=True) as connection:
+                closure = connection.execute("""
+                    SELECT ancestor_concept_id, descendant_concept_id,
+                        min_levels_of_separation, max_levels_of_separation
+                    FROM concept_ancestor
+                    WHERE ancestor_concept_id != descendant_concept_id
+                    """).fetchall()
+                patients = connection.execute(
+                    "SELECT count(DISTINCT person_id) FROM condition_occurrence"
+                ).fetchone()[0]
+
+            service = ImportDuckDBConceptsToFrozenGraph(db_path)
+            service.call()
+
+        graph = nx.DiGraph(
+            zip(hierarchy.child_ids.tolist(), hierarchy.parent_ids.tolist())
+        )
+        expected = {}
+        for concept_id in graph:
+            for ancestor, levels in nx.single_source_shortest_path_length(
+                graph, concept_id
+            ).items():
+                if ancestor != concept_id:
+                    expected[(ancestor, concept_id)] = levels
+        self.assertEqual(
+            {(a, d): min_levels for a, d, min_levels, _ in closure}, expected
+        )
+        self.assertTrue(
+            all(max_levels >= min_levels for *_, min_levels, max_levels in closure)
+        )
+
+        self.assertEqual(patients, 100)
+        self.assertEqual(len(service.snomed_graph.node_ids), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()